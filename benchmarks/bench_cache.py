@@ -0,0 +1,379 @@
+"""Latency and throughput of the cache backends and key derivation.
+
+Usage::
+
+    python -m benchmarks.bench_cache [--repeat N] [--sizes 1024,65536,...]
+                                     [--threads 1,4,16] [--replicas 2,8] [--json]
+
+Covers ``make_cache_key`` (cold and memoized), every backend (memory, local
+files, SQLite, Redis via :mod:`tests.redis_stub` over a real socket,
+and the composite ``FallbackCache``) for hit / miss / expired lookups and
+writes across payload sizes, tier promotion in ``FallbackCache``,
+concurrent readers, and replicas (separate ``FallbackCache`` instances
+sharing Redis) missing on the same key at once -- with generation leases
+only one of them should generate.  ``--json`` prints one JSON object per result so runs
+can be diffed or tracked over time.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from controller.cache import (
+    BlobCodec,
+    FallbackCache,
+    FingerprintRegistry,
+    LocalFileCache,
+    MemoryCache,
+    RedisCache,
+    SQLiteCache,
+    make_cache_key,
+)
+from controller.documents import RESUME_DATA, register_data_sources
+from tests.redis_stub import RedisStub
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from controller.cache import CacheBackend
+
+_DEFAULT_SIZES = (1024, 64 * 1024, 1024 * 1024, 8 * 1024 * 1024)
+_BUDGET = 1 << 30
+# Cap on bytes moved per measurement, so multi-MB payloads take few iterations
+_BYTES_PER_MEASUREMENT = 64 * 1024 * 1024
+
+
+def make_payload(size: int, seed: int = 0) -> bytes:
+    """Half random, half repetitive bytes: roughly as compressible as a document."""
+    rng = random.Random(seed)
+    text = b"Lead Backend Engineer, Python, Redis, PostgreSQL. " * (size // 100 + 1)
+    return (rng.randbytes(size // 2) + text)[:size]
+
+
+def _stats(samples: list[float]) -> dict[str, float]:
+    samples = sorted(samples)
+    return {
+        "ops": len(samples),
+        "mean_us": round(statistics.fmean(samples) * 1e6, 2),
+        "p50_us": round(samples[len(samples) // 2] * 1e6, 2),
+        "p99_us": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1e6, 2),
+    }
+
+
+def _replica(tmp: Path, lease_seconds: float | None) -> FallbackCache:
+    return FallbackCache(
+        memory=MemoryCache(max_bytes=_BUDGET),
+        codec=BlobCodec("zlib"),
+        local=LocalFileCache(base_dir=tmp, max_bytes=_BUDGET, janitor_interval=0),
+        lease_seconds=lease_seconds,
+    )
+
+
+def _measure(
+    fn: Callable[[int], object],
+    repeat: int,
+    setup: Callable[[int], object] | None = None,
+) -> dict[str, float]:
+    """Time ``fn(i)`` *repeat* times; ``setup(i)`` runs untimed before each call."""
+    samples = []
+    for i in range(repeat):
+        if setup is not None:
+            setup(i)
+        start = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - start)
+    return _stats(samples)
+
+
+def _fallback(tmp: Path) -> FallbackCache:
+    return FallbackCache(
+        memory=MemoryCache(max_bytes=_BUDGET, max_stale_seconds=0),
+        max_stale_seconds=0,
+        codec=BlobCodec("zlib"),
+        local=LocalFileCache(
+            base_dir=tmp / "fallback",
+            max_bytes=_BUDGET,
+            janitor_interval=0,
+            max_stale_seconds=0,
+        ),
+    )
+
+
+def _backends(tmp: Path) -> dict[str, Callable[[], CacheBackend]]:
+    # max_stale_seconds=0 so the "expired" path really expires instead of serving stale
+    return {
+        "memory": lambda: MemoryCache(max_bytes=_BUDGET, max_stale_seconds=0),
+        "local-file": lambda: LocalFileCache(
+            base_dir=tmp / "files", max_bytes=_BUDGET, janitor_interval=0, max_stale_seconds=0
+        ),
+        "sqlite": lambda: SQLiteCache(
+            path=tmp / "cache.sqlite3", max_bytes=_BUDGET, janitor_interval=0, max_stale_seconds=0
+        ),
+        "redis": lambda: RedisCache(max_stale_seconds=0),
+        "fallback": partial(_fallback, tmp),
+    }
+
+
+def bench_keys(repeat: int) -> list[dict]:
+    """Cost of deriving cache keys: full fingerprint vs the memoized path."""
+    register_data_sources()
+    data = RESUME_DATA["ENGLISH"]
+
+    def cold(_i: int) -> None:
+        registry = FingerprintRegistry()
+        registry.register("ENGLISH", data)
+        registry.fingerprint("ENGLISH")
+
+    return [
+        {"bench": "make_cache_key", "op": "cold", **_measure(cold, max(repeat // 10, 5))},
+        {
+            "bench": "make_cache_key",
+            "op": "warm",
+            **_measure(lambda _i: make_cache_key("ENGLISH"), repeat),
+        },
+    ]
+
+
+def _backend_ops(
+    backend: CacheBackend, key: str, payload: bytes, n: int
+) -> dict[str, dict[str, float]]:
+    """set / hit / miss / expired (and mapped view where supported) for one payload."""
+
+    def set_once(i: int) -> None:
+        if i == 0:
+            backend.set(key, payload)
+
+    def set_expiring(i: int) -> None:
+        backend.set(f"{key}:exp:{i}", payload, 0.001)
+        time.sleep(0.003)
+
+    ops = {
+        "set": _measure(lambda i: backend.set(f"{key}:{i}", payload), n),
+        "hit": _measure(lambda _i: backend.get(key), n, setup=set_once),
+        "miss": _measure(lambda i: backend.get(f"{key}:absent:{i}"), n),
+        "expired": _measure(lambda i: backend.get(f"{key}:exp:{i}"), n, setup=set_expiring),
+    }
+    if hasattr(backend, "get_view"):
+        ops["view"] = _measure(lambda _i: backend.get_view(key), n)
+    return ops
+
+
+def bench_backend(
+    name: str, factory: Callable[[], CacheBackend], sizes: list[int], repeat: int
+) -> list[dict]:
+    """set / hit / miss / expired (and mapped view where supported) per payload size."""
+    backend = factory()
+    rows = []
+    for size in sizes:
+        n = max(5, min(repeat, _BYTES_PER_MEASUREMENT // size))
+        ops = _backend_ops(backend, f"bench:{name}:{size}", make_payload(size), n)
+        for op, result in ops.items():
+            rows.append({"bench": "backend", "backend": name, "op": op, "size": size, **result})
+    return rows
+
+
+def _promotion(cache: FallbackCache, key: str, n: int) -> dict[str, float]:
+    """Time lookups of *key* with the memory tier emptied before each one."""
+
+    def drop_memory(_i: int) -> None:
+        cache._memory = MemoryCache(max_bytes=_BUDGET, max_stale_seconds=0)
+
+    return _measure(lambda _i: cache.get(key), n, setup=drop_memory)
+
+
+def bench_promotion(tmp: Path, sizes: list[int], repeat: int) -> list[dict]:
+    """FallbackCache lookups served by Redis / local and promoted into faster tiers."""
+    rows = []
+    for source in ("redis", "local"):
+        cache = _fallback(tmp / f"promote-{source}")
+        if source == "local":
+            cache._redis._disabled = True
+        for size in sizes:
+            n = max(5, min(repeat, _BYTES_PER_MEASUREMENT // size))
+            key = f"bench:promote:{size}"
+            cache.set(key, make_payload(size))
+            rows.append(
+                {
+                    "bench": "promotion",
+                    "backend": "fallback",
+                    "op": f"from-{source}",
+                    "size": size,
+                    **_promotion(cache, key, n),
+                }
+            )
+    return rows
+
+
+def _read_repeatedly(
+    backend: CacheBackend, key: str, repeat: int, barrier: threading.Barrier
+) -> None:
+    barrier.wait()
+    for _ in range(repeat):
+        backend.get(key)
+
+
+def bench_concurrent(
+    name: str, factory: Callable[[], CacheBackend], threads: list[int], repeat: int
+) -> list[dict]:
+    """Aggregate hit throughput of N threads reading one 64 KiB key."""
+    backend = factory()
+    key = f"bench:{name}:concurrent"
+    backend.set(key, make_payload(64 * 1024))
+    rows = []
+    for n_threads in threads:
+        barrier = threading.Barrier(n_threads + 1)
+        workers = [
+            threading.Thread(target=_read_repeatedly, args=(backend, key, repeat, barrier))
+            for _ in range(n_threads)
+        ]
+        for worker in workers:
+            worker.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+        rows.append(
+            {
+                "bench": "concurrent",
+                "backend": name,
+                "threads": n_threads,
+                "ops": n_threads * repeat,
+                "ops_per_s": round(n_threads * repeat / elapsed),
+            }
+        )
+    return rows
+
+
+def _race_replicas(
+    caches: list[FallbackCache], key: str, generation_ms: float
+) -> tuple[int, list[float]]:
+    """Have every cache miss on *key* at once; return generations run and latencies."""
+    generations = 0
+    lock = threading.Lock()
+    barrier = threading.Barrier(len(caches) + 1)
+    latencies: list[float] = []
+
+    def generate() -> bytes:
+        nonlocal generations
+        with lock:
+            generations += 1
+        time.sleep(generation_ms / 1000)
+        return make_payload(64 * 1024)
+
+    def replica(cache: FallbackCache) -> None:
+        barrier.wait()
+        start = time.perf_counter()
+        if cache.get_or_compute(key, generate) is None:
+            raise RuntimeError("replica got no value")
+        latencies.append(time.perf_counter() - start)
+
+    workers = [threading.Thread(target=replica, args=(cache,)) for cache in caches]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    for worker in workers:
+        worker.join()
+    return generations, latencies
+
+
+def bench_replicas(tmp: Path, replicas: list[int], generation_ms: float = 50) -> list[dict]:
+    """N replicas miss on one key at once: generations run and per-replica latency."""
+    rows = []
+    for n_replicas in replicas:
+        for leases in (False, True):
+            caches = [
+                _replica(tmp / f"replicas-{n_replicas}-{leases}" / str(i), 15 if leases else None)
+                for i in range(n_replicas)
+            ]
+            key = f"bench:replicas:{n_replicas}:{leases}:{time.time_ns()}"
+            generations, latencies = _race_replicas(caches, key, generation_ms)
+            rows.append(
+                {
+                    "bench": "replicas",
+                    "replicas": n_replicas,
+                    "leases": leases,
+                    "generations": generations,
+                    **_stats(latencies),
+                }
+            )
+    return rows
+
+
+def run(repeat: int, sizes: list[int], threads: list[int], replicas: list[int]) -> list[dict]:
+    rows = bench_keys(repeat)
+    with tempfile.TemporaryDirectory() as tmp_dir, RedisStub() as redis_stub:
+        os.environ["REDIS_URL"] = redis_stub.url
+        probe = RedisCache()
+        probe.set("bench:probe", b"ok")
+        if probe.get("bench:probe") != b"ok":
+            # A dead Redis fails fast and would report impossibly good numbers
+            raise SystemExit(f"Redis stand-in at {redis_stub.url} is not answering")
+        tmp = Path(tmp_dir)
+        for name, factory in _backends(tmp).items():
+            rows += bench_backend(name, factory, sizes, repeat)
+        rows += bench_promotion(tmp, sizes, repeat)
+        for name, factory in _backends(tmp / "concurrent").items():
+            rows += bench_concurrent(name, factory, threads, repeat)
+        rows += bench_replicas(tmp, replicas)
+    return rows
+
+
+def _print_table(rows: list[dict]) -> None:
+    for bench in dict.fromkeys(row["bench"] for row in rows):
+        group = [row for row in rows if row["bench"] == bench]
+        columns = [col for col in dict.fromkeys(c for row in group for c in row) if col != "bench"]
+        widths = {
+            col: max(len(col), *(len(str(row.get(col, ""))) for row in group)) for col in columns
+        }
+        print(f"\n== {bench}")
+        print("  ".join(col.rjust(widths[col]) for col in columns))
+        for row in group:
+            print("  ".join(str(row.get(col, "")).rjust(widths[col]) for col in columns))
+
+
+def _int_list(value: str) -> list[int]:
+    return [int(part) for part in value.split(",") if part]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200, help="iterations per measurement")
+    parser.add_argument(
+        "--sizes",
+        type=_int_list,
+        default=list(_DEFAULT_SIZES),
+        help="comma-separated payload sizes in bytes",
+    )
+    parser.add_argument(
+        "--threads", type=_int_list, default=[1, 4, 16], help="comma-separated reader thread counts"
+    )
+    parser.add_argument(
+        "--replicas",
+        type=_int_list,
+        default=[2, 8],
+        help="comma-separated replica counts sharing Redis",
+    )
+    parser.add_argument("--json", action="store_true", help="print JSON lines instead of tables")
+    args = parser.parse_args()
+
+    rows = run(args.repeat, args.sizes, args.threads, args.replicas)
+    if args.json:
+        for row in rows:
+            print(json.dumps(row))
+    else:
+        _print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Compression ratio and CPU cost of the cache codecs per payload type.
+
+Usage::
+
+    python -m benchmarks.bench_compression [--repeat N] [--json]
+
+Payloads are the real artefacts the cache stores: generated DOCX/PDF
+documents and the images under ``static/``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from controller.cache import BlobCodec
+from controller.documents import load_resume, render_document
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+_ROOT = Path(__file__).resolve().parent.parent
+_CODECS = ("identity", "zlib", "lzma")
+
+
+def _document(language: str, compact: bool) -> bytes:
+    return render_document(load_resume(language), language, compact)
+
+
+def load_payloads() -> dict[str, bytes]:
+    """Return the benchmark payloads keyed by type; generation failures are skipped."""
+    payloads: dict[str, bytes] = {}
+    for name, build in (
+        ("docx", lambda: _document("ENGLISH", compact=False)),
+        ("pdf", lambda: _document("RUSSIAN", compact=False)),
+    ):
+        try:
+            payloads[name] = build()
+        except Exception as exc:
+            print(f"skipping {name}: {exc}")
+    payloads["png"] = (_ROOT / "static" / "inno_logo.png").read_bytes()
+    payloads["jpeg"] = (_ROOT / "static" / "me.jpg").read_bytes()
+    payloads["svg-icon"] = b'<svg xmlns="http://www.w3.org/2000/svg">' + b"<path d='M0 0'/>" * 40
+    return payloads
+
+
+def _time_ms(fn: Callable[[], object], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def run(repeat: int) -> list[dict]:
+    """Encode and decode every payload with every codec; return one row per pair."""
+    rows = []
+    for payload_type, payload in load_payloads().items():
+        for codec_name in _CODECS:
+            codec = BlobCodec(codec_name)
+            encoded = codec.encode(payload)
+            assert codec.decode(encoded) == payload
+            rows.append(
+                {
+                    "payload": payload_type,
+                    "codec": codec_name,
+                    "size": len(payload),
+                    "stored": len(encoded),
+                    "ratio": round(len(encoded) / len(payload), 3),
+                    "compressed": encoded.startswith(BlobCodec.MAGIC),
+                    "encode_ms": round(_time_ms(partial(codec.encode, payload), repeat), 3),
+                    "decode_ms": round(_time_ms(partial(codec.decode, encoded), repeat), 3),
+                }
+            )
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20, help="iterations per measurement")
+    parser.add_argument("--json", action="store_true", help="print JSON lines instead of a table")
+    args = parser.parse_args()
+
+    rows = run(args.repeat)
+    if args.json:
+        for row in rows:
+            print(json.dumps(row))
+        return
+
+    print(
+        f"{'payload':<10}{'codec':<10}{'size':>10}{'stored':>10}{'ratio':>8}"
+        f"{'enc ms':>9}{'dec ms':>9}"
+    )
+    for row in rows:
+        print(
+            f"{row['payload']:<10}{row['codec']:<10}{row['size']:>10}{row['stored']:>10}"
+            f"{row['ratio']:>8}{row['encode_ms']:>9}{row['decode_ms']:>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
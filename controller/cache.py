@@ -1,263 +1,3744 @@
 """Dual-cache layer (L2) for resume report generation.
 
 Architecture:
-    Request -> L1: @st.cache_data (in-memory, per-process)
-                -> MISS -> L2: FallbackCache
-                   -> Redis HIT: return (also warm local file)
-                   -> Local file HIT: return
-                   -> MISS: generate -> store in both -> return
+    Request -> L2: FallbackCache
+                   -> Memory HIT: return (byte-budgeted LRU, no copy)
+                   -> Redis HIT: return (also warm local file + memory)
+                   -> Local file HIT: return (also warm memory)
+                   -> MISS: generate -> store in all tiers -> return
 
-Cache key: ``resume_report:<language>:<sha256_hex[:16]>``
+Cache key: ``resume_report:<language>:<fingerprint>`` where the fingerprint is a
+memoized SHA-256 of the language's data dict plus the generator source version.
+
+TTL, stale window, size limit and codec are chosen per key namespace (the part
+before the first ``:``) from a :class:`CachePolicy` table, overridable through
+``CACHE_POLICIES`` / ``CACHE_POLICY_FILE``.
 """
 
 from __future__ import annotations
 
+import atexit
 import hashlib
+import io
 import json
 import logging
+import lzma
+import math
+import mmap
 import os
+import random
+import sqlite3
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from collections import Counter, OrderedDict, deque
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from functools import partial
 from pathlib import Path
-from typing import Any, Protocol
+from stat import S_ISREG
+from typing import Any, NamedTuple, Protocol, TypeVar, cast
+from urllib.parse import quote, unquote, urlsplit
 
 logger = logging.getLogger(__name__)
 
 _CACHE_DIR = Path(".cache")
-DEFAULT_TTL_SECONDS = 24 * 60 * 60 # 
+# Outside _CACHE_DIR: LocalFileCache treats loose files there as legacy entries
+_SQLITE_PATH = Path(".cache.sqlite3")
+_GENERATIONS_PATH = Path(".cache.generations.json")
+# Freshness lifetime for namespaces without their own CachePolicy
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+_REDIS_MAX_CONNECTIONS = 16
+_LOCAL_MAX_BYTES = 256 * 1024 * 1024
+_MEMORY_MAX_BYTES = 64 * 1024 * 1024
+_JANITOR_INTERVAL_SECONDS = 10 * 60
+_TMP_SUFFIX = ".tmp"
+_TMP_MAX_AGE_SECONDS = 60 * 60
+_REDIS_TIMEOUT_SECONDS = 2
+# Hedged L2 reads: total time a lookup may wait on the local + Redis tiers,
+# and how long the local read gets a head start before Redis is also asked
+_READ_BUDGET_SECONDS = 0.05
+_HEDGE_DELAY_SECONDS = 0.005
+_HEDGE_WORKERS = 8  # per tier, so reads stuck on Redis never hold up local ones
+# Write-behind: distinct keys that may wait for persistence before writers
+# fall back to writing inline
+_WRITE_BEHIND_MAX_PENDING = 256
+# Redis circuit breaker: trip after this many consecutive failures, or when the
+# error rate over the last window of calls crosses the threshold
+_BREAKER_FAILURE_THRESHOLD = 3
+_BREAKER_ERROR_RATE = 0.5
+_BREAKER_WINDOW = 20
+# Open-state cool-down before a probe, doubled per failed probe up to the cap
+_BREAKER_RESET_SECONDS = 5
+_BREAKER_MAX_RESET_SECONDS = 2 * 60
+# How long past its TTL an entry may still be served while it is refreshed
+DEFAULT_MAX_STALE_SECONDS = 6 * 60 * 60
+# Stampede protection: TTLs are shortened by a random fraction up to this, and
+# fresh entries are refreshed early with XFetch probability (higher beta = earlier)
+_TTL_JITTER = 0.1
+_XFETCH_BETA = 1.0
+# Failed image downloads: base TTL for transient / permanent (4xx) errors,
+# doubled per consecutive failure up to the cap
+_NEGATIVE_TTL_SECONDS = 60
+_NEGATIVE_PERMANENT_TTL_SECONDS = 30 * 60
+_NEGATIVE_MAX_TTL_SECONDS = 6 * 60 * 60
+# Prefix of a stored FailedFetch record (image bytes never start with it)
+_FAILED_FETCH_MAGIC = b"\x00NEG"
+_IMAGE_TIMEOUT_SECONDS = 3
+# Floor for an upstream Cache-Control max-age used as the image TTL
+_IMAGE_MIN_TTL_SECONDS = 60
+# Image prefetcher: fixed worker pool, per-host cap and queue bound
+_PREFETCH_WORKERS = 4
+_PREFETCH_PER_HOST = 2
+_PREFETCH_MAX_QUEUE = 256
+_VIEW_CHUNK_BYTES = 64 * 1024
+# How long a process trusts its copy of the tag generations before re-reading
+_GENERATION_REFRESH_SECONDS = 5
+# Deferred SQLite hit/recency updates are flushed once this many accumulate
+_SQLITE_TOUCH_BATCH = 128
+# Cross-replica generation leases: lease lifetime, how long another replica
+# waits for the holder's result before generating itself, and its poll interval
+# (doubling up to the cap)
+_LEASE_TTL_SECONDS = 15
+_LEASE_WAIT_SECONDS = 10
+_LEASE_POLL_SECONDS = 0.02
+_LEASE_MAX_POLL_SECONDS = 0.25
+_LEASE_PREFIX = "cachelease:"
+# Invalidation broadcast: log catch-up interval (the whole mechanism when
+# pub/sub is unavailable), how long logged messages are kept, how often a
+# failed subscription is retried, and the most messages replayed at once
+_INVALIDATION_POLL_SECONDS = 2
+_INVALIDATION_LOG_TTL_SECONDS = 10 * 60
+_INVALIDATION_RESUBSCRIBE_SECONDS = 30
+_INVALIDATION_MAX_CATCH_UP = 1000
+
+
+# ---------------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------------
+
+def _namespace(key: str) -> str:
+    """Key family used for metrics, e.g. ``resume_report`` or ``image``."""
+    return key.partition(":")[0]
+
+
+class CacheMetrics:
+    """Thread-safe counters and latency histograms per tier, namespace and event.
+
+    Counter events: ``hit``, ``miss``, ``stale``, ``set``, ``error``,
+    ``eviction``, ``bytes_read`` and ``bytes_written``.  Latencies are kept in
+    fixed millisecond buckets per tier, namespace and operation, from which
+    :meth:`snapshot` estimates percentiles.
+    """
+
+    BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, math.inf)
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: Counter[tuple[str, str, str]] = Counter()
+        # (tier, namespace, op) -> [bucket counts..., total_ms, max_ms]
+        self._latency: dict[tuple[str, str, str], list[float]] = {}
+
+    def incr(self, tier: str, namespace: str, event: str, n: int = 1) -> None:
+        if n:
+            with self._lock:
+                self._counters[tier, namespace, event] += n
+
+    def observe(self, tier: str, namespace: str, op: str, seconds: float) -> None:
+        ms = seconds * 1000
+        with self._lock:
+            hist = self._latency.get((tier, namespace, op))
+            if hist is None:
+                hist = self._latency[tier, namespace, op] = [0.0] * (len(self.BUCKETS_MS) + 2)
+            hist[next(i for i, bound in enumerate(self.BUCKETS_MS) if ms <= bound)] += 1
+            hist[-2] += ms
+            hist[-1] = max(hist[-1], ms)
+
+    def record_lookup(
+        self, tier: str, keys: list[str], found: Mapping[str, bytes], seconds: float
+    ) -> None:
+        """Count hits, misses and bytes for a (possibly batched) lookup and its latency."""
+        for key in keys:
+            ns = _namespace(key)
+            data = found.get(key)
+            if data is None:
+                self.incr(tier, ns, "miss")
+            else:
+                self.incr(tier, ns, "hit")
+                self.incr(tier, ns, "bytes_read", len(data))
+        self.observe(tier, self._batch_namespace(keys), "get", seconds)
+
+    def record_store(self, tier: str, items: Mapping[str, bytes], seconds: float) -> None:
+        for key, value in items.items():
+            ns = _namespace(key)
+            self.incr(tier, ns, "set")
+            self.incr(tier, ns, "bytes_written", len(value))
+        self.observe(tier, self._batch_namespace(items), "set", seconds)
+
+    @staticmethod
+    def _batch_namespace(keys: Iterable[str]) -> str:
+        namespaces = {_namespace(key) for key in keys}
+        return namespaces.pop() if len(namespaces) == 1 else "mixed"
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return ``{"counters": ..., "latency": ...}`` as plain nested dicts."""
+        with self._lock:
+            counters = dict(self._counters)
+            latency = {name: list(hist) for name, hist in self._latency.items()}
+
+        counter_tree: dict[str, dict[str, dict[str, int]]] = {}
+        for (tier, ns, event), n in sorted(counters.items()):
+            counter_tree.setdefault(tier, {}).setdefault(ns, {})[event] = n
+
+        latency_tree: dict[str, dict[str, dict[str, dict[str, float]]]] = {}
+        for (tier, ns, op), hist in sorted(latency.items()):
+            buckets = hist[: len(self.BUCKETS_MS)]
+            count = int(sum(buckets))
+            latency_tree.setdefault(tier, {}).setdefault(ns, {})[op] = {
+                "count": count,
+                "mean_ms": round(hist[-2] / count, 3) if count else 0.0,
+                "p50_ms": self._percentile(buckets, count, 0.50, hist[-1]),
+                "p95_ms": self._percentile(buckets, count, 0.95, hist[-1]),
+                "p99_ms": self._percentile(buckets, count, 0.99, hist[-1]),
+                "max_ms": round(hist[-1], 3),
+            }
+        return {"counters": counter_tree, "latency": latency_tree}
+
+    def _percentile(self, buckets: list[float], count: int, q: float, max_ms: float) -> float:
+        """Upper bound of the bucket holding the *q* quantile (capped at the max seen)."""
+        if not count:
+            return 0.0
+        seen = 0.0
+        for bound, n in zip(self.BUCKETS_MS, buckets, strict=True):
+            seen += n
+            if seen >= q * count:
+                return round(min(bound, max_ms), 3)
+        return round(max_ms, 3)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._latency.clear()
+
+
+_metrics = CacheMetrics()
+
+
+# ---------------------------------------------------------------------------
+# Per-namespace policies
+# ---------------------------------------------------------------------------
+
+class CachePolicy(NamedTuple):
+    """Lifetime and storage rules for the keys of one namespace.
+
+    Attributes:
+        ttl_seconds: Freshness lifetime when the writer does not give one.
+        max_stale_seconds: How long past its TTL an entry is still served while
+            it is refreshed (the stale-while-revalidate window).
+        max_entry_bytes: Largest value worth caching; bigger values are not
+            stored (0: no limit).
+        codec: :class:`BlobCodec` name for Redis / local blobs; *None* uses the
+            cache's own codec.
+        negative_ttl_seconds: Base lifetime of failure records, doubled per
+            consecutive failure.
+    """
+
+    ttl_seconds: float = DEFAULT_TTL_SECONDS
+    max_stale_seconds: float = DEFAULT_MAX_STALE_SECONDS
+    max_entry_bytes: int = 0
+    codec: str | None = None
+    negative_ttl_seconds: float = _NEGATIVE_TTL_SECONDS
+
+
+# Namespaces not listed (``resume_report`` documents among them) use the
+# default policy: their keys embed the data + generator fingerprint, so every
+# deploy moves to new keys anyway and the TTL only bounds how long superseded
+# variants linger
+_BUILTIN_POLICIES: dict[str, CachePolicy] = {
+    # Remote logos almost never change (an upstream max-age still wins)
+    "image": CachePolicy(
+        ttl_seconds=7 * 24 * 60 * 60,
+        max_stale_seconds=7 * 24 * 60 * 60,
+        max_entry_bytes=16 * 1024 * 1024,
+    ),
+    # Resized local images, keyed by source digest; PNG / JPEG do not compress
+    "asset": CachePolicy(
+        ttl_seconds=30 * 24 * 60 * 60,
+        max_stale_seconds=30 * 24 * 60 * 60,
+        codec="identity",
+    ),
+    # Invalidation log (see InvalidationBus): only needed to catch up replicas
+    "cacheinval": CachePolicy(ttl_seconds=_INVALIDATION_LOG_TTL_SECONDS, max_stale_seconds=0),
+}
+
+
+class CachePolicies:
+    """Maps key namespaces to :class:`CachePolicy`, falling back to *default*."""
+
+    def __init__(
+        self,
+        policies: Mapping[str, CachePolicy] | None = None,
+        default: CachePolicy = CachePolicy(),
+    ) -> None:
+        self._policies = dict(_BUILTIN_POLICIES if policies is None else policies)
+        self.default = default
+
+    def for_key(self, key: str) -> CachePolicy:
+        return self._policies.get(_namespace(key), self.default)
+
+    def namespaces(self) -> dict[str, CachePolicy]:
+        """Namespaces with their own policy (everything else uses :attr:`default`)."""
+        return dict(self._policies)
+
+    @classmethod
+    def from_env(cls) -> CachePolicies:
+        """Built-in policies with overrides from ``CACHE_POLICIES`` or ``CACHE_POLICY_FILE``.
+
+        Either holds a JSON object mapping namespaces (or ``"default"``) to
+        :class:`CachePolicy` fields, e.g.
+        ``{"image": {"ttl_seconds": 2592000}, "default": {"max_stale_seconds": 0}}``.
+        Fields left out keep their built-in values; invalid configuration is
+        logged and ignored.
+        """
+        raw = os.environ.get("CACHE_POLICIES")
+        source = "CACHE_POLICIES"
+        path = os.environ.get("CACHE_POLICY_FILE")
+        if raw is None and path:
+            source = path
+            try:
+                raw = Path(path).read_text()
+            except OSError:
+                logger.warning("Cannot read cache policy file %s, using defaults", path)
+        policies = cls()
+        if raw:
+            try:
+                policies._apply(json.loads(raw))
+            except (ValueError, TypeError):
+                logger.warning(
+                    "Invalid cache policies in %s, using defaults", source, exc_info=True
+                )
+                policies = cls()
+        return policies
+
+    def _apply(self, overrides: Mapping[str, Mapping[str, Any]]) -> None:
+        if not isinstance(overrides, Mapping):
+            raise TypeError("cache policies must be a JSON object")
+        default_fields = self._validated(overrides.get("default", {}))
+        self.default = self.default._replace(**default_fields)
+        for namespace, fields in overrides.items():
+            if namespace != "default":
+                base = self._policies.get(namespace, self.default)
+                self._policies[namespace] = base._replace(**self._validated(fields))
+        for policy in (self.default, *self._policies.values()):
+            if policy.codec is not None and policy.codec not in _CODECS_BY_NAME:
+                raise ValueError(f"Unknown codec {policy.codec!r}")
+
+    @staticmethod
+    def _validated(fields: Mapping[str, Any]) -> dict[str, Any]:
+        """Coerce override *fields* to :class:`CachePolicy` types (numbers finite, >= 0)."""
+        if not isinstance(fields, Mapping):
+            raise TypeError("a cache policy must be a JSON object")
+        validated: dict[str, Any] = {}
+        for name, value in fields.items():
+            if name not in CachePolicy._fields:
+                raise ValueError(f"Unknown cache policy field {name!r}")
+            if name == "codec":
+                if value is not None and not isinstance(value, str):
+                    raise TypeError(f"codec must be a string, not {value!r}")
+                validated[name] = value
+                continue
+            if isinstance(value, bool) or not isinstance(value, int | float | str):
+                raise TypeError(f"{name} must be a number, not {value!r}")
+            number = int(value) if name == "max_entry_bytes" else float(value)
+            if not (math.isfinite(number) and number >= 0):
+                raise ValueError(f"{name} must be a non-negative number, not {value!r}")
+            validated[name] = number
+        return validated
 
 
 # ---------------------------------------------------------------------------
 # Backend protocol
 # ---------------------------------------------------------------------------
 
+class CacheEntry(NamedTuple):
+    """A cached value and the wall-clock time at which it stops being fresh.
+
+    *delta* is how many seconds the value took to compute (0 if unknown); it
+    drives probabilistic early refresh in :class:`FallbackCache`.
+    """
+
+    value: bytes
+    expires_at: float
+    delta: float = 0.0
+
+    @property
+    def stale(self) -> bool:
+        return time.time() > self.expires_at
+
+    def remaining_ttl(self) -> float:
+        """Seconds until the entry goes stale (negative once it has)."""
+        return self.expires_at - time.time()
+
+
+class CacheView(NamedTuple):
+    """A read-only, possibly memory-mapped view of a cached value.
+
+    Slicing and iterating :meth:`chunks` do not copy; ``bytes(view.data)``
+    does.  A view over a local cache file stays valid after the file is
+    replaced or evicted (the mapping keeps the old inode alive).
+    """
+
+    data: memoryview
+    expires_at: float
+
+    @property
+    def stale(self) -> bool:
+        return time.time() > self.expires_at
+
+    @property
+    def size(self) -> int:
+        return self.data.nbytes
+
+    def chunks(self, chunk_size: int = _VIEW_CHUNK_BYTES) -> Iterator[memoryview]:
+        """Yield consecutive zero-copy slices of at most *chunk_size* bytes."""
+        for offset in range(0, self.data.nbytes, chunk_size):
+            yield self.data[offset : offset + chunk_size]
+
+    def open(self) -> io.BufferedReader:
+        """Return a seekable binary file object reading from the view."""
+        return io.BufferedReader(_ViewStream(self.data))
+
+    def as_bytes(self) -> bytes:
+        """The value as ``bytes``: the wrapped object itself if the view spans it, else a copy."""
+        obj = self.data.obj
+        if isinstance(obj, bytes) and len(obj) == self.data.nbytes:
+            return obj
+        return self.data.tobytes()
+
+
+class _ViewStream(io.RawIOBase):
+    """Raw binary stream over a memoryview; reads copy only into the caller's buffer."""
+
+    def __init__(self, data: memoryview) -> None:
+        self._data = data
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        chunk = self._data[self._pos : self._pos + len(buffer)]
+        n = chunk.nbytes
+        buffer[:n] = chunk
+        self._pos += n
+        return n
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: self._data.nbytes}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+
+# Produces a value to cache.  Returning a CacheEntry instead of bytes lets the
+# function choose the TTL (e.g. from HTTP caching headers); *None* stores nothing.
+ComputeFn = Callable[[], "bytes | CacheEntry | None"]
+
+
 class CacheBackend(Protocol):
     def get(self, key: str) -> bytes | None: ...
-    def set(self, key: str, value: bytes) -> None: ...
+    def get_entry(self, key: str) -> CacheEntry | None: ...
+    def set(self, key: str, value: bytes, ttl_seconds: float | None = None) -> None: ...
+    def get_many(self, keys: Iterable[str]) -> dict[str, bytes]: ...
+    def get_entries(self, keys: Iterable[str]) -> dict[str, CacheEntry]: ...
+    def set_many(self, items: Mapping[str, bytes], ttl_seconds: float | None = None) -> None: ...
+
+
+class _EntryBackend:
+    """Derives the plain-bytes and batched API from ``get_entry`` / ``set``.
+
+    ``get`` and ``get_many`` only return *fresh* values; ``get_entry`` also
+    returns stale entries that are still inside the backend's max-staleness
+    window, for stale-while-revalidate callers.
+    """
+
+    # Instance-wide overrides; None defers to the key's namespace policy
+    _ttl_seconds: float | None = None
+    _max_stale_seconds: float | None = None
+
+    def get_entry(self, key: str) -> CacheEntry | None:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl_seconds: float | None = None) -> None:
+        raise NotImplementedError
+
+    def _ttl_for(self, key: str, ttl_seconds: float | None = None) -> float:
+        if ttl_seconds is not None:
+            return ttl_seconds
+        if self._ttl_seconds is not None:
+            return self._ttl_seconds
+        return _policies.for_key(key).ttl_seconds
+
+    def _max_stale_for(self, key: str) -> float:
+        if self._max_stale_seconds is not None:
+            return self._max_stale_seconds
+        return _policies.for_key(key).max_stale_seconds
+
+    def get(self, key: str) -> bytes | None:
+        entry = self.get_entry(key)
+        if entry is None or entry.stale:
+            return None
+        return entry.value
+
+    def get_entries(self, keys: Iterable[str]) -> dict[str, CacheEntry]:
+        found: dict[str, CacheEntry] = {}
+        for key in keys:
+            entry = self.get_entry(key)
+            if entry is not None:
+                found[key] = entry
+        return found
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, bytes]:
+        return {
+            key: entry.value for key, entry in self.get_entries(keys).items() if not entry.stale
+        }
+
+    def set_many(self, items: Mapping[str, bytes], ttl_seconds: float | None = None) -> None:
+        for key, value in items.items():
+            self.set(key, value, ttl_seconds)
 
 
 # ---------------------------------------------------------------------------
-# Local file backend
+# Compression codecs
+# ---------------------------------------------------------------------------
+
+class Codec(NamedTuple):
+    """A named compression algorithm with a one-byte on-disk identifier."""
+
+    name: str
+    codec_id: int
+    compress: Callable[[bytes], bytes]
+    decompress: Callable[[bytes], bytes]
+
+
+_CODECS_BY_NAME: dict[str, Codec] = {}
+_CODECS_BY_ID: dict[int, Codec] = {}
+
+
+def register_codec(codec: Codec) -> None:
+    """Make *codec* available to :class:`BlobCodec` by name and header id."""
+    existing = _CODECS_BY_ID.get(codec.codec_id)
+    if existing is not None and existing.name != codec.name:
+        raise ValueError(f"Codec id {codec.codec_id} already used by {existing.name!r}")
+    _CODECS_BY_NAME[codec.name] = codec
+    _CODECS_BY_ID[codec.codec_id] = codec
+
+
+register_codec(Codec("identity", 0, bytes, bytes))
+register_codec(Codec("zlib", 1, lambda b: zlib.compress(b, 6), zlib.decompress))
+register_codec(Codec("lzma", 2, lambda b: lzma.compress(b, preset=6), lzma.decompress))
+
+
+class BlobCodec:
+    """Wraps cache values in a small self-describing compression header.
+
+    Encoded blobs are ``MAGIC + codec_id + payload``.  Values below *min_size*,
+    values that start with the signature of an already-compressed format, and
+    values that would shrink by less than *min_saving* are stored as-is, so
+    decoding them costs nothing.  Blobs without the header (entries written
+    before compression existed) are returned unchanged.
+    """
+
+    MAGIC = b"\x00RCZ"
+    _HEADER_SIZE = len(MAGIC) + 1
+    # PNG, JPEG, GIF, WebP/RIFF, gzip, xz
+    _PRECOMPRESSED = (b"\x89PNG", b"\xff\xd8\xff", b"GIF8", b"RIFF", b"\x1f\x8b", b"\xfd7zXZ")
+
+    def __init__(self, codec: str = "zlib", min_size: int = 1024, min_saving: float = 0.1) -> None:
+        if codec not in _CODECS_BY_NAME:
+            raise ValueError(f"Unknown codec {codec!r}")
+        self._codec = _CODECS_BY_NAME[codec]
+        self._min_size = min_size
+        self._min_saving = min_saving
+
+    def encode(self, value: bytes) -> bytes:
+        if (
+            self._codec.codec_id != 0
+            and len(value) >= self._min_size
+            and not value.startswith(self._PRECOMPRESSED)
+        ):
+            compressed = self._codec.compress(value)
+            if len(compressed) <= len(value) * (1 - self._min_saving):
+                return self.MAGIC + bytes((self._codec.codec_id,)) + compressed
+        if value.startswith(self.MAGIC):
+            # Raw value that happens to look like a header: tag it explicitly
+            return self.MAGIC + b"\x00" + value
+        return value
+
+    @classmethod
+    def is_encoded(cls, blob: bytes | memoryview) -> bool:
+        """Whether *blob* carries a codec header (works on views without copying them)."""
+        return blob[: len(cls.MAGIC)] == cls.MAGIC
+
+    def decode(self, blob: bytes) -> bytes:
+        if not blob.startswith(self.MAGIC):
+            return blob
+        codec_id = blob[len(self.MAGIC)]
+        codec = _CODECS_BY_ID.get(codec_id)
+        if codec is None:
+            raise ValueError(f"Unknown codec id {codec_id} in cached blob")
+        return codec.decompress(blob[self._HEADER_SIZE :])
+
+
+class DeltaFrame:
+    """Prefixes an encoded blob with the time its value took to compute.
+
+    Framed blobs are ``MAGIC + float32 seconds + blob``; the frame is only
+    added when the delta is known (or the blob would otherwise look framed),
+    so unframed blobs -- including everything written before -- read back
+    with a delta of 0.  Backends store the frame as part of the value.
+    """
+
+    MAGIC = b"\x00RCT"
+    _HEADER = struct.Struct(">4sf")
+
+    @classmethod
+    def wrap(cls, blob: bytes, delta: float) -> bytes:
+        if delta <= 0 and not blob.startswith(cls.MAGIC):
+            return blob
+        return cls._HEADER.pack(cls.MAGIC, max(delta, 0.0)) + blob
+
+    @classmethod
+    def unwrap(cls, blob: bytes) -> tuple[bytes, float]:
+        """Return ``(blob, delta)``; unframed blobs come back unchanged with 0."""
+        if not blob.startswith(cls.MAGIC):
+            return blob, 0.0
+        _magic, delta = cls._HEADER.unpack_from(blob)
+        return blob[cls._HEADER.size :], delta
+
+    @classmethod
+    def unwrap_view(cls, data: memoryview) -> memoryview:
+        """Strip the frame from a view without copying it."""
+        if data[: len(cls.MAGIC)] != cls.MAGIC:
+            return data
+        return data[cls._HEADER.size :]
+
+
+# ---------------------------------------------------------------------------
+# In-process memory backend
 # ---------------------------------------------------------------------------
 
-class LocalFileCache:
-    """Stores blobs in ``.cache/`` directory with optional TTL."""
+class MemoryCache(_EntryBackend):
+    """In-process LRU dict bounded by the total size of stored values.
+
+    Values are returned by reference (``bytes`` are immutable), so a hit costs
+    a dict lookup and no copy.  Values larger than the whole budget are not
+    stored.
+    """
 
     def __init__(
         self,
-        base_dir: Path = _CACHE_DIR,
-        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+        max_bytes: int = _MEMORY_MAX_BYTES,
+        ttl_seconds: float | None = None,
+        max_stale_seconds: float | None = None,
     ) -> None:
-        self._base_dir = base_dir
+        self._max_bytes = max_bytes
         self._ttl_seconds = ttl_seconds
+        self._max_stale_seconds = max_stale_seconds
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
 
-    def _path_for(self, key: str) -> Path:
-        safe_name = key.replace(":", "_")
-        return self._base_dir / safe_name
+    def get_entry(self, key: str) -> CacheEntry | None:
+        start = time.perf_counter()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() > entry.expires_at + self._max_stale_for(key):
+                self._discard(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        _metrics.record_lookup(
+            "memory", [key], {key: entry.value} if entry else {}, time.perf_counter() - start
+        )
+        return entry
 
-    def get(self, key: str) -> bytes | None:
-        path = self._path_for(key)
-        if path.exists():
-            import time
+    def set(
+        self, key: str, value: bytes, ttl_seconds: float | None = None, delta: float = 0.0
+    ) -> None:
+        size = len(value)
+        if size > self._max_bytes:
+            return
+        start = time.perf_counter()
+        entry = CacheEntry(value, time.time() + self._ttl_for(key, ttl_seconds), delta)
+        evicted_keys: list[str] = []
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = entry
+            self._total_bytes += size
+            while self._total_bytes > self._max_bytes:
+                evicted_key, evicted = self._entries.popitem(last=False)
+                self._total_bytes -= len(evicted.value)
+                evicted_keys.append(evicted_key)
+        self.evictions += len(evicted_keys)
+        for evicted_key in evicted_keys:
+            _metrics.incr("memory", _namespace(evicted_key), "eviction")
+        _metrics.record_store("memory", {key: value}, time.perf_counter() - start)
 
-            age = time.time() - path.stat().st_mtime
-            if age > self._ttl_seconds:
-                logger.debug("LocalFileCache EXPIRED (%ds old): %s", int(age), key)
-                path.unlink(missing_ok=True)
-                return None
-            logger.debug("LocalFileCache HIT: %s", key)
-            return path.read_bytes()
-        logger.debug("LocalFileCache MISS: %s", key)
-        return None
+    def set_many(
+        self, items: Mapping[str, bytes], ttl_seconds: float | None = None, delta: float = 0.0
+    ) -> None:
+        for key, value in items.items():
+            self.set(key, value, ttl_seconds, delta)
 
-    def set(self, key: str, value: bytes) -> None:
-        self._base_dir.mkdir(parents=True, exist_ok=True)
-        self._path_for(key).write_bytes(value)
-        logger.debug("LocalFileCache SET: %s", key)
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._discard(key)
+
+    def _discard(self, key: str) -> None:
+        """Remove *key* if present (caller holds the lock)."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= len(entry.value)
 
 
 # ---------------------------------------------------------------------------
-# Redis backend
+# Local file backend
 # ---------------------------------------------------------------------------
 
-class RedisCache:
-    """Lazy connection from ``st.secrets["REDIS_URL"]`` or ``os.environ["REDIS_URL"]``.
+class LocalFileCache(_EntryBackend):
+    """Stores blobs under ``.cache/`` with a TTL, a byte budget and atomic writes.
 
-    7-day TTL.  All errors are caught so Redis unavailability never breaks the app.
+    Layout: ``<base_dir>/<shard>/<key>`` where the shard is the first two hex
+    digits of the key's SHA-256, keeping directories small.  Every file starts
+    with a fixed header recording when it was written and when it expires.
+
+    Writes go to a temp file in the shard and are ``os.replace``-d into place,
+    so concurrent readers see either the old blob or the new one, never a
+    torn file.  When the total size exceeds *max_bytes*, entries are evicted
+    by *eviction* policy (``"lru"`` or ``"lfu"``).  Expired entries are kept
+    for *max_stale_seconds* so they can be served stale; a daemon janitor
+    thread periodically removes entries past that and leftover temp files.
     """
 
-    def __init__(self) -> None:
-        self._client: Any | None = None
-        self._unavailable = False
+    _HEADER = struct.Struct(">4sdd")  # magic, stored_at, expires_at
+    _MAGIC = b"LFC1"
+    _EVICTION_POLICIES = ("lru", "lfu")
 
-    def _connect(self) -> Any | None:
-        if self._unavailable:
-            return None
-        if self._client is not None:
-            return self._client
+    def __init__(
+        self,
+        base_dir: Path = _CACHE_DIR,
+        ttl_seconds: float | None = None,
+        max_bytes: int = _LOCAL_MAX_BYTES,
+        eviction: str = "lru",
+        janitor_interval: float = _JANITOR_INTERVAL_SECONDS,
+        max_stale_seconds: float | None = None,
+    ) -> None:
+        if eviction not in self._EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy {eviction!r}")
+        self._base_dir = base_dir
+        self._ttl_seconds = ttl_seconds
+        self._max_bytes = max_bytes
+        self._eviction = eviction
+        self._janitor_interval = janitor_interval
+        self._max_stale_seconds = max_stale_seconds
 
-        url = self._resolve_url()
-        if url is None:
-            self._unavailable = True
-            return None
+        # path -> [size, hits]; insertion order doubles as recency for LRU
+        self._index: OrderedDict[Path, list[int]] = OrderedDict()
+        self._total_bytes = 0
+        self._indexed = False
+        self._lock = threading.Lock()
+        self._janitor: threading.Thread | None = None
+        self._janitor_stop = threading.Event()
+        self.evictions = 0
+
+    def _path_for(self, key: str) -> Path:
+        shard = hashlib.sha256(key.encode()).hexdigest()[:2]
+        # Reversible quoting, so the key (and its namespace) can be recovered
+        return self._base_dir / shard / quote(key, safe="")
+
+    @staticmethod
+    def _key_for(path: Path) -> str:
+        return unquote(path.name)
 
+    # -- reads ---------------------------------------------------------------
+
+    def get_entry(self, key: str) -> CacheEntry | None:
+        start = time.perf_counter()
+        entry = self._read(key)
+        _metrics.record_lookup(
+            "local", [key], {key: entry.value} if entry else {}, time.perf_counter() - start
+        )
+        return entry
+
+    def _read(self, key: str) -> CacheEntry | None:
+        path = self._path_for(key)
         try:
-            import redis as redis_lib
+            with path.open("rb") as f:
+                header = f.read(self._HEADER.size)
+                data = f.read()
+        except FileNotFoundError:
+            logger.debug("LocalFileCache MISS: %s", key)
+            return None
+        except OSError:
+            logger.warning("LocalFileCache read failed: %s", key, exc_info=True)
+            _metrics.incr("local", _namespace(key), "error")
+            return None
 
-            self._client = redis_lib.from_url(
-                url,
-                decode_responses=False,
-                socket_connect_timeout=2,
-                socket_timeout=2,
-            )
-            self._client.ping()
-            logger.info("RedisCache connected")
-            return self._client
-        except Exception:
-            # logger.warning(ex)
-            logger.warning("RedisCache connection failed — falling back", exc_info=True)
-            self._unavailable = True
+        expires_at = self._check_header(key, path, header)
+        if expires_at is None:
             return None
+        self._touch(path, len(header) + len(data))
+        logger.debug("LocalFileCache HIT: %s", key)
+        return CacheEntry(data, expires_at)
 
-    @staticmethod
-    def _resolve_url() -> str | None:
-        # Prefer env var (no side-effects), then Streamlit secrets
-        url = os.environ.get("REDIS_URL")
-        if url:
-            return url
+    def get_view(self, key: str) -> CacheView | None:
+        """Like :meth:`get_entry`, but map the file instead of reading it.
 
-        # Only touch st.secrets when a secrets.toml actually exists,
-        # otherwise Streamlit displays a warning banner on the page.
-        _secrets_paths = (
-            Path(".streamlit/secrets.toml"),
-            Path.home() / ".streamlit" / "secrets.toml",
-        )
-        if not any(p.exists() for p in _secrets_paths):
-            logger.debug("No secrets.toml found, skipping st.secrets")
+        The returned view points straight into the page cache, so a hit
+        allocates nothing proportional to the blob size.
+        """
+        start = time.perf_counter()
+        path = self._path_for(key)
+        mapped = self._map(key, path)
+        if mapped is None:
+            _metrics.record_lookup("local", [key], {}, time.perf_counter() - start)
             return None
+        expires_at = self._check_header(key, path, mapped[: self._HEADER.size])
+        if expires_at is None:
+            mapped.close()
+            _metrics.record_lookup("local", [key], {}, time.perf_counter() - start)
+            return None
+        self._touch(path, len(mapped))
+        data = memoryview(mapped)[self._HEADER.size :]
+        _metrics.record_lookup("local", [key], {key: data}, time.perf_counter() - start)
+        logger.debug("LocalFileCache HIT (mapped): %s", key)
+        return CacheView(data, expires_at)
 
+    def _map(self, key: str, path: Path) -> mmap.mmap | None:
         try:
-            import streamlit as st
-
-            return st.secrets["REDIS_URL"]
-        except Exception:
-            pass
+            with path.open("rb") as f:
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            logger.debug("LocalFileCache MISS: %s", key)
+        except ValueError:
+            # Zero-length file: nothing to map, treat as corrupt
+            self._remove(path)
+        except OSError:
+            logger.warning("LocalFileCache mmap failed: %s", key, exc_info=True)
+            _metrics.incr("local", _namespace(key), "error")
         return None
 
-    def get(self, key: str) -> bytes | None:
-        client = self._connect()
-        if client is None:
+    def _check_header(self, key: str, path: Path, header: bytes) -> float | None:
+        """Return the entry's expiry; remove the file if corrupt or past the stale window."""
+        expires_at = self._parse_expiry(header)
+        if expires_at is None:
+            logger.warning("LocalFileCache CORRUPT header, dropping: %s", key)
+            self._remove(path)
             return None
-        try:
-            data = client.get(key)
-            if data is not None:
-                logger.debug("RedisCache HIT: %s", key)
-            else:
-                logger.debug("RedisCache MISS: %s", key)
-            return data
-        except Exception:
-            logger.warning("RedisCache GET failed", exc_info=True)
+        if time.time() > expires_at + self._max_stale_for(key):
+            logger.debug("LocalFileCache EXPIRED: %s", key)
+            self._remove(path)
             return None
+        return expires_at
 
-    def set(self, key: str, value: bytes) -> None:
-        client = self._connect()
-        if client is None:
-            return
+    def _parse_expiry(self, header: bytes) -> float | None:
+        if len(header) != self._HEADER.size:
+            return None
+        magic, _stored_at, expires_at = self._HEADER.unpack(header)
+        return expires_at if magic == self._MAGIC else None
+
+    # -- writes --------------------------------------------------------------
+
+    def set(self, key: str, value: bytes, ttl_seconds: float | None = None) -> None:
+        start = time.perf_counter()
+        path = self._path_for(key)
+        now = time.time()
+        header = self._HEADER.pack(self._MAGIC, now, now + self._ttl_for(key, ttl_seconds))
         try:
-            client.set(key, value, ex=DEFAULT_TTL_SECONDS)
-            logger.debug("RedisCache SET: %s", key)
-        except Exception:
-            logger.warning("RedisCache SET failed", exc_info=True)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".", suffix=_TMP_SUFFIX)
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(header)
+                    f.write(value)
+                os.replace(tmp_name, path)
+            except BaseException:
+                Path(tmp_name).unlink(missing_ok=True)
+                raise
+        except OSError:
+            logger.warning("LocalFileCache SET failed: %s", key, exc_info=True)
+            _metrics.incr("local", _namespace(key), "error")
+            return
 
+        self._record_write(path, len(header) + len(value))
+        self._ensure_janitor()
+        _metrics.record_store("local", {key: value}, time.perf_counter() - start)
+        logger.debug("LocalFileCache SET: %s", key)
 
-# ---------------------------------------------------------------------------
-# Fallback composite backend
-# ---------------------------------------------------------------------------
+    def rearm(self, key: str, value: bytes, ttl_seconds: float | None = None) -> bool:
+        """Extend the expiry of *key* in place if it already holds exactly *value*.
 
-class FallbackCache:
-    """Tries Redis first, falls back to local file."""
+        Only the fixed-size header is rewritten, so re-warming an unchanged
+        entry costs a compare against the mapped file instead of a full write.
 
-    def __init__(self) -> None:
-        self._redis = RedisCache()
-        self._local = LocalFileCache()
+        Returns:
+            *True* if the stored payload matched and was re-armed.
+        """
+        path = self._path_for(key)
+        try:
+            if path.stat().st_size != self._HEADER.size + len(value):
+                return False
+        except OSError:
+            return False
+        mapped = self._map(key, path)
+        if mapped is None:
+            return False
+        try:
+            if self._parse_expiry(mapped[: self._HEADER.size]) is None:
+                return False
+            # Chunked memcmp: bounded allocation, far faster than comparing views
+            offset = self._HEADER.size
+            for start in range(0, len(value), _VIEW_CHUNK_BYTES):
+                end = start + _VIEW_CHUNK_BYTES
+                if mapped[offset + start : offset + end] != value[start:end]:
+                    return False
+        finally:
+            mapped.close()
 
-    def get(self, key: str) -> bytes | None:
-        # Try Redis first
-        data = self._redis.get(key)
-        if data is not None:
-            # Warm the local file cache
-            self._local.set(key, data)
-            return data
+        now = time.time()
+        ttl = self._ttl_for(key, ttl_seconds)
+        try:
+            with path.open("r+b") as f:
+                f.write(self._HEADER.pack(self._MAGIC, now, now + ttl))
+        except OSError:
+            logger.warning("LocalFileCache re-arm failed: %s", key, exc_info=True)
+            return False
+        self._touch(path, self._HEADER.size + len(value))
+        logger.debug("LocalFileCache RE-ARMED: %s", key)
+        return True
 
-        # Try local file
-        data = self._local.get(key)
-        return data
+    def delete(self, key: str) -> None:
+        self._remove(self._path_for(key))
 
-    def set(self, key: str, value: bytes) -> None:
-        self._redis.set(key, value)
-        self._local.set(key, value)
+    # -- index & eviction ----------------------------------------------------
 
+    def _ensure_indexed(self) -> None:
+        """Build the in-memory index from disk on first use (caller holds the lock)."""
+        if self._indexed:
+            return
+        self._indexed = True
+        for path, size, _mtime in self._scan():
+            self._index[path] = [size, 0]
+            self._total_bytes += size
 
-# ---------------------------------------------------------------------------
-# Module-level singleton
-# ---------------------------------------------------------------------------
+    def _scan(self) -> list[tuple[Path, int, float]]:
+        """List cache files oldest-first, dropping legacy flat files and stale temps."""
+        entries: list[tuple[Path, int, float]] = []
+        if not self._base_dir.is_dir():
+            return entries
+        now = time.time()
+        for child in self._base_dir.iterdir():
+            if child.is_file():
+                # Pre-sharding flat layout: unreadable by this version
+                child.unlink(missing_ok=True)
+                continue
+            if not child.is_dir():
+                continue
+            for path in child.iterdir():
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                if not S_ISREG(stat.st_mode):
+                    continue
+                if path.name.endswith(_TMP_SUFFIX):
+                    if now - stat.st_mtime > _TMP_MAX_AGE_SECONDS:
+                        path.unlink(missing_ok=True)
+                    continue
+                entries.append((path, stat.st_size, stat.st_mtime))
+        entries.sort(key=lambda entry: entry[2])
+        return entries
 
-_cache = FallbackCache()
+    def _touch(self, path: Path, size: int) -> None:
+        with self._lock:
+            self._ensure_indexed()
+            entry = self._index.get(path)
+            if entry is None:
+                # Written by another process since we indexed
+                self._index[path] = [size, 1]
+                self._total_bytes += size
+            else:
+                entry[1] += 1
+                self._index.move_to_end(path)
 
+    def _record_write(self, path: Path, size: int) -> None:
+        with self._lock:
+            self._ensure_indexed()
+            previous = self._index.pop(path, None)
+            if previous is not None:
+                self._total_bytes -= previous[0]
+            self._index[path] = [size, 0 if previous is None else previous[1]]
+            self._total_bytes += size
+            victims = self._select_victims(keep=path)
+        for victim in victims:
+            victim.unlink(missing_ok=True)
+            logger.debug("LocalFileCache EVICTED: %s", victim.name)
 
-# ---------------------------------------------------------------------------
-# Public API
-# ---------------------------------------------------------------------------
+    def _select_victims(self, keep: Path | None = None) -> list[Path]:
+        """Drop entries from the index until under budget (caller holds the lock).
 
-def make_cache_key(language: str, data: dict) -> str:
-    """Build a cache key from language and a SHA-256 of the data dict."""
-    raw = json.dumps(data, sort_keys=True, ensure_ascii=False)
-    digest = hashlib.sha256(raw.encode()).hexdigest()[:16]
-    return f"resume_report:{language}:{digest}"
+        *keep* (the entry just written) is never chosen.
+        """
+        victims: list[Path] = []
+        while self._total_bytes > self._max_bytes:
+            candidates = (path for path in self._index if path != keep)
+            if self._eviction == "lfu":
+                # Least hits first; ties go to the least recently used
+                victim = min(candidates, key=lambda p: self._index[p][1], default=None)
+            else:
+                victim = next(candidates, None)
+            if victim is None:
+                break
+            self._total_bytes -= self._index.pop(victim)[0]
+            victims.append(victim)
+            _metrics.incr("local", _namespace(self._key_for(victim)), "eviction")
+        self.evictions += len(victims)
+        return victims
 
+    def _remove(self, path: Path) -> None:
+        try:
+            path.unlink(missing_ok=True)
+        except OSError:
+            logger.warning("LocalFileCache delete failed: %s", path, exc_info=True)
+            return
+        with self._lock:
+            entry = self._index.pop(path, None)
+            if entry is not None:
+                self._total_bytes -= entry[0]
 
-def get_cached(key: str) -> bytes | None:
-    """Retrieve bytes from the L2 cache, or *None* on miss."""
-    return _cache.get(key)
+    # -- janitor -------------------------------------------------------------
 
+    def sweep(self) -> int:
+        """Delete entries past max staleness, re-sync the index with disk and enforce the budget.
 
-def set_cached(key: str, value: bytes) -> None:
-    """Store bytes in the L2 cache (both Redis and local file)."""
-    _cache.set(key, value)
+        Returns:
+            Number of files removed.
+        """
+        now = time.time()
+        live: list[tuple[Path, int]] = []
+        removed = 0
+        for path, size, _mtime in self._scan():
+            try:
+                with path.open("rb") as f:
+                    expires_at = self._parse_expiry(f.read(self._HEADER.size))
+            except FileNotFoundError:
+                continue
+            except OSError:
+                logger.warning("LocalFileCache janitor cannot read %s", path, exc_info=True)
+                continue
+            if expires_at is None or now > expires_at + self._max_stale_for(self._key_for(path)):
+                path.unlink(missing_ok=True)
+                removed += 1
+            else:
+                live.append((path, size))
 
+        sizes = dict(live)
+        with self._lock:
+            # Files first seen now (written by other processes) rank as least
+            # recently used; known files keep their recency and hit counts.
+            index: OrderedDict[Path, list[int]] = OrderedDict(
+                (path, [size, 0]) for path, size in live if path not in self._index
+            )
+            for path, entry in self._index.items():
+                if path in sizes:
+                    index[path] = [sizes[path], entry[1]]
+                elif path.exists():
+                    index[path] = entry  # written after the scan started
+            self._index = index
+            self._total_bytes = sum(entry[0] for entry in index.values())
+            self._indexed = True
+            victims = self._select_victims()
+        for victim in victims:
+            victim.unlink(missing_ok=True)
+        removed += len(victims)
+        if removed:
+            logger.debug("LocalFileCache janitor removed %d files", removed)
+        return removed
 
-def _image_cache_key(url: str) -> str:
-    return f"image:{hashlib.sha256(url.encode()).hexdigest()[:16]}"
+    def _ensure_janitor(self) -> None:
+        if self._janitor is not None or self._janitor_interval <= 0:
+            return
+        with self._lock:
+            if self._janitor is not None:
+                return
+            self._janitor = threading.Thread(
+                target=self._janitor_loop, name="cache-janitor", daemon=True
+            )
+            self._janitor.start()
 
+    def _janitor_loop(self) -> None:
+        while not self._janitor_stop.wait(self._janitor_interval):
+            try:
+                self.sweep()
+            except Exception:
+                logger.warning("LocalFileCache janitor sweep failed", exc_info=True)
 
-def get_image_from_cache(url: str) -> bytes | None:
-    """Return cached image bytes without any network I/O.
+    def stop_janitor(self) -> None:
+        """Stop the background janitor thread (mainly for tests and shutdown)."""
+        self._janitor_stop.set()
 
-    Returns *None* on miss **and** on cached failure (``b""``).
-    """
-    data = _cache.get(_image_cache_key(url))
-    if data:
-        return data
-    return None
 
+# ---------------------------------------------------------------------------
+# SQLite local backend
+# ---------------------------------------------------------------------------
 
-def fetch_image_cached(url: str) -> bytes | None:
-    """Download an image URL, caching the result in L2.
+class SQLiteCache(_EntryBackend):
+    """Local tier in a single SQLite database (WAL mode), a drop-in for :class:`LocalFileCache`.
 
-    Returns the raw image bytes, or *None* if the download fails.
-    Failed downloads are cached as ``b""`` to avoid repeated timeouts.
+    Each row stores the blob with its namespace, size, creation time, expiry,
+    last access and hit count.  Lookups are one primary-key query (batched
+    lookups one ``IN`` query); expiry and LRU scans use indexes, so purging
+    expired rows and enforcing *max_bytes* stay cheap with many entries.
+    Hit counts and recency are buffered in memory and written in batches so
+    reads do not each take the write lock.
+
+    Connections are per thread; WAL lets readers proceed while a writer (in
+    this or another process) commits.
     """
-    import urllib.request
 
-    key = _image_cache_key(url)
-    data = _cache.get(key)
-    if data is not None:
-        return data if data else None
+    _SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS cache (
+            key TEXT PRIMARY KEY,
+            namespace TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            expires_at REAL NOT NULL,
+            accessed_at REAL NOT NULL,
+            hits INTEGER NOT NULL DEFAULT 0,
+            value BLOB NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires_at)",
+        # Covers the budget total and LRU victim scans without touching blobs
+        "CREATE INDEX IF NOT EXISTS cache_lru ON cache (accessed_at, size)",
+    )
 
-    try:
-        with urllib.request.urlopen(url, timeout=3) as resp:
-            data = resp.read()
-        _cache.set(key, data)
-        return data
-    except Exception:
-        logger.warning("fetch_image_cached failed for %s", url, exc_info=True)
-        _cache.set(key, b"")
-        return None
+    def __init__(
+        self,
+        path: Path = _SQLITE_PATH,
+        ttl_seconds: float | None = None,
+        max_bytes: int = _LOCAL_MAX_BYTES,
+        janitor_interval: float = _JANITOR_INTERVAL_SECONDS,
+        max_stale_seconds: float | None = None,
+    ) -> None:
+        self._path = path
+        self._ttl_seconds = ttl_seconds
+        self._max_bytes = max_bytes
+        self._janitor_interval = janitor_interval
+        self._max_stale_seconds = max_stale_seconds
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # key -> (last access, hits since last flush)
+        self._touches: dict[str, tuple[float, int]] = {}
+        self._janitor: threading.Thread | None = None
+        self._janitor_stop = threading.Event()
+        self.evictions = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self._path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in self._SCHEMA:
+                conn.execute(statement)
+            self._local.conn = conn
+        return conn
+
+    # -- reads ---------------------------------------------------------------
+
+    def get_entry(self, key: str) -> CacheEntry | None:
+        return self.get_entries([key]).get(key)
+
+    def get_entries(self, keys: Iterable[str]) -> dict[str, CacheEntry]:
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        start = time.perf_counter()
+        try:
+            rows = self._conn().execute(
+                f"SELECT key, value, expires_at FROM cache "
+                f"WHERE key IN ({', '.join('?' * len(keys))})",
+                keys,
+            ).fetchall()
+        except sqlite3.Error:
+            logger.warning("SQLiteCache GET failed", exc_info=True)
+            _metrics.incr("local", CacheMetrics._batch_namespace(keys), "error")
+            return {}
+        now = time.time()
+        found = {
+            key: CacheEntry(value, expires_at)
+            for key, value, expires_at in rows
+            if now <= expires_at + self._max_stale_for(key)
+        }
+        self._touch(found)
+        _metrics.record_lookup(
+            "local", keys, {key: entry.value for key, entry in found.items()},
+            time.perf_counter() - start,
+        )
+        logger.debug("SQLiteCache GET: %d/%d hits", len(found), len(keys))
+        return found
+
+    def get_view(self, key: str) -> CacheView | None:
+        """:class:`LocalFileCache`-compatible view (SQLite hands out a copy)."""
+        entry = self.get_entry(key)
+        return None if entry is None else CacheView(memoryview(entry.value), entry.expires_at)
+
+    def metadata(self, key: str) -> dict[str, Any] | None:
+        """Return the stored metadata for *key* (without the blob), or *None*."""
+        self._flush_touches()
+        row = self._conn().execute(
+            "SELECT namespace, size, created_at, expires_at, accessed_at, hits "
+            "FROM cache WHERE key = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            return None
+        names = ("namespace", "size", "created_at", "expires_at", "accessed_at", "hits")
+        return dict(zip(names, row, strict=True))
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """Return ``{namespace: {"entries": n, "bytes": total}}``."""
+        rows = self._conn().execute(
+            "SELECT namespace, count(*), total(size) FROM cache GROUP BY namespace"
+        ).fetchall()
+        return {ns: {"entries": n, "bytes": int(size)} for ns, n, size in rows}
+
+    # -- writes --------------------------------------------------------------
+
+    def set(self, key: str, value: bytes, ttl_seconds: float | None = None) -> None:
+        self.set_many({key: value}, ttl_seconds)
+
+    def set_many(self, items: Mapping[str, bytes], ttl_seconds: float | None = None) -> None:
+        """Upsert all *items* in one transaction, then enforce the byte budget."""
+        if not items:
+            return
+        start = time.perf_counter()
+        now = time.time()
+        rows = []
+        for key, value in items.items():
+            expires_at = now + self._ttl_for(key, ttl_seconds)
+            rows.append((key, _namespace(key), len(value), now, expires_at, now, value))
+        try:
+            conn = self._conn()
+            with self._transaction(conn):
+                conn.executemany(
+                    "INSERT INTO cache "
+                    "(key, namespace, size, created_at, expires_at, accessed_at, hits, value) "
+                    "VALUES (?, ?, ?, ?, ?, ?, 0, ?) "
+                    "ON CONFLICT (key) DO UPDATE SET size = excluded.size, "
+                    "created_at = excluded.created_at, expires_at = excluded.expires_at, "
+                    "accessed_at = excluded.accessed_at, value = excluded.value",
+                    rows,
+                )
+                # Reads buffered since the last flush must count before picking victims
+                self._flush_touches()
+                self._evict(conn, keep=items.keys())
+        except sqlite3.Error:
+            logger.warning("SQLiteCache SET failed", exc_info=True)
+            _metrics.incr("local", CacheMetrics._batch_namespace(items), "error")
+            return
+        self._ensure_janitor()
+        _metrics.record_store("local", items, time.perf_counter() - start)
+        logger.debug("SQLiteCache SET: %d keys", len(items))
+
+    def rearm(self, key: str, value: bytes, ttl_seconds: float | None = None) -> bool:
+        """Extend the expiry of *key* if it already holds exactly *value* (one UPDATE)."""
+        ttl = self._ttl_for(key, ttl_seconds)
+        try:
+            cursor = self._conn().execute(
+                "UPDATE cache SET expires_at = ? WHERE key = ? AND size = ? AND value = ?",
+                (time.time() + ttl, key, len(value), value),
+            )
+        except sqlite3.Error:
+            logger.warning("SQLiteCache re-arm failed: %s", key, exc_info=True)
+            return False
+        return cursor.rowcount > 0
+
+    def delete(self, key: str) -> None:
+        try:
+            self._conn().execute("DELETE FROM cache WHERE key = ?", (key,))
+        except sqlite3.Error:
+            logger.warning("SQLiteCache DELETE failed: %s", key, exc_info=True)
+            _metrics.incr("local", _namespace(key), "error")
+
+    @staticmethod
+    def _transaction(conn: sqlite3.Connection) -> Any:
+        # IMMEDIATE takes the write lock up front, so the budget check and the
+        # deletes it triggers see a consistent total across processes
+        conn.execute("BEGIN IMMEDIATE")
+        return conn
+
+    # -- recency, eviction & expiry ------------------------------------------
+
+    def _touch(self, found: Mapping[str, CacheEntry]) -> None:
+        if not found:
+            return
+        now = time.time()
+        with self._lock:
+            for key in found:
+                hits = self._touches.get(key, (now, 0))[1]
+                self._touches[key] = (now, hits + 1)
+            flush = len(self._touches) >= _SQLITE_TOUCH_BATCH
+        if flush:
+            self._flush_touches()
+
+    def _flush_touches(self) -> None:
+        with self._lock:
+            touches, self._touches = self._touches, {}
+        if not touches:
+            return
+        try:
+            self._conn().executemany(
+                "UPDATE cache SET accessed_at = max(accessed_at, ?), hits = hits + ? WHERE key = ?",
+                [(accessed_at, hits, key) for key, (accessed_at, hits) in touches.items()],
+            )
+        except sqlite3.Error:
+            logger.warning("SQLiteCache cannot record hits", exc_info=True)
+
+    def _evict(self, conn: sqlite3.Connection, keep: Iterable[str] = ()) -> int:
+        """Delete least recently used rows until the total fits *max_bytes*."""
+        (total,) = conn.execute("SELECT total(size) FROM cache").fetchone()
+        excess = total - self._max_bytes
+        if excess <= 0:
+            return 0
+        keep = set(keep)
+        victims: list[tuple[str, str]] = []
+        for key, namespace, size in conn.execute(
+            "SELECT key, namespace, size FROM cache ORDER BY accessed_at"
+        ):
+            if excess <= 0:
+                break
+            if key in keep:
+                continue
+            victims.append((key, namespace))
+            excess -= size
+        conn.executemany("DELETE FROM cache WHERE key = ?", [(key,) for key, _ in victims])
+        for _key, namespace in victims:
+            _metrics.incr("local", namespace, "eviction")
+        self.evictions += len(victims)
+        return len(victims)
+
+    def purge_expired(self) -> int:
+        """Bulk-delete rows past their stale window; returns the number removed."""
+        conn = self._conn()
+        now = time.time()
+        if self._max_stale_seconds is not None:
+            cursor = conn.execute(
+                "DELETE FROM cache WHERE expires_at <= ?", (now - self._max_stale_seconds,)
+            )
+            return cursor.rowcount
+        # One indexed range delete per namespace policy, then one for the rest
+        namespaces = _policies.namespaces()
+        removed = 0
+        for namespace, policy in namespaces.items():
+            removed += conn.execute(
+                "DELETE FROM cache WHERE expires_at <= ? AND namespace = ?",
+                (now - policy.max_stale_seconds, namespace),
+            ).rowcount
+        removed += conn.execute(
+            f"DELETE FROM cache WHERE expires_at <= ? "
+            f"AND namespace NOT IN ({', '.join('?' * len(namespaces))})",
+            (now - _policies.default.max_stale_seconds, *namespaces),
+        ).rowcount
+        return removed
+
+    def sweep(self) -> int:
+        """Flush buffered hits, purge expired rows and enforce the budget.
+
+        Returns:
+            Number of rows removed.
+        """
+        self._flush_touches()
+        conn = self._conn()
+        with self._transaction(conn):
+            removed = self.purge_expired() + self._evict(conn)
+        if removed:
+            logger.debug("SQLiteCache janitor removed %d rows", removed)
+        return removed
+
+    def _ensure_janitor(self) -> None:
+        if self._janitor is not None or self._janitor_interval <= 0:
+            return
+        with self._lock:
+            if self._janitor is not None:
+                return
+            self._janitor = threading.Thread(
+                target=self._janitor_loop, name="cache-janitor", daemon=True
+            )
+            self._janitor.start()
+
+    def _janitor_loop(self) -> None:
+        while not self._janitor_stop.wait(self._janitor_interval):
+            try:
+                self.sweep()
+            except Exception:
+                logger.warning("SQLiteCache janitor sweep failed", exc_info=True)
+
+    def stop_janitor(self) -> None:
+        """Stop the background janitor thread (mainly for tests and shutdown)."""
+        self._janitor_stop.set()
+
+
+def _make_local_backend(max_stale_seconds: float | None) -> LocalFileCache | SQLiteCache:
+    """Local tier chosen by ``CACHE_LOCAL_BACKEND`` (``file``, the default, or ``sqlite``)."""
+    backend = os.environ.get("CACHE_LOCAL_BACKEND", "file").lower()
+    if backend == "sqlite":
+        return SQLiteCache(max_stale_seconds=max_stale_seconds)
+    if backend != "file":
+        logger.warning("Unknown CACHE_LOCAL_BACKEND %r, using files", backend)
+    return LocalFileCache(max_stale_seconds=max_stale_seconds)
+
+
+# ---------------------------------------------------------------------------
+# Circuit breaker
+# ---------------------------------------------------------------------------
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker guarding a flaky remote dependency.
+
+    * **closed** — calls go through; outcomes are tracked over a sliding window.
+      The breaker opens after ``failure_threshold`` consecutive failures, or
+      once at least half a window of calls has an error rate above
+      ``error_rate``.
+    * **open** — :meth:`allow` returns ``False`` immediately, so callers skip
+      the dependency instead of waiting on socket timeouts.
+    * **half-open** — after the cool-down a single probe call is let through.
+      Success closes the breaker; failure re-opens it with a doubled cool-down
+      (capped at ``max_reset_seconds``).
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = _BREAKER_FAILURE_THRESHOLD,
+        error_rate: float = _BREAKER_ERROR_RATE,
+        window: int = _BREAKER_WINDOW,
+        reset_seconds: float = _BREAKER_RESET_SECONDS,
+        max_reset_seconds: float = _BREAKER_MAX_RESET_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self._failure_threshold = failure_threshold
+        self._error_rate = error_rate
+        self._window = window
+        self._reset_seconds = reset_seconds
+        self._max_reset_seconds = max_reset_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._outcomes: list[bool] = []  # True = failure, most recent last
+        self._consecutive_failures = 0
+        self._cooldown = reset_seconds
+        self._opened_at = 0.0
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may proceed; in half-open state only one probe does."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if self._clock() - self._opened_at < self._cooldown:
+                    return False
+                self._transition(self.HALF_OPEN)
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._consecutive_failures = 0
+            if self._state != self.CLOSED:
+                self._probing = False
+                self._cooldown = self._reset_seconds
+                self._outcomes.clear()
+                self._transition(self.CLOSED)
+                return
+            self._push(failed=False)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._consecutive_failures += 1
+            if self._state == self.HALF_OPEN:
+                self._probing = False
+                self._cooldown = min(self._cooldown * 2, self._max_reset_seconds)
+                self._open()
+                return
+            if self._state == self.OPEN:
+                return
+            self._push(failed=True)
+            failures = sum(self._outcomes)
+            if self._consecutive_failures >= self._failure_threshold or (
+                len(self._outcomes) * 2 >= self._window
+                and failures / len(self._outcomes) > self._error_rate
+            ):
+                self._open()
+
+    def trip(self) -> None:
+        """Open immediately (e.g. the connection could not be established)."""
+        with self._lock:
+            self._consecutive_failures += 1
+            if self._state == self.HALF_OPEN:
+                self._probing = False
+                self._cooldown = min(self._cooldown * 2, self._max_reset_seconds)
+            if self._state != self.OPEN:
+                self._open()
+
+    def release(self) -> None:
+        """Hand back an admitted half-open probe that ended up not being made."""
+        with self._lock:
+            self._probing = False
+
+    def _push(self, failed: bool) -> None:
+        self._outcomes.append(failed)
+        del self._outcomes[: -self._window]
+
+    def _open(self) -> None:
+        self._opened_at = self._clock()
+        self._outcomes.clear()
+        self._transition(self.OPEN)
+
+    def _transition(self, state: str) -> None:
+        if state == self._state:
+            return
+        logger.info("%s circuit %s -> %s", self.name, self._state, state)
+        self._state = state
+        _metrics.incr(self.name, "circuit", state)
+
+
+# ---------------------------------------------------------------------------
+# Redis backend
+# ---------------------------------------------------------------------------
+
+class RedisCache(_EntryBackend):
+    """Lazy pooled connection from ``st.secrets["REDIS_URL"]`` or ``os.environ["REDIS_URL"]``.
+
+    TTLs come from the key's :class:`CachePolicy` unless given.  All errors are
+    caught so Redis unavailability never breaks the app.
+    The client is backed by a bounded blocking connection pool, so concurrent
+    sessions and prewarm threads each borrow their own socket.
+
+    Keys are written with ``PX = ttl + max_stale`` so Redis keeps them through
+    the stale window; freshness is derived from the remaining ``PTTL``.
+
+    Every call goes through a :class:`CircuitBreaker`: while Redis is failing,
+    calls return a miss immediately and the connection is re-probed on a
+    back-off schedule.  Only a missing ``REDIS_URL`` disables Redis for good.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = _REDIS_MAX_CONNECTIONS,
+        ttl_seconds: float | None = None,
+        max_stale_seconds: float | None = None,
+    ) -> None:
+        self._client: Any | None = None
+        self._disabled = False
+        self._max_connections = max_connections
+        self._ttl_seconds = ttl_seconds
+        self._max_stale_seconds = max_stale_seconds
+        self._connect_lock = threading.Lock()
+        self.breaker = CircuitBreaker("redis")
+
+    @property
+    def connected(self) -> bool:
+        """Whether a connection has been established (it may have failed since)."""
+        return self._client is not None
+
+    def _connect(self) -> Any | None:
+        """Return a client if the breaker admits a call, else ``None`` (fail fast).
+
+        A caller that gets a client must report the outcome through
+        ``self.breaker``.
+        """
+        if self._disabled or not self.breaker.allow():
+            return None
+        if self._client is not None:
+            return self._client
+
+        # Never queue behind another thread's connect attempt on the render path
+        if not self._connect_lock.acquire(blocking=False):
+            self.breaker.release()
+            return None
+        try:
+            if self._client is not None:
+                return self._client
+
+            url = self._resolve_url()
+            if url is None:
+                self._disabled = True
+                return None
+
+            try:
+                import redis as redis_lib
+
+                pool = redis_lib.BlockingConnectionPool.from_url(
+                    url,
+                    max_connections=self._max_connections,
+                    timeout=_REDIS_TIMEOUT_SECONDS,
+                    decode_responses=False,
+                    socket_connect_timeout=_REDIS_TIMEOUT_SECONDS,
+                    socket_timeout=_REDIS_TIMEOUT_SECONDS,
+                )
+                client = redis_lib.Redis(connection_pool=pool)
+                client.ping()
+                logger.info("RedisCache connected (pool size %d)", self._max_connections)
+                self._client = client
+                return client
+            except Exception:
+                logger.warning("RedisCache connection failed — falling back", exc_info=True)
+                _metrics.incr("redis", "connection", "error")
+                self.breaker.trip()
+                return None
+        finally:
+            self._connect_lock.release()
+
+    @staticmethod
+    def _resolve_url() -> str | None:
+        # Prefer env var (no side-effects), then Streamlit secrets
+        url = os.environ.get("REDIS_URL")
+        if url:
+            return url
+
+        # Only touch st.secrets when a secrets.toml actually exists,
+        # otherwise Streamlit displays a warning banner on the page.
+        _secrets_paths = (
+            Path(".streamlit/secrets.toml"),
+            Path.home() / ".streamlit" / "secrets.toml",
+        )
+        if not any(p.exists() for p in _secrets_paths):
+            logger.debug("No secrets.toml found, skipping st.secrets")
+            return None
+
+        try:
+            import streamlit as st
+
+            return st.secrets["REDIS_URL"]
+        except Exception:
+            pass
+        return None
+
+    def get_entry(self, key: str) -> CacheEntry | None:
+        return self.get_entries([key]).get(key)
+
+    def get_entries(self, keys: Iterable[str]) -> dict[str, CacheEntry]:
+        """Fetch values and remaining TTLs for *keys* in one pipelined round trip."""
+        keys = list(keys)
+        if not keys:
+            return {}
+        client = self._connect()
+        if client is None:
+            return {}
+        start = time.perf_counter()
+        try:
+            pipe = client.pipeline(transaction=False)
+            for key in keys:
+                pipe.get(key)
+                pipe.pttl(key)
+            results = pipe.execute()
+        except Exception:
+            logger.warning("RedisCache GET failed", exc_info=True)
+            _metrics.incr("redis", CacheMetrics._batch_namespace(keys), "error")
+            self.breaker.record_failure()
+            return {}
+        self.breaker.record_success()
+        elapsed = time.perf_counter() - start
+
+        now = time.time()
+        found: dict[str, CacheEntry] = {}
+        for key, data, pttl in zip(keys, results[::2], results[1::2], strict=True):
+            if data is None or pttl == -2:
+                continue
+            # -1: key has no expiry (e.g. written by an older version without EX)
+            expires_at = (
+                math.inf if pttl == -1 else now + pttl / 1000 - self._max_stale_for(key)
+            )
+            found[key] = CacheEntry(data, expires_at)
+        _metrics.record_lookup(
+            "redis", keys, {key: entry.value for key, entry in found.items()}, elapsed
+        )
+        logger.debug("RedisCache GET: %d/%d hits", len(found), len(keys))
+        return found
+
+    def set(self, key: str, value: bytes, ttl_seconds: float | None = None) -> None:
+        self.set_many({key: value}, ttl_seconds)
+
+    def incr(self, key: str) -> int | None:
+        """Atomically increment a counter with no expiry; *None* if Redis is unavailable."""
+        client = self._connect()
+        if client is None:
+            return None
+        try:
+            value = client.incr(key)
+        except Exception:
+            logger.warning("RedisCache INCR failed", exc_info=True)
+            _metrics.incr("redis", _namespace(key), "error")
+            self.breaker.record_failure()
+            return None
+        self.breaker.record_success()
+        return int(value)
+
+    def delete(self, *keys: str) -> None:
+        client = self._connect()
+        if client is None or not keys:
+            return
+        try:
+            client.delete(*keys)
+        except Exception:
+            logger.warning("RedisCache DEL failed", exc_info=True)
+            _metrics.incr("redis", CacheMetrics._batch_namespace(keys), "error")
+            self.breaker.record_failure()
+            return
+        self.breaker.record_success()
+
+    def publish(self, channel: str, message: bytes) -> bool:
+        """``PUBLISH`` *message*; *False* if Redis (or pub/sub) is unavailable."""
+        client = self._connect()
+        if client is None:
+            return False
+        try:
+            client.publish(channel, message)
+        except Exception:
+            # Servers or proxies without pub/sub answer with an error; not a Redis outage
+            logger.debug("RedisCache PUBLISH failed", exc_info=True)
+            self.breaker.release()
+            return False
+        self.breaker.record_success()
+        return True
+
+    def subscribe(self, channel: str) -> Any | None:
+        """A redis-py ``PubSub`` subscribed to *channel*, or *None* if unavailable.
+
+        The subscription holds one pooled connection until closed.
+        """
+        client = self._connect()
+        if client is None:
+            return None
+        self.breaker.release()
+        try:
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(channel)
+        except Exception:
+            logger.debug("RedisCache SUBSCRIBE failed", exc_info=True)
+            return None
+        return pubsub
+
+    def acquire_lease(self, name: str, ttl_seconds: float) -> int | None:
+        """Take the lease *name* with ``SET NX PX`` and return its fencing token.
+
+        Tokens come from one ``INCR`` counter, so a later holder of any lease
+        always has a larger token than an earlier one.
+
+        Returns:
+            A positive token if acquired, *None* if someone else holds the
+            lease, or 0 if Redis is unavailable (callers go uncoordinated).
+        """
+        client = self._connect()
+        if client is None:
+            return 0
+        try:
+            token = int(client.incr(f"{_LEASE_PREFIX}fence"))
+            acquired = client.set(name, token, nx=True, px=max(1, int(ttl_seconds * 1000)))
+        except Exception:
+            logger.warning("RedisCache lease acquire failed: %s", name, exc_info=True)
+            _metrics.incr("redis", _namespace(name), "error")
+            self.breaker.record_failure()
+            return 0
+        self.breaker.record_success()
+        return token if acquired else None
+
+    def lease_holder(self, name: str) -> int | None:
+        """Token of the current holder of lease *name*; *None* if free or unknown."""
+        client = self._connect()
+        if client is None:
+            return None
+        try:
+            value = client.get(name)
+        except Exception:
+            logger.warning("RedisCache lease lookup failed: %s", name, exc_info=True)
+            _metrics.incr("redis", _namespace(name), "error")
+            self.breaker.record_failure()
+            return None
+        self.breaker.record_success()
+        return None if value is None else int(value)
+
+    def release_lease(self, name: str, token: int) -> None:
+        """Drop lease *name* if *token* still holds it.
+
+        Check-then-delete is not atomic: in the rare case the lease expired
+        and was re-taken in between, the successor loses it early, which costs
+        at most a duplicate generation -- never a wrong value.
+        """
+        if self.lease_holder(name) != token:
+            return
+        client = self._connect()
+        if client is None:
+            return
+        try:
+            client.delete(name)
+        except Exception:
+            logger.warning("RedisCache lease release failed: %s", name, exc_info=True)
+            self.breaker.record_failure()
+            return
+        self.breaker.record_success()
+
+    def set_many(self, items: Mapping[str, bytes], ttl_seconds: float | None = None) -> None:
+        """Store several keys in one pipelined round trip.
+
+        ``MSET`` cannot attach a TTL, so this pipelines ``SET ... PX`` instead.
+        """
+        expiries = {
+            key: int((self._ttl_for(key, ttl_seconds) + self._max_stale_for(key)) * 1000)
+            for key in items
+        }
+        items = {key: value for key, value in items.items() if expiries[key] > 0}
+        if not items:
+            return
+        client = self._connect()
+        if client is None:
+            return
+        start = time.perf_counter()
+        try:
+            pipe = client.pipeline(transaction=False)
+            for key, value in items.items():
+                pipe.set(key, value, px=expiries[key])
+            pipe.execute()
+            logger.debug("RedisCache SET: %d keys", len(items))
+        except Exception:
+            logger.warning("RedisCache SET failed", exc_info=True)
+            _metrics.incr("redis", CacheMetrics._batch_namespace(items), "error")
+            self.breaker.record_failure()
+            return
+        self.breaker.record_success()
+        _metrics.record_store("redis", items, time.perf_counter() - start)
+
+
+# ---------------------------------------------------------------------------
+# Single-flight request coalescing
+# ---------------------------------------------------------------------------
+
+_T = TypeVar("_T")
+
+
+class _Flight:
+    """One in-flight computation that followers can wait on."""
+
+    __slots__ = ("done", "error", "result")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """Collapses concurrent calls for the same key into one execution.
+
+    The first caller for a key (the leader) runs the function; callers that
+    arrive while it is running block and receive the leader's result or
+    exception.  Once it finishes the key is forgotten, so later calls run
+    again (the cache in front is what makes them cheap).
+    """
+
+    def __init__(self) -> None:
+        self._flights: dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], _T]) -> _T:
+        """Return ``fn()``, run once for all concurrent callers of *key*."""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+
+        if leader:
+            self._run(key, flight, fn)
+        else:
+            flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return cast(_T, flight.result)
+
+    def start(self, key: str, fn: Callable[[], Any]) -> bool:
+        """Run *fn* in a daemon thread unless *key* is already in flight.
+
+        Returns:
+            *True* if a new thread was started.
+        """
+        with self._lock:
+            if key in self._flights:
+                return False
+            flight = self._flights[key] = _Flight()
+        threading.Thread(
+            target=self._run, args=(key, flight, fn), name="cache-flight", daemon=True
+        ).start()
+        return True
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._flights
+
+    def _run(self, key: str, flight: _Flight, fn: Callable[[], Any]) -> None:
+        try:
+            flight.result = fn()
+        except BaseException as exc:
+            flight.error = exc
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+
+# ---------------------------------------------------------------------------
+# Write-behind persistence
+# ---------------------------------------------------------------------------
+
+class PendingWrite(NamedTuple):
+    """A value waiting to be persisted to the slower tiers."""
+
+    value: bytes
+    encoded: bytes | None  # already codec-encoded copy, if the writer had one
+    expires_at: float
+    targets: frozenset[str]  # subset of {"redis", "local"}
+    delta: float = 0.0
+    lease: int = 0  # fencing token of a generation lease to release once in Redis
+
+
+class WriteBehindQueue:
+    """Persists writes on a background thread so callers never wait on Redis or disk.
+
+    Writes to the same key coalesce: the newest value wins and target tiers
+    are merged, so a key rewritten while queued is persisted once.  At most
+    *max_pending* distinct keys wait at a time; :meth:`put` returns *False*
+    when full so the caller can write inline instead of growing the queue.
+    :meth:`flush` blocks until everything queued so far is persisted; it is
+    also registered to run at interpreter exit.
+    """
+
+    def __init__(
+        self,
+        persist: Callable[[dict[str, PendingWrite]], None],
+        max_pending: int = _WRITE_BEHIND_MAX_PENDING,
+    ) -> None:
+        self._persist = persist
+        self._max_pending = max_pending
+        self._cond = threading.Condition()
+        self._pending: dict[str, PendingWrite] = {}
+        self._inflight: dict[str, PendingWrite] = {}
+        self._worker: threading.Thread | None = None
+        atexit.register(self.flush)
+
+    def put(self, key: str, write: PendingWrite, replace: bool = True) -> bool:
+        """Queue *write* for *key*; *False* if the queue is full (nothing queued).
+
+        Args:
+            key: Cache key.
+            write: Value, expiry and target tiers.
+            replace: When *False*, an already queued write for *key* is kept
+                as is (used for backfills, which must not clobber newer data).
+        """
+        with self._cond:
+            previous = self._pending.get(key)
+            if previous is not None and not replace:
+                return True
+            if previous is not None:
+                write = write._replace(
+                    targets=write.targets | previous.targets, lease=write.lease or previous.lease
+                )
+                _metrics.incr("write_behind", _namespace(key), "coalesced")
+            elif len(self._pending) >= self._max_pending:
+                _metrics.incr("write_behind", _namespace(key), "overflow")
+                return False
+            self._pending[key] = write
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._work, name="cache-write-behind", daemon=True
+                )
+                self._worker.start()
+            self._cond.notify()
+        return True
+
+    def discard(self, key: str) -> PendingWrite | None:
+        """Drop a queued (not yet in-flight) write for *key*; return it, if any."""
+        with self._cond:
+            write = self._pending.pop(key, None)
+            self._cond.notify_all()
+        return write
+
+    def get(self, key: str) -> PendingWrite | None:
+        """The not-yet-persisted write for *key*, if any (read-your-writes)."""
+        with self._cond:
+            return self._pending.get(key) or self._inflight.get(key)
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Wait until all queued writes are persisted; *False* on timeout."""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not self._pending and not self._inflight, timeout
+            )
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending)
+                self._inflight, self._pending = self._pending, {}
+            start = time.perf_counter()
+            try:
+                self._persist(self._inflight)
+                _metrics.observe(
+                    "write_behind",
+                    CacheMetrics._batch_namespace(self._inflight),
+                    "flush",
+                    time.perf_counter() - start,
+                )
+            except Exception:
+                logger.warning("Write-behind flush failed", exc_info=True)
+            finally:
+                with self._cond:
+                    self._inflight = {}
+                    self._cond.notify_all()
+
+
+# ---------------------------------------------------------------------------
+# Namespace generations & tags
+# ---------------------------------------------------------------------------
+
+class GenerationStore:
+    """Per-tag generation counters that version cache keys.
+
+    A key built with :meth:`tag_key` embeds a short digest of the current
+    generations of its tags (always including ``ns:<namespace>``).
+    :meth:`invalidate` bumps one counter, so every key carrying that tag
+    changes and old entries are simply never looked up again (they age out
+    by TTL / eviction) -- O(1) regardless of how many keys are affected.
+
+    Counters live in Redis (``cachegen:<tag>``, shared by all replicas) and in
+    a small JSON file (shared by processes on this host; not part of any
+    evictable tier).  A tag is read from them the first time a process uses
+    it; after that lookups are served from memory and :meth:`refresh`
+    (called off the render path by the cache's invalidation listener)
+    re-reads tags older than *refresh_seconds*.  The highest value seen
+    wins, so generations never go backwards.  While all of a key's tags are
+    at generation 0 the key is unchanged, keeping existing entries valid.
+
+    Keys handed out by :meth:`tag_key` are remembered per tag, so an
+    invalidation can also evict this process's copies of them right away
+    (:meth:`pop_keys`) instead of leaving them to age out.
+    """
+
+    _REDIS_PREFIX = "cachegen:"
+
+    def __init__(
+        self,
+        redis: RedisCache,
+        path: Path = _GENERATIONS_PATH,
+        refresh_seconds: float = _GENERATION_REFRESH_SECONDS,
+    ) -> None:
+        self._redis = redis
+        self._path = path
+        self._refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._generations: dict[str, int] = {}
+        self._loaded_at: dict[str, float] = {}
+        self._keys: dict[str, set[str]] = {}
+
+    def generation(self, tag: str) -> int:
+        return self.generations([tag])[tag]
+
+    def generations(self, tags: Iterable[str]) -> dict[str, int]:
+        """Current generation per tag; only tags never seen before touch the shared stores."""
+        tags = list(dict.fromkeys(tags))
+        with self._lock:
+            unseen = [tag for tag in tags if tag not in self._loaded_at]
+        if unseen:
+            # Once per tag and process: a key must never be built from a guessed generation
+            self._load(unseen)
+        with self._lock:
+            return {tag: self._generations.get(tag, 0) for tag in tags}
+
+    def refresh(self) -> None:
+        """Re-read the shared stores for known tags last read *refresh_seconds* ago."""
+        now = time.monotonic()
+        with self._lock:
+            due = [
+                tag
+                for tag, loaded_at in self._loaded_at.items()
+                if now - loaded_at >= self._refresh_seconds
+            ]
+        if due:
+            self._load(due)
+
+    def _load(self, tags: list[str]) -> None:
+        shared = self._read_file()
+        remote = self._redis.get_many(self._REDIS_PREFIX + tag for tag in tags)
+        now = time.monotonic()
+        with self._lock:
+            for tag in tags:
+                seen = [self._generations.get(tag, 0), shared.get(tag, 0)]
+                raw = remote.get(self._REDIS_PREFIX + tag)
+                if raw is not None and raw.isdigit():
+                    seen.append(int(raw))
+                self._generations[tag] = max(seen)
+                self._loaded_at[tag] = now
+
+    def invalidate(self, tag: str) -> int:
+        """Bump *tag*'s generation everywhere; returns the new generation."""
+        current = self.generations([tag])[tag]
+        remote = self._redis.incr(self._REDIS_PREFIX + tag)
+        generation = max(current + 1, remote or 0)
+        with self._lock:
+            self._generations[tag] = generation
+            self._loaded_at[tag] = time.monotonic()
+        self._write_file(tag, generation)
+        logger.info("Cache tag %s invalidated (generation %d)", tag, generation)
+        return generation
+
+    def observe(self, tag: str, generation: int) -> None:
+        """Adopt a generation announced by another process (never goes backwards)."""
+        with self._lock:
+            self._generations[tag] = max(self._generations.get(tag, 0), generation)
+            self._loaded_at[tag] = time.monotonic()
+
+    def pop_keys(self, tag: str) -> set[str]:
+        """Forget and return the keys this process built with *tag*."""
+        with self._lock:
+            return self._keys.pop(tag, set())
+
+    def tag_key(self, key: str, tags: Iterable[str] = ()) -> str:
+        """Return *key* versioned by the generations of ``ns:<namespace>`` and *tags*."""
+        generations = self.generations([f"ns:{_namespace(key)}", *tags])
+        bumped = sorted(f"{tag}={gen}" for tag, gen in generations.items() if gen)
+        if bumped:
+            key = f"{key}@{hashlib.sha256('|'.join(bumped).encode()).hexdigest()[:8]}"
+        with self._lock:
+            for tag in generations:
+                self._keys.setdefault(tag, set()).add(key)
+        return key
+
+    def _read_file(self) -> dict[str, int]:
+        try:
+            return {tag: int(gen) for tag, gen in json.loads(self._path.read_text()).items()}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError, AttributeError):
+            logger.warning("Cannot read cache generations from %s", self._path, exc_info=True)
+            return {}
+
+    def _write_file(self, tag: str, generation: int) -> None:
+        try:
+            with self._lock:
+                shared = self._read_file()
+                shared[tag] = max(shared.get(tag, 0), generation)
+                fd, tmp_name = tempfile.mkstemp(
+                    dir=self._path.parent, prefix=".", suffix=_TMP_SUFFIX
+                )
+                with os.fdopen(fd, "w") as f:
+                    json.dump(shared, f, sort_keys=True)
+                os.replace(tmp_name, self._path)
+        except OSError:
+            logger.warning("Cannot persist cache generations to %s", self._path, exc_info=True)
+
+
+# ---------------------------------------------------------------------------
+# Cross-replica invalidation
+# ---------------------------------------------------------------------------
+
+class InvalidationBus:
+    """Broadcasts cache invalidations to every process sharing Redis.
+
+    A message (``{"key": ...}`` or ``{"tag": ..., "generation": ...}``) is
+    applied locally at once, appended to a short-lived log in Redis
+    (``cacheinval:seq`` counter plus ``cacheinval:msg:<seq>``) and published
+    on the ``cacheinval`` channel.  A daemon thread per process applies
+    channel messages as they arrive and, every *poll_seconds*, catches up from
+    the log -- which covers messages missed while reconnecting and is all it
+    does when pub/sub is unavailable -- then calls *on_poll*.  Each log
+    position is applied once; malformed messages are skipped, and one whose
+    application fails is retried from the log on the next poll, so neither
+    stops the listener.  Without Redis, invalidations stay local.
+    """
+
+    _CHANNEL = "cacheinval"
+    _SEQ_KEY = "cacheinval:seq"
+    _MSG_PREFIX = "cacheinval:msg:"
+
+    def __init__(
+        self,
+        redis: RedisCache,
+        apply: Callable[[dict[str, Any]], None],
+        poll_seconds: float = _INVALIDATION_POLL_SECONDS,
+        on_poll: Callable[[], None] | None = None,
+    ) -> None:
+        self._redis = redis
+        self._apply = apply
+        self._on_poll = on_poll
+        self._poll_seconds = poll_seconds
+        self._lock = threading.Lock()
+        self._last_seq: int | None = None  # log position caught up to
+        self._gap: int | None = None  # missing log entry given one more poll
+        self._applied: deque[int] = deque(maxlen=_INVALIDATION_MAX_CATCH_UP)
+        self._worker: threading.Thread | None = None
+
+    def publish(self, message: dict[str, Any]) -> None:
+        self._apply(message)
+        seq = self._redis.incr(self._SEQ_KEY)
+        if seq is None:
+            logger.warning("Redis unavailable: invalidation %s applied locally only", message)
+            return
+        with self._lock:
+            self._applied.append(seq)
+        payload = json.dumps({**message, "seq": seq}).encode()
+        self._redis.set(f"{self._MSG_PREFIX}{seq}", payload)
+        self._redis.publish(self._CHANNEL, payload)
+
+    def ensure_listening(self) -> None:
+        """Start the listener thread on first use."""
+        if self._worker is not None:
+            return
+        with self._lock:
+            if self._worker is not None:
+                return
+            self._worker = threading.Thread(
+                target=self._listen, name="cache-invalidation", daemon=True
+            )
+            self._worker.start()
+
+    def _listen(self) -> None:
+        pubsub: Any | None = None
+        # Leave the first connect to the render path: it never waits for another
+        # thread's attempt, so racing it would make that request skip Redis
+        start = time.monotonic() + (0 if self._redis.connected else self._poll_seconds)
+        subscribe_at = next_poll = start
+        while True:
+            now = time.monotonic()
+            if pubsub is None and now >= subscribe_at:
+                pubsub = self._redis.subscribe(self._CHANNEL)
+                subscribe_at = now + _INVALIDATION_RESUBSCRIBE_SECONDS
+            if pubsub is None:
+                time.sleep(max(0.0, next_poll - now))
+            else:
+                try:
+                    message = pubsub.get_message(timeout=max(0.0, next_poll - now))
+                except Exception as exc:
+                    logger.info("Invalidation channel unavailable (%s), polling the log", exc)
+                    pubsub.close()
+                    pubsub = None
+                    continue
+                if message is not None and message.get("type") == "message":
+                    self._receive(message["data"])
+            if time.monotonic() >= next_poll:
+                try:
+                    self._catch_up()
+                except Exception:
+                    logger.warning("Invalidation log catch-up failed", exc_info=True)
+                if self._on_poll is not None:
+                    try:
+                        self._on_poll()
+                    except Exception:
+                        logger.warning("Invalidation poll hook failed", exc_info=True)
+                next_poll = time.monotonic() + self._poll_seconds
+
+    def _catch_up(self) -> None:
+        raw = self._redis.get(self._SEQ_KEY)
+        current = 0 if raw is None else int(raw)
+        with self._lock:
+            if self._last_seq is None:
+                # Only invalidations published from now on concern this process
+                self._last_seq = current
+                return
+            first = max(self._last_seq + 1, current - _INVALIDATION_MAX_CATCH_UP + 1)
+            seqs = [seq for seq in range(first, current + 1) if seq not in self._applied]
+        logged = self._redis.get_many(f"{self._MSG_PREFIX}{seq}" for seq in seqs)
+        caught_up = current
+        for seq in seqs:
+            payload = logged.get(f"{self._MSG_PREFIX}{seq}")
+            if payload is not None:
+                if not self._receive(payload):
+                    # Retry next poll, while the log still holds it
+                    caught_up = min(caught_up, seq - 1)
+            elif self._gap != seq:
+                # Counter bumped but message not written yet: retry next poll
+                self._gap = seq
+                caught_up = min(caught_up, seq - 1)
+                break
+        with self._lock:
+            self._last_seq = max(self._last_seq, caught_up)
+
+    def _receive(self, payload: bytes) -> bool:
+        """Apply a published or logged message once; *False* if applying it failed."""
+        try:
+            seq, message = self._parse(payload)
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Ignoring malformed invalidation %r", payload)
+            return True
+        with self._lock:
+            if seq in self._applied:
+                return True
+        logger.debug("Applying invalidation %s", message)
+        try:
+            self._apply(message)
+        except Exception:
+            logger.warning("Applying invalidation %s failed", message, exc_info=True)
+            return False
+        with self._lock:
+            self._applied.append(seq)
+        return True
+
+    @staticmethod
+    def _parse(payload: bytes) -> tuple[int, dict[str, Any]]:
+        """``(seq, message)`` from a payload; raises ValueError if it is malformed."""
+        message = json.loads(payload)
+        if not isinstance(message, dict):
+            raise ValueError("invalidation is not an object")
+        seq = int(message["seq"])
+        if isinstance(message.get("tag"), str):
+            return seq, {"tag": message["tag"], "generation": int(message.get("generation", 0))}
+        if isinstance(message.get("key"), str):
+            return seq, {"key": message["key"]}
+        raise ValueError("invalidation names neither a key nor a tag")
+
+
+# ---------------------------------------------------------------------------
+# Fallback composite backend
+# ---------------------------------------------------------------------------
+
+class FallbackCache:
+    """Tries an optional in-process memory tier, then Redis, then the local file.
+
+    Fresh hits in a slower tier are promoted into the faster ones, so
+    steady-state lookups for hot keys are served from memory.  Per-tier hit
+    counts are available from :meth:`tier_stats`.
+
+    Entries past their TTL but inside *max_stale_seconds* are still returned
+    by :meth:`get_entry`; :meth:`get_swr` serves them immediately and
+    refreshes each key in at most one background thread.
+
+    :meth:`get_or_compute` and :meth:`compute_in_background` coalesce
+    concurrent misses for a key into a single computation.
+
+    TTL, stale window, size limit and codec of each key come from its
+    namespace's :class:`CachePolicy`; *max_stale_seconds*, if given,
+    overrides the stale window for every key.
+
+    With a *codec* (or a policy codec), values are compressed before they
+    reach Redis and the local file and decompressed on the way out; the
+    memory tier always holds plain bytes.
+
+    The local tier is *local* if given, else a :class:`LocalFileCache` or
+    :class:`SQLiteCache` as selected by ``CACHE_LOCAL_BACKEND``.
+
+    With a *read_budget_seconds*, lookups past the memory tier are hedged:
+    the local tier is read first and Redis is queried too if the local read
+    has not answered every key within *hedge_delay_seconds*.  The first
+    fresh hit per key wins, and whatever has arrived when the budget runs out
+    is returned -- a slow Redis costs at most the budget, not its socket
+    timeout.  Reads still running at the deadline finish (and backfill) in
+    the background.  The budget only bounds serving: before computing a key
+    that looked missing, :meth:`get_or_compute` and
+    :meth:`compute_in_background` wait for every tier to answer, so a slow
+    Redis never causes regeneration of content it holds.
+
+    With *write_behind*, :meth:`set_many` stores into memory immediately and
+    hands Redis / local persistence (and compression) to a
+    :class:`WriteBehindQueue`, as does the local-file warm-up after a Redis
+    hit.  Values still queued are visible to lookups in this process.
+
+    To keep entries written together from expiring together, every write's
+    TTL is shortened by a random fraction of up to *ttl_jitter*.  Computed
+    values are stored with their generation time (see :class:`DeltaFrame`),
+    and :meth:`get_swr` refreshes a fresh entry early with the XFetch
+    probability ``exp(-remaining_ttl / (delta * xfetch_beta))``: expensive
+    values start refreshing sooner, and concurrent readers rarely all decide
+    to at once.
+
+    With *lease_seconds*, computations are also coordinated across processes
+    sharing Redis: the computing process holds a Redis lease on the key (see
+    :meth:`RedisCache.acquire_lease`) while the others poll Redis for its
+    result.  A waiter computes itself when the lease disappears without a
+    result (the holder failed or died) and it cannot take the lease over, or
+    after *lease_wait_seconds*.  A holder's lease is released once its value
+    is in Redis -- by the write-behind worker when there is one, so the
+    caller never waits on it -- or at once when it stored nothing; one whose
+    lease was taken over returns its value without storing it (fencing).
+    Without Redis, every process computes on its own as before.
+
+    :meth:`invalidate_key` and :meth:`invalidate_tag` are broadcast through
+    an :class:`InvalidationBus`: every process sharing Redis drops its memory,
+    queued and local copies of the affected keys and calls the listeners
+    registered with :meth:`add_invalidation_listener`.
+    """
+
+    TIERS = ("memory", "redis", "local")
+
+    def __init__(
+        self,
+        memory: MemoryCache | None = None,
+        max_stale_seconds: float | None = None,
+        codec: BlobCodec | None = None,
+        local: LocalFileCache | SQLiteCache | None = None,
+        read_budget_seconds: float | None = None,
+        hedge_delay_seconds: float = _HEDGE_DELAY_SECONDS,
+        write_behind: bool = False,
+        ttl_jitter: float = _TTL_JITTER,
+        xfetch_beta: float = _XFETCH_BETA,
+        lease_seconds: float | None = _LEASE_TTL_SECONDS,
+        lease_wait_seconds: float = _LEASE_WAIT_SECONDS,
+    ) -> None:
+        self._memory = memory
+        self._policy_codecs: dict[str, BlobCodec] = {}
+        self._ttl_jitter = ttl_jitter
+        self._xfetch_beta = xfetch_beta
+        self._lease_seconds = lease_seconds
+        self._lease_wait = lease_wait_seconds
+        self._codec = codec
+        self._read_budget = read_budget_seconds
+        self._hedge_delay = hedge_delay_seconds
+        self._hedge_pools: dict[str, ThreadPoolExecutor] = {}
+        self._writes = WriteBehindQueue(self._persist) if write_behind else None
+        self._redis = RedisCache(max_stale_seconds=max_stale_seconds)
+        self._local = local if local is not None else _make_local_backend(max_stale_seconds)
+        self.generations = GenerationStore(self._redis)
+        self._bus = InvalidationBus(
+            self._redis, self._apply_invalidation, on_poll=self.generations.refresh
+        )
+        self._listeners: dict[str, Callable[[str, str], None]] = {}
+        # Lease name -> fencing token for leases this process holds
+        self._held_leases: dict[str, int] = {}
+        self._hits: Counter[str] = Counter()
+        self._stats_lock = threading.Lock()
+        self._flights = SingleFlight()
+
+    def _tiers(self) -> list[tuple[str, CacheBackend]]:
+        tiers: list[tuple[str, CacheBackend]] = []
+        if self._memory is not None:
+            tiers.append(("memory", self._memory))
+        tiers.append(("redis", self._redis))
+        tiers.append(("local", self._local))
+        return tiers
+
+    def _count(self, tier: str, n: int = 1) -> None:
+        if n:
+            with self._stats_lock:
+                self._hits[tier] += n
+
+    def tier_stats(self) -> dict[str, int]:
+        """Return hit counts per tier plus stale and miss totals."""
+        with self._stats_lock:
+            return {tier: self._hits[tier] for tier in (*self.TIERS, "stale", "miss")}
+
+    def get_entry(self, key: str) -> CacheEntry | None:
+        """Return the first fresh entry across tiers, else the first stale one."""
+        return self.get_entries([key]).get(key)
+
+    def get_entries(self, keys: Iterable[str], complete: bool = False) -> dict[str, CacheEntry]:
+        """Batched :meth:`get_entry`: one lookup per tier for all still-missing keys.
+
+        Args:
+            keys: Cache keys.
+            complete: Wait for every tier to answer instead of returning what
+                arrived within the read budget.  Use before treating a
+                missing key as absent (e.g. before computing it).
+
+        Returns:
+            Entries found, fresh or stale, by key.
+        """
+        self._bus.ensure_listening()
+        remaining = list(keys)
+        found: dict[str, CacheEntry] = {}
+        stale: dict[str, CacheEntry] = {}
+        for tier, backend in self._tiers():
+            if tier == "redis" and self._writes is not None:
+                # Written but not yet persisted: still ours to serve
+                queued = self._pending_entries(remaining)
+                if queued:
+                    self._count("memory", len(queued))
+                    found.update(queued)
+                    remaining = [key for key in remaining if key not in queued]
+            if not remaining:
+                break
+            if tier != "memory" and self._read_budget is not None and not complete:
+                self._read_hedged(remaining, found, stale)
+                remaining = [key for key in remaining if key not in found]
+                break
+            fresh, tier_stale = self._read_tier(tier, backend, remaining)
+            found.update(fresh)
+            for key, entry in tier_stale.items():
+                stale.setdefault(key, entry)
+            remaining = [key for key in remaining if key not in fresh]
+
+        served_stale = {key: stale[key] for key in remaining if key in stale}
+        self._count("stale", len(served_stale))
+        self._count("miss", len(remaining) - len(served_stale))
+        found.update(served_stale)
+        return found
+
+    def _read_tier(
+        self, tier: str, backend: CacheBackend, keys: list[str]
+    ) -> tuple[dict[str, CacheEntry], dict[str, CacheEntry]]:
+        """Look *keys* up in one tier; return decoded ``(fresh, stale)`` and backfill fresh hits."""
+        raw_fresh: dict[str, CacheEntry] = {}
+        fresh: dict[str, CacheEntry] = {}
+        stale: dict[str, CacheEntry] = {}
+        for key, raw in backend.get_entries(keys).items():
+            entry = raw if tier == "memory" else self._decode(key, raw)
+            if entry is None:
+                continue
+            if entry.stale:
+                stale[key] = entry
+            else:
+                raw_fresh[key] = raw
+                fresh[key] = entry
+        self._count(tier, len(fresh))
+        self._backfill(tier, raw_fresh, fresh)
+        return fresh, stale
+
+    def _read_hedged(
+        self,
+        keys: list[str],
+        found: dict[str, CacheEntry],
+        stale: dict[str, CacheEntry],
+    ) -> None:
+        """Race the local tier against (delayed) Redis within the read budget."""
+        assert self._read_budget is not None
+        deadline = time.monotonic() + self._read_budget
+
+        def merge(future: Future) -> None:
+            try:
+                fresh, tier_stale = future.result()
+            except Exception:
+                logger.warning("FallbackCache hedged read failed", exc_info=True)
+                return
+            for key, entry in fresh.items():
+                found.setdefault(key, entry)
+            for key, entry in tier_stale.items():
+                stale.setdefault(key, entry)
+
+        local = self._hedge_pool("local").submit(self._read_tier, "local", self._local, keys)
+        pending: set[Future] = {local}
+        done, _ = wait(pending, timeout=min(self._hedge_delay, self._read_budget))
+        if done:
+            merge(local)
+            pending.clear()
+        missing = [key for key in keys if key not in found]
+        if missing:
+            redis = self._hedge_pool("redis")
+            pending.add(redis.submit(self._read_tier, "redis", self._redis, missing))
+
+        while pending and any(key not in found for key in keys):
+            done, pending = wait(
+                pending, timeout=max(0.0, deadline - time.monotonic()),
+                return_when=FIRST_COMPLETED,
+            )
+            if not done:
+                _metrics.incr("fallback", CacheMetrics._batch_namespace(keys), "budget_exceeded")
+                logger.debug("FallbackCache read budget exceeded for %d keys", len(keys))
+                break
+            for future in done:
+                merge(future)
+
+    def _hedge_pool(self, tier: str) -> ThreadPoolExecutor:
+        pool = self._hedge_pools.get(tier)
+        if pool is None:
+            with self._stats_lock:
+                pool = self._hedge_pools.get(tier)
+                if pool is None:
+                    pool = self._hedge_pools[tier] = ThreadPoolExecutor(
+                        max_workers=_HEDGE_WORKERS, thread_name_prefix=f"cache-read-{tier}"
+                    )
+        return pool
+
+    def get(self, key: str) -> bytes | None:
+        entry = self.get_entry(key)
+        if entry is None or entry.stale:
+            return None
+        return entry.value
+
+    def get_view(self, key: str) -> CacheView | None:
+        """Return a fresh value as a :class:`CacheView`, avoiding copies where possible.
+
+        Memory hits are wrapped as-is and uncompressed local files are
+        memory-mapped, so neither allocates per request.  The local tier is
+        consulted before Redis here because a mapped file is cheaper than a
+        network round trip; keys are content-addressed, so both hold the same
+        bytes.  Anything else falls back to :meth:`get_entry` (one copy).
+        """
+        if self._memory is not None:
+            entry = self._memory.get_entry(key)
+            if entry is not None and not entry.stale:
+                self._count("memory")
+                return CacheView(memoryview(entry.value), entry.expires_at)
+        view = self._local.get_view(key)
+        if view is not None and not view.stale:
+            view = view._replace(data=DeltaFrame.unwrap_view(view.data))
+            if self._codec_for(key) is None or not BlobCodec.is_encoded(view.data):
+                self._count("local")
+                return view
+            entry = self._decode(key, CacheEntry(view.data.tobytes(), view.expires_at))
+            if entry is not None:
+                self._count("local")
+                return CacheView(memoryview(entry.value), entry.expires_at)
+        entry = self.get_entry(key)
+        if entry is None or entry.stale:
+            return None
+        return CacheView(memoryview(entry.value), entry.expires_at)
+
+    def get_many(self, keys: Iterable[str], complete: bool = False) -> dict[str, bytes]:
+        """Batched :meth:`get`: memory, then one Redis round trip, then local files.
+
+        *complete* is as for :meth:`get_entries`.
+        """
+        return {
+            key: entry.value
+            for key, entry in self.get_entries(keys, complete).items()
+            if not entry.stale
+        }
+
+    def set(
+        self, key: str, value: bytes, ttl_seconds: float | None = None, delta: float = 0.0
+    ) -> None:
+        self.set_many({key: value}, ttl_seconds, delta)
+
+    def set_many(
+        self, items: Mapping[str, bytes], ttl_seconds: float | None = None, delta: float = 0.0
+    ) -> None:
+        """Store *items* in every tier.
+
+        Args:
+            items: Plain values by key.
+            ttl_seconds: Freshness lifetime before jitter (default: each key's
+                policy TTL).
+            delta: Seconds the values took to compute, for early refresh.
+        """
+        self._set_many(items, ttl_seconds, delta)
+
+    def _set_many(
+        self,
+        items: Mapping[str, bytes],
+        ttl_seconds: float | None,
+        delta: float,
+        lease: int = 0,
+    ) -> None:
+        """:meth:`set_many`, releasing the generation lease *lease* on each key once
+        its value is in Redis (or right away if it is not stored)."""
+        self._bus.ensure_listening()
+        jitter = 1 - self._ttl_jitter * random.random()
+        by_ttl: dict[float, dict[str, bytes]] = {}
+        for key, value in items.items():
+            policy = _policies.for_key(key)
+            if policy.max_entry_bytes and len(value) > policy.max_entry_bytes:
+                _metrics.incr("fallback", _namespace(key), "too_large")
+                logger.debug("FallbackCache not storing %s: %d bytes", key, len(value))
+                if lease:
+                    self._release_lease(_LEASE_PREFIX + key, lease)
+                continue
+            ttl = policy.ttl_seconds if ttl_seconds is None else ttl_seconds
+            by_ttl.setdefault(ttl * jitter, {})[key] = value
+        for ttl, group in by_ttl.items():
+            self._store(group, ttl, delta, lease)
+
+    def _store(self, items: Mapping[str, bytes], ttl: float, delta: float, lease: int = 0) -> None:
+        if self._memory is not None:
+            self._memory.set_many(items, ttl, delta)
+        if self._writes is not None:
+            expires_at = time.time() + ttl
+            targets = frozenset(("redis", "local"))
+            items = {
+                key: value
+                for key, value in items.items()
+                if not self._writes.put(
+                    key, PendingWrite(value, None, expires_at, targets, delta, lease)
+                )
+            }
+            if not items:
+                return
+            # Queue full: persist the overflow inline
+        items = {key: self._encode(key, value, delta) for key, value in items.items()}
+        self._redis.set_many(items, ttl)
+        if lease:
+            for key in items:
+                self._release_lease(_LEASE_PREFIX + key, lease)
+        self._local.set_many(items, ttl)
+
+    def flush_writes(self, timeout: float | None = None) -> bool:
+        """Block until queued write-behind writes are persisted; *False* on timeout."""
+        return True if self._writes is None else self._writes.flush(timeout)
+
+    def _pending_entries(self, keys: list[str]) -> dict[str, CacheEntry]:
+        assert self._writes is not None
+        queued: dict[str, CacheEntry] = {}
+        for key in keys:
+            write = self._writes.get(key)
+            if write is not None and time.time() <= write.expires_at:
+                queued[key] = CacheEntry(write.value, write.expires_at, write.delta)
+        return queued
+
+    def _persist(self, batch: Mapping[str, PendingWrite]) -> None:
+        """Write-behind worker: encode and store a drained batch, pipelined per TTL."""
+        now = time.time()
+        redis_groups: dict[int, dict[str, bytes]] = {}
+        for key, write in batch.items():
+            encoded = write.encoded
+            if encoded is None:
+                encoded = self._encode(key, write.value, write.delta)
+            ttl = write.expires_at - now
+            if "redis" in write.targets:
+                redis_groups.setdefault(max(1, round(ttl)), {})[key] = encoded
+            if "local" in write.targets and not self._local.rearm(key, encoded, ttl):
+                self._local.set(key, encoded, ttl)
+        for ttl_seconds, items in redis_groups.items():
+            self._redis.set_many(items, ttl_seconds)
+        # Waiting replicas poll Redis, so leases go only once the values are there
+        for key, write in batch.items():
+            if write.lease:
+                self._release_lease(_LEASE_PREFIX + key, write.lease)
+
+    def get_swr(
+        self,
+        key: str,
+        refresh: ComputeFn,
+        schedule: Callable[[], object] | None = None,
+    ) -> bytes | None:
+        """Return the cached value, serving stale entries while they are refreshed.
+
+        Args:
+            key: Cache key.
+            refresh: Recomputes the value; runs in a background thread when the
+                entry is stale.  Returning *None* keeps the stale entry.
+            schedule: Arranges the refresh elsewhere (e.g. on a worker pool
+                that ends up calling :meth:`refresh`) instead of starting a
+                thread for it.
+
+        Returns:
+            Fresh or stale bytes, or *None* on a miss (nothing is scheduled).
+        """
+        entry = self.get_entry(key)
+        if entry is None:
+            return None
+        due = entry.stale
+        if not due and self._refresh_early(entry):
+            _metrics.incr("fallback", _namespace(key), "early_refresh")
+            due = True
+        if due and schedule is not None:
+            schedule()
+        elif due:
+            self._revalidate(key, refresh)
+        return entry.value
+
+    def _refresh_early(self, entry: CacheEntry) -> bool:
+        """XFetch: a fresh entry is due with probability ``exp(-remaining / (delta * beta))``."""
+        if entry.delta <= 0 or self._xfetch_beta <= 0:
+            return False
+        # 1 - random() is in (0, 1], so the log is finite and <= 0
+        early_by = -entry.delta * self._xfetch_beta * math.log(1.0 - random.random())
+        return time.time() + early_by >= entry.expires_at
+
+    def get_or_compute(
+        self,
+        key: str,
+        fn: ComputeFn,
+        refresh: ComputeFn | None = None,
+    ) -> bytes | None:
+        """Return the cached value, computing it once across concurrent callers on a miss.
+
+        Args:
+            key: Cache key.
+            fn: Produces the value on a miss; its result is stored unless *None*
+                (a returned :class:`CacheEntry` sets its own TTL).  Concurrent
+                callers for the same key wait for one call.
+            refresh: Used instead of *fn* to revalidate a stale entry in the
+                background (defaults to *fn*).
+
+        Returns:
+            Cached or freshly computed bytes (*None* only if *fn* returned it).
+        """
+        data = self.get_swr(key, fn if refresh is None else refresh)
+        if data is not None:
+            return data
+        return self._flights.do(
+            key, lambda: self._compute_and_store(key, fn, recheck=True, foreground=True)
+        )
+
+    def refresh(self, key: str, fn: ComputeFn) -> bytes | None:
+        """Recompute and store *key* on the calling thread, joining one already in flight.
+
+        Returns:
+            The new value (*None* if *fn* returned it).
+        """
+        return self._flights.do(key, lambda: self._compute_and_store(key, fn))
+
+    def compute_in_background(self, key: str, fn: ComputeFn) -> bool:
+        """Compute and store *key* in a daemon thread unless it is already in flight.
+
+        The thread first waits for every tier, so a key that only looked
+        missing because a read ran out of budget is not recomputed.
+
+        Returns:
+            *True* if a computation was started.
+        """
+        return self._flights.start(key, lambda: self._compute_and_store(key, fn, recheck=True))
+
+    def _compute_and_store(
+        self, key: str, fn: ComputeFn, recheck: bool = False, foreground: bool = False
+    ) -> bytes | None:
+        if recheck:
+            # Another flight may have filled it, or a budgeted read gave up on it
+            entry = self.get_entries([key], complete=True).get(key)
+            if entry is not None and not entry.stale:
+                return entry.value
+        token, data = self._lease_or_wait(key)
+        if data is not None:
+            return data
+        lease = _LEASE_PREFIX + key
+        start = time.perf_counter()
+        try:
+            value = fn()
+        except Exception:
+            if token:
+                # Let waiting replicas take over now rather than at lease expiry
+                self._release_lease(lease, token)
+            if foreground:
+                raise
+            logger.warning("FallbackCache background compute failed for %s", key, exc_info=True)
+            return None
+        delta = time.perf_counter() - start
+        if token and self._redis.lease_holder(lease) not in (None, token):
+            # Our lease expired and another replica took over: it stores the result
+            _metrics.incr("lease", _namespace(key), "fenced")
+            self._held_leases.pop(lease, None)
+            return value.value if isinstance(value, CacheEntry) else value
+        if value is None:
+            if token:
+                # Nothing to wait for: let a waiter take over right away
+                self._release_lease(lease, token)
+            return None
+        ttl: float | None = None
+        if isinstance(value, CacheEntry):
+            data, ttl = value.value, value.remaining_ttl()
+        else:
+            data = value
+        try:
+            # The lease is released once the value is in Redis, where waiters
+            # poll for it -- by the write-behind worker, off this thread
+            self._set_many({key: data}, ttl, delta, token)
+        except Exception:
+            if token:
+                self._release_lease(lease, token)
+            raise
+        return data
+
+    def _lease_or_wait(self, key: str) -> tuple[int, bytes | None]:
+        """Take the generation lease on *key*, or wait for the replica holding it.
+
+        Returns:
+            ``(token, None)`` when this process should compute (token 0: no
+            lease, e.g. Redis is down or the wait timed out), or
+            ``(0, value)`` when another replica stored the value meanwhile.
+        """
+        if self._lease_seconds is None:
+            return 0, None
+        lease = _LEASE_PREFIX + key
+        ns = _namespace(key)
+        start = time.monotonic()
+        deadline = start + self._lease_wait
+        delay = _LEASE_POLL_SECONDS
+        while True:
+            token = self._redis.acquire_lease(lease, self._lease_seconds)
+            if token is not None:
+                _metrics.incr("lease", ns, "acquired" if token else "unavailable")
+                if token:
+                    with self._stats_lock:
+                        self._held_leases[lease] = token
+                return token, None
+            with self._stats_lock:
+                own = self._held_leases.get(lease)
+            if own is not None and self._redis.lease_holder(lease) == own:
+                # Left over from an earlier computation here (e.g. its release
+                # failed): single-flight means nobody in this process uses it
+                _metrics.incr("lease", ns, "reused")
+                return own, None
+            while True:
+                if time.monotonic() >= deadline:
+                    _metrics.incr("lease", ns, "timeout")
+                    logger.warning("FallbackCache lease wait timed out, computing %s", key)
+                    return 0, None
+                time.sleep(min(delay, max(0.0, deadline - time.monotonic())))
+                delay = min(delay * 2, _LEASE_MAX_POLL_SECONDS)
+                fresh, _stale = self._read_tier("redis", self._redis, [key])
+                if key in fresh:
+                    _metrics.incr("lease", ns, "waited")
+                    _metrics.observe("lease", ns, "wait", time.monotonic() - start)
+                    return 0, fresh[key].value
+                if self._redis.lease_holder(lease) is None:
+                    break  # holder gave up or died: try to take over
+
+    def _release_lease(self, lease: str, token: int) -> None:
+        with self._stats_lock:
+            if self._held_leases.get(lease) == token:
+                del self._held_leases[lease]
+        self._redis.release_lease(lease, token)
+
+    def _revalidate(self, key: str, refresh: ComputeFn) -> None:
+        if self._flights.start(key, lambda: self._compute_and_store(key, refresh)):
+            logger.debug("FallbackCache REVALIDATING: %s", key)
+
+    def _codec_for(self, key: str) -> BlobCodec | None:
+        name = _policies.for_key(key).codec
+        if name is None:
+            return self._codec
+        codec = self._policy_codecs.get(name)
+        if codec is None:
+            codec = self._policy_codecs[name] = BlobCodec(name)
+        return codec
+
+    def _encode(self, key: str, value: bytes, delta: float) -> bytes:
+        codec = self._codec_for(key)
+        if codec is not None:
+            value = codec.encode(value)
+        return DeltaFrame.wrap(value, delta)
+
+    def _decode(self, key: str, entry: CacheEntry) -> CacheEntry | None:
+        blob, delta = DeltaFrame.unwrap(entry.value)
+        codec = self._codec_for(key)
+        if codec is None:
+            return CacheEntry(blob, entry.expires_at, delta)
+        try:
+            return CacheEntry(codec.decode(blob), entry.expires_at, delta)
+        except Exception:
+            logger.warning("FallbackCache cannot decode %s, ignoring entry", key, exc_info=True)
+            return None
+
+    def tag_key(self, key: str, tags: Iterable[str] = ()) -> str:
+        """:meth:`GenerationStore.tag_key`, keeping its background refresh running."""
+        self._bus.ensure_listening()
+        return self.generations.tag_key(key, tags)
+
+    def invalidate_key(self, key: str) -> None:
+        """Delete *key* from Redis and from every process's memory and local tiers."""
+        if self._writes is not None:
+            self._discard_write(key)
+            # A write already in flight could land after the delete below
+            self._writes.flush(_REDIS_TIMEOUT_SECONDS)
+        # The lease goes too, so the next miss anywhere computes without waiting
+        self._redis.delete(key, _LEASE_PREFIX + key)
+        self._bus.publish({"key": key})
+
+    def invalidate_tag(self, tag: str) -> int:
+        """Bump *tag*'s generation and evict its keys' copies in every process.
+
+        Returns:
+            The tag's new generation.
+        """
+        generation = self.generations.invalidate(tag)
+        self._bus.publish({"tag": tag, "generation": generation})
+        return generation
+
+    def add_invalidation_listener(self, name: str, callback: Callable[[str, str], None]) -> None:
+        """Call ``callback(kind, name)`` (kind ``"key"`` or ``"tag"``) on every invalidation.
+
+        Registering again under the same *name* replaces the callback, so
+        code that re-executes (such as Streamlit pages) can register freely.
+        """
+        with self._stats_lock:
+            self._listeners[name] = callback
+
+    def _apply_invalidation(self, message: dict[str, Any]) -> None:
+        if "tag" in message:
+            kind, name = "tag", str(message["tag"])
+            self.generations.observe(name, int(message.get("generation", 0)))
+            keys = self.generations.pop_keys(name)
+        else:
+            kind, name = "key", str(message["key"])
+            keys = {name}
+        for key in keys:
+            if self._memory is not None:
+                self._memory.delete(key)
+            if self._writes is not None:
+                self._discard_write(key)
+            self._local.delete(key)
+        _metrics.incr("invalidation", _namespace(name) if kind == "key" else "tag", kind)
+        logger.debug("Cache %s %s invalidated (%d local keys evicted)", kind, name, len(keys))
+        with self._stats_lock:
+            listeners = list(self._listeners.values())
+        for callback in listeners:
+            try:
+                callback(kind, name)
+            except Exception:
+                logger.warning("Invalidation listener failed for %s %s", kind, name, exc_info=True)
+
+    def _discard_write(self, key: str) -> None:
+        """Drop *key*'s queued write, releasing the lease it would have released."""
+        assert self._writes is not None
+        write = self._writes.discard(key)
+        if write is not None and write.lease:
+            self._release_lease(_LEASE_PREFIX + key, write.lease)
+
+    def _warm_local(self, key: str, entry: CacheEntry, encoded: bytes) -> None:
+        """Copy a Redis hit into the local tier (unless it already holds these bytes)."""
+        if self._writes is not None and self._writes.put(
+            key,
+            PendingWrite(entry.value, encoded, entry.expires_at, frozenset(("local",))),
+            replace=False,
+        ):
+            return
+        ttl = entry.remaining_ttl()
+        if not self._local.rearm(key, encoded, ttl):
+            self._local.set(key, encoded, ttl)
+
+    def _backfill(
+        self,
+        tier: str,
+        raw: Mapping[str, CacheEntry],
+        decoded: Mapping[str, CacheEntry],
+    ) -> None:
+        """Copy fresh hits from *tier* into the faster tiers, keeping their expiry.
+
+        The local file receives the still-encoded blob; memory gets plain bytes.
+        """
+        for key, entry in decoded.items():
+            ttl = entry.remaining_ttl()
+            if tier == "redis":
+                self._warm_local(key, entry, raw[key].value)
+            if tier != "memory" and self._memory is not None:
+                self._memory.set(key, entry.value, ttl, entry.delta)
+
+
+# ---------------------------------------------------------------------------
+# Content fingerprints
+# ---------------------------------------------------------------------------
+
+# Modules whose source shapes the generated documents.  Their bytes are folded
+# into every fingerprint so a layout change invalidates cached output even
+# when the resume data itself is unchanged.
+_GENERATOR_SOURCES = tuple(
+    Path(__file__).with_name(name)
+    for name in (
+        "resume_controller.py",
+        "resume_docx_generator.py",
+        "resume_pdf_generator.py",
+    )
+)
+
+
+class FingerprintRegistry:
+    """Memoized SHA-256 fingerprints of resume data sources, keyed by language.
+
+    Each source is serialized and hashed once per process.  Later lookups are a
+    dict access as long as the *same object* stays registered; registering a
+    different object (e.g. after Streamlit reloads the data module) re-hashes
+    that one source.
+    """
+
+    def __init__(self, generator_sources: Iterable[Path] = _GENERATOR_SOURCES) -> None:
+        self._generator_sources = tuple(generator_sources)
+        self._generator_version: str | None = None
+        self._sources: dict[str, tuple[Any, str]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def generator_version(self) -> str:
+        """Short digest of the generator modules' source, computed once."""
+        if self._generator_version is None:
+            digest = hashlib.sha256()
+            for path in self._generator_sources:
+                try:
+                    digest.update(path.read_bytes())
+                except OSError:
+                    logger.warning("Cannot read generator source %s", path)
+            self._generator_version = digest.hexdigest()[:8]
+        return self._generator_version
+
+    def register(self, language: str, data: Any) -> str:
+        entry = self._sources.get(language)
+        if entry is not None and entry[0] is data:
+            return entry[1]
+
+        with self._lock:
+            entry = self._sources.get(language)
+            if entry is not None and entry[0] is data:
+                return entry[1]
+            digest = self._digest(data)
+            self._sources[language] = (data, digest)
+            logger.debug("Fingerprint for %s: %s", language, digest)
+            return digest
+
+    def fingerprint(self, language: str) -> str:
+        try:
+            return self._sources[language][1]
+        except KeyError:
+            raise KeyError(f"No data source registered for language {language!r}") from None
+
+    def _digest(self, data: Any) -> str:
+        raw = json.dumps(data, sort_keys=True, ensure_ascii=False)
+        digest = hashlib.sha256(raw.encode())
+        digest.update(self.generator_version.encode())
+        return digest.hexdigest()[:16]
+
+
+# ---------------------------------------------------------------------------
+# Image negative-cache records
+# ---------------------------------------------------------------------------
+
+class FailedFetch(NamedTuple):
+    """Why an image download failed, stored under the image key instead of bytes.
+
+    The record's TTL doubles with every consecutive failure (from a short base
+    for transient errors, a longer one for permanent 4xx responses) up to
+    ``_NEGATIVE_MAX_TTL_SECONDS``.  Once it goes stale the next lookup retries
+    the download in the background.
+    """
+
+    reason: str
+    attempts: int
+    failed_at: float
+    permanent: bool = False
+
+    def encode(self) -> bytes:
+        return _FAILED_FETCH_MAGIC + json.dumps(self._asdict()).encode()
+
+    @classmethod
+    def decode(cls, blob: bytes) -> FailedFetch | None:
+        """Parse a stored record; *None* if *blob* is image data."""
+        if blob == b"":
+            # Written by versions that cached failures as empty bytes
+            return cls("unknown (legacy entry)", 1, 0.0)
+        if not blob.startswith(_FAILED_FETCH_MAGIC):
+            return None
+        return cls(**json.loads(blob[len(_FAILED_FETCH_MAGIC) :]))
+
+    def backoff_seconds(self, base_seconds: float = _NEGATIVE_TTL_SECONDS) -> float:
+        """Record lifetime; *base_seconds* is the base for transient errors."""
+        base = _NEGATIVE_PERMANENT_TTL_SECONDS if self.permanent else base_seconds
+        return min(base * 2.0 ** (self.attempts - 1), _NEGATIVE_MAX_TTL_SECONDS)
+
+
+class ImageValidators(NamedTuple):
+    """HTTP cache validators of a downloaded image, stored under ``<key>:meta``.
+
+    Kept apart from the image bytes so hot lookups never parse metadata; they
+    are read only when a stale image is revalidated.
+    """
+
+    etag: str | None = None
+    last_modified: str | None = None
+    max_age: int | None = None
+
+    @classmethod
+    def from_headers(cls, headers: Any) -> ImageValidators:
+        max_age = None
+        for directive in (headers.get("Cache-Control") or "").split(","):
+            name, _, value = directive.strip().partition("=")
+            if name.lower() == "max-age" and value.strip('"').isdigit():
+                max_age = int(value.strip('"'))
+        return cls(headers.get("ETag"), headers.get("Last-Modified"), max_age)
+
+    @classmethod
+    def decode(cls, blob: bytes) -> ImageValidators:
+        return cls(**json.loads(blob))
+
+    def encode(self) -> bytes:
+        return json.dumps(self._asdict()).encode()
+
+    def merge(self, newer: ImageValidators) -> ImageValidators:
+        """Validators from a 304 response override ours only where present."""
+        return ImageValidators(
+            newer.etag or self.etag,
+            newer.last_modified or self.last_modified,
+            newer.max_age if newer.max_age is not None else self.max_age,
+        )
+
+    def request_headers(self) -> dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def ttl_seconds(self, default: float = DEFAULT_TTL_SECONDS) -> float:
+        """Upstream ``max-age`` (floored) if given, else *default*."""
+        if self.max_age is None:
+            return default
+        return max(self.max_age, _IMAGE_MIN_TTL_SECONDS)
+
+    def __bool__(self) -> bool:
+        return any(field is not None for field in self)
+
+
+class ImageLookup(NamedTuple):
+    """Cache-only image lookup result: ``"hit"``, ``"miss"`` or ``"failed"``."""
+
+    status: str
+    data: bytes | None = None
+    failure: FailedFetch | None = None
+
+
+# ---------------------------------------------------------------------------
+# Image prefetching
+# ---------------------------------------------------------------------------
+
+PrefetchCallback = Callable[[str, "ImageLookup"], None]
+
+
+class ImagePrefetcher:
+    """Downloads images on a fixed pool of worker threads.
+
+    :meth:`prefetch` only enqueues and returns; the thread count stays at
+    *workers* however many sessions ask for however many URLs.  A URL that is
+    already queued or downloading is not queued again (its callbacks are
+    merged), at most *per_host* downloads run against one host at a time, and
+    URLs beyond *max_queue* pending are dropped (a later render asks again).
+    :meth:`refresh` queues the revalidation of a stale image on the same
+    workers; *fetch* is called as ``fetch(url, refresh)``.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[str, bool], ImageLookup],
+        workers: int = _PREFETCH_WORKERS,
+        per_host: int = _PREFETCH_PER_HOST,
+        max_queue: int = _PREFETCH_MAX_QUEUE,
+    ) -> None:
+        self._fetch = fetch
+        self._workers = workers
+        self._per_host = per_host
+        self._max_queue = max_queue
+        self._cond = threading.Condition()
+        self._queue: deque[str] = deque()
+        # url -> callbacks, for every queued or running URL
+        self._pending: dict[str, list[PrefetchCallback]] = {}
+        # URLs whose next run must revalidate even though they are cached
+        self._refresh: set[str] = set()
+        self._active_hosts: Counter[str] = Counter()
+        self._threads: list[threading.Thread] = []
+
+    def prefetch(self, urls: Iterable[str], callback: PrefetchCallback | None = None) -> int:
+        """Queue *urls* for download without blocking.
+
+        Args:
+            urls: Image URLs; already pending ones are not queued twice.
+            callback: Called from a worker thread as ``callback(url, lookup)``
+                once each URL is cached, failed or found already cached.
+
+        Returns:
+            Number of URLs newly queued.
+        """
+        queued = 0
+        with self._cond:
+            for url in urls:
+                callbacks = self._pending.get(url)
+                if callbacks is None:
+                    if len(self._queue) >= self._max_queue:
+                        logger.debug("ImagePrefetcher queue full, dropping %s", url)
+                        continue
+                    callbacks = self._pending[url] = []
+                    self._queue.append(url)
+                    queued += 1
+                if callback is not None:
+                    callbacks.append(callback)
+            if queued:
+                self._ensure_workers()
+                self._cond.notify(queued)
+        return queued
+
+    def refresh(self, url: str) -> bool:
+        """Queue a revalidation of *url* without blocking.
+
+        A URL that is queued is revalidated when it runs; one that is running
+        is queued again once it finishes.
+
+        Returns:
+            *False* if the queue is full (a later render asks again).
+        """
+        with self._cond:
+            if url not in self._pending:
+                if len(self._queue) >= self._max_queue:
+                    logger.debug("ImagePrefetcher queue full, dropping refresh of %s", url)
+                    return False
+                self._pending[url] = []
+                self._queue.append(url)
+                self._ensure_workers()
+                self._cond.notify()
+            self._refresh.add(url)
+        return True
+
+    def pending(self) -> int:
+        """Number of URLs queued or downloading."""
+        with self._cond:
+            return len(self._pending)
+
+    def _ensure_workers(self) -> None:
+        # Caller holds the condition lock
+        while len(self._threads) < self._workers:
+            thread = threading.Thread(
+                target=self._work, name=f"image-prefetch-{len(self._threads)}", daemon=True
+            )
+            self._threads.append(thread)
+            thread.start()
+
+    def _next(self) -> tuple[str, str, bool]:
+        """Block until a queued URL whose host has a free slot is available."""
+        with self._cond:
+            while True:
+                for i, url in enumerate(self._queue):
+                    host = urlsplit(url).hostname or ""
+                    if self._active_hosts[host] < self._per_host:
+                        del self._queue[i]
+                        self._active_hosts[host] += 1
+                        refresh = url in self._refresh
+                        self._refresh.discard(url)
+                        return url, host, refresh
+                self._cond.wait()
+
+    def _work(self) -> None:
+        while True:
+            url, host, refresh = self._next()
+            callbacks: list[PrefetchCallback] = []
+            try:
+                lookup = self._fetch(url, refresh)
+            except Exception:
+                logger.warning("ImagePrefetcher failed for %s", url, exc_info=True)
+                lookup = ImageLookup("miss")
+            finally:
+                with self._cond:
+                    self._active_hosts[host] -= 1
+                    if url in self._refresh:
+                        # Found stale while running: revalidate on the next free worker
+                        callbacks, self._pending[url] = self._pending[url], []
+                        self._queue.append(url)
+                    else:
+                        callbacks = self._pending.pop(url, [])
+                    # A host slot freed up: wake waiters whose URLs were blocked on it
+                    self._cond.notify_all()
+            for callback in callbacks:
+                try:
+                    callback(url, lookup)
+                except Exception:
+                    logger.warning("ImagePrefetcher callback failed for %s", url, exc_info=True)
+
+
+# ---------------------------------------------------------------------------
+# Module-level singletons
+# ---------------------------------------------------------------------------
+
+def _read_budget_from_env() -> float | None:
+    """``CACHE_READ_BUDGET_MS`` (default 50); ``0`` turns hedged reads off."""
+    raw = os.environ.get("CACHE_READ_BUDGET_MS")
+    if raw is None:
+        return _READ_BUDGET_SECONDS
+    try:
+        budget_ms = float(raw)
+    except ValueError:
+        logger.warning("Invalid CACHE_READ_BUDGET_MS %r, using the default", raw)
+        return _READ_BUDGET_SECONDS
+    return budget_ms / 1000 if budget_ms > 0 else None
+
+
+_policies = CachePolicies.from_env()
+
+_cache = FallbackCache(
+    memory=MemoryCache(),
+    codec=BlobCodec("zlib"),
+    read_budget_seconds=_read_budget_from_env(),
+    write_behind=True,
+)
+_fingerprints = FingerprintRegistry()
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def register_data_source(language: str, data: Any) -> str:
+    """Register the resume data dict for *language* and return its fingerprint.
+
+    Cheap to call on every rerun: the dict is only hashed when a different
+    object is registered than last time.
+    """
+    return _fingerprints.register(language, data)
+
+
+def fingerprint(language: str) -> str:
+    """Return the memoized content fingerprint for *language* (no serialization)."""
+    return _fingerprints.fingerprint(language)
+
+
+def make_cache_key(language: str, data: dict | None = None) -> str:
+    """Build a cache key from language and the fingerprint of its data dict.
+
+    When *data* is omitted the source registered via :func:`register_data_source`
+    is used.
+    """
+    digest = fingerprint(language) if data is None else register_data_source(language, data)
+    return f"resume_report:{language}:{digest}"
+
+
+def generator_version() -> str:
+    """Short hash of the document generator sources (part of every fingerprint)."""
+    return _fingerprints.generator_version
+
+
+def tag_key(key: str, tags: Iterable[str] = ()) -> str:
+    """Version *key* by the generations of its namespace and *tags*.
+
+    Build the full key (including any suffixes) first, then tag it.  After
+    :func:`invalidate` on any of those tags the result changes, so previously
+    cached entries are no longer reachable.
+
+    Args:
+        key: Untagged cache key, e.g. ``resume_report:ENGLISH:<digest>:compact``.
+        tags: Extra tags such as ``language:ENGLISH`` or ``format:pdf``; the
+            ``ns:<namespace>`` tag is always included.
+
+    Returns:
+        *key* unchanged while all its tags are at generation 0, else
+        ``<key>@<generation digest>``.
+    """
+    return _cache.tag_key(key, tags)
+
+
+def invalidate(tag: str) -> int:
+    """Invalidate every key carrying *tag* (e.g. ``ns:image``, ``language:RUSSIAN``).
+
+    Costs a few Redis commands and a small file write, independent of how
+    many keys are affected.  Every replica sharing Redis switches to the new
+    keys and evicts its local copies of the old ones within seconds (at once
+    when pub/sub is available).
+
+    Returns:
+        The tag's new generation.
+    """
+    return _cache.invalidate_tag(tag)
+
+
+def invalidate_key(key: str) -> None:
+    """Delete *key* from the L2 cache on every replica sharing Redis."""
+    _cache.invalidate_key(key)
+
+
+def add_invalidation_listener(name: str, callback: Callable[[str, str], None]) -> None:
+    """Run ``callback(kind, name)`` whenever a key or tag is invalidated in any replica.
+
+    Use it to drop derived in-process state.  Re-registering under the same
+    *name* replaces the previous callback.
+    """
+    _cache.add_invalidation_listener(name, callback)
+
+
+def get_cached(key: str) -> bytes | None:
+    """Retrieve fresh bytes from the L2 cache, or *None* on miss."""
+    return _cache.get(key)
+
+
+def get_or_compute(
+    key: str,
+    fn: ComputeFn,
+    refresh: ComputeFn | None = None,
+) -> bytes | None:
+    """Return the cached value for *key*, or compute, store and return it.
+
+    Concurrent callers (sessions, prewarm threads) that miss on the same key
+    share one call to *fn*.  Stale entries are served while *refresh*
+    (default: *fn*) regenerates them in the background.
+    """
+    return _cache.get_or_compute(key, fn, refresh)
+
+
+def compute_in_background(key: str, fn: ComputeFn) -> bool:
+    """Compute and store *key* in a daemon thread unless that key is already in flight."""
+    return _cache.compute_in_background(key, fn)
+
+
+def get_cached_swr(key: str, refresh: ComputeFn) -> bytes | None:
+    """Retrieve bytes from the L2 cache in stale-while-revalidate mode.
+
+    An entry past its TTL (but within the max-staleness window) is returned
+    immediately while *refresh* regenerates it in a single background thread.
+    Returns *None* on a miss; the caller generates inline as usual.
+    """
+    return _cache.get_swr(key, refresh)
+
+
+def set_cached(key: str, value: bytes, generation_seconds: float = 0.0) -> None:
+    """Store bytes in the L2 cache (both Redis and local file).
+
+    Args:
+        key: Cache key.
+        value: Bytes to store.
+        generation_seconds: How long *value* took to produce, if known;
+            enables probabilistic early refresh by :func:`get_or_compute`.
+    """
+    _cache.set(key, value, delta=generation_seconds)
+
+
+def flush_cached_writes(timeout: float | None = None) -> bool:
+    """Wait for queued write-behind writes to reach Redis and disk.
+
+    Returns:
+        *False* if *timeout* elapsed first.
+    """
+    return _cache.flush_writes(timeout)
+
+
+def cache_policy(key: str) -> CachePolicy:
+    """The :class:`CachePolicy` governing *key* (by its namespace)."""
+    return _policies.for_key(key)
+
+
+def get_cached_view(key: str) -> CacheView | None:
+    """Fresh cached value as a zero-copy :class:`CacheView`, or *None*."""
+    return _cache.get_view(key)
+
+
+def open_cached(key: str) -> io.BufferedReader | None:
+    """Fresh cached value as a seekable binary stream over a zero-copy view, or *None*.
+
+    Suitable for handing a cached document to consumers that read in chunks
+    (e.g. an HTTP response) without materialising a copy of it first.
+    """
+    view = _cache.get_view(key)
+    return None if view is None else view.open()
+
+
+def get_many_cached(keys: Iterable[str], complete: bool = False) -> dict[str, bytes]:
+    """Retrieve several keys from the L2 cache in one round trip.
+
+    Args:
+        keys: Cache keys.
+        complete: Wait for every tier instead of returning what arrived within
+            the read budget -- for callers that act on a key being absent.
+
+    Returns:
+        Values of the keys that were found.
+    """
+    return _cache.get_many(keys, complete)
+
+
+def set_many_cached(items: Mapping[str, bytes]) -> None:
+    """Store several key/value pairs in the L2 cache in one round trip."""
+    _cache.set_many(items)
+
+
+def cache_stats() -> dict[str, Any]:
+    """Return cache metrics for dashboards and debugging.
+
+    Returns:
+        ``{"served": ..., "counters": ..., "latency": ...}`` where *served*
+        counts which tier answered each L2 lookup (plus stale and miss),
+        *counters* is ``{tier: {namespace: {event: n}}}`` and *latency* is
+        ``{tier: {namespace: {op: {count, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}}}}``.
+    """
+    return {"served": _cache.tier_stats(), **_metrics.snapshot()}
+
+
+def reset_cache_stats() -> None:
+    """Zero all cache metrics."""
+    _metrics.reset()
+
+
+def _image_cache_key(url: str) -> str:
+    return tag_key(f"image:{hashlib.sha256(url.encode()).hexdigest()[:16]}")
+
+
+def lookup_image(url: str) -> ImageLookup:
+    """Look up *url* in the cache without network I/O on the calling thread.
+
+    Distinguishes "never fetched" (``"miss"``) from "known bad" (``"failed"``,
+    with the stored :class:`FailedFetch`).  Stale images and expired failure
+    records are returned as-is while a background download refreshes them.
+    """
+    key = _image_cache_key(url)
+    # Revalidate on the prefetch pool, so the thread count stays fixed
+    schedule = partial(_image_prefetcher.refresh, url)
+    value = _cache.get_swr(key, partial(_fetch_image, url, key), schedule)
+    return _image_lookup(value)
+
+
+def get_image_from_cache(url: str) -> bytes | None:
+    """Return cached image bytes without any network I/O on the calling thread.
+
+    Returns *None* on miss **and** on cached failure; use :func:`lookup_image`
+    to tell them apart.
+    """
+    return lookup_image(url).data
+
+
+def fetch_image_cached(url: str) -> bytes | None:
+    """Download an image URL, caching the result in L2.
+
+    Returns the raw image bytes, or *None* if the download fails or a recent
+    failure for the URL is still cached.  Failures are stored as
+    :class:`FailedFetch` records with an exponentially growing TTL, so a dead
+    URL is retried ever less often and a transient error heals in a minute.
+    Concurrent callers for the same URL share a single download.
+    """
+    return _prefetch_image(url).data
+
+
+def fetch_image_in_background(url: str) -> None:
+    """Queue a background download for *url* (see :func:`prefetch_images`)."""
+    _image_prefetcher.prefetch([url])
+
+
+def prefetch_images(urls: Iterable[str], callback: PrefetchCallback | None = None) -> int:
+    """Queue downloads for *urls* on the shared prefetch pool and return immediately.
+
+    URLs that are already cached (or failed recently) are resolved by a
+    worker without network I/O; known-bad URLs are left alone until their
+    failure record expires.
+
+    Args:
+        urls: Image URLs.
+        callback: Optional ``callback(url, lookup)``, called from a worker
+            thread with the resulting :class:`ImageLookup`.
+
+    Returns:
+        Number of URLs newly queued.
+    """
+    return _image_prefetcher.prefetch(urls, callback)
+
+
+def _prefetch_image(url: str, refresh: bool = False) -> ImageLookup:
+    key = _image_cache_key(url)
+    if refresh:
+        return _image_lookup(_cache.refresh(key, partial(_fetch_image, url, key)))
+    lookup = lookup_image(url)
+    if lookup.status != "miss":
+        return lookup
+    return _image_lookup(_cache.get_or_compute(key, partial(_fetch_image, url, key)))
+
+
+_image_prefetcher = ImagePrefetcher(_prefetch_image)
+
+
+def _image_lookup(value: bytes | None) -> ImageLookup:
+    if value is None:
+        return ImageLookup("miss")
+    failure = FailedFetch.decode(value)
+    if failure is not None:
+        return ImageLookup("failed", failure=failure)
+    return ImageLookup("hit", data=value)
+
+
+def _image_meta_key(key: str) -> str:
+    return f"{key}:meta"
+
+
+def _fetch_image(url: str, key: str) -> CacheEntry:
+    """Download or revalidate *url* and return the entry to store under *key*.
+
+    When a good image is already cached and validators were stored with it,
+    the request is conditional (``If-None-Match`` / ``If-Modified-Since``);
+    a ``304`` re-arms the cached bytes without transferring them.  The TTL is
+    the upstream ``Cache-Control: max-age`` when present, else the key's
+    :class:`CachePolicy` TTL; failure backoffs start from its negative TTL.
+
+    On failure the entry is a :class:`FailedFetch` record with a backoff TTL.
+    If a good image is already cached, a failed refresh re-arms it for a
+    short while instead of replacing it with a failure record.
+    """
+    import urllib.error
+
+    policy = _policies.for_key(key)
+    previous = _cache.get_entry(key)
+    previous_failure = FailedFetch.decode(previous.value) if previous is not None else None
+    cached_body = previous.value if previous is not None and previous_failure is None else None
+    validators = ImageValidators()
+    if cached_body is not None:
+        meta = _cache.get_entry(_image_meta_key(key))
+        if meta is not None:
+            validators = ImageValidators.decode(meta.value)
+
+    try:
+        body, received = _download_image(url, validators if cached_body is not None else None)
+    except Exception as exc:
+        if cached_body is not None:
+            logger.warning("Image refresh failed for %s, keeping cached copy: %s", url, exc)
+            return CacheEntry(cached_body, time.time() + policy.negative_ttl_seconds)
+
+        permanent = (
+            isinstance(exc, urllib.error.HTTPError)
+            and 400 <= exc.code < 500
+            and exc.code not in (408, 429)
+        )
+        failure = FailedFetch(
+            reason=f"{type(exc).__name__}: {exc}",
+            attempts=previous_failure.attempts + 1 if previous_failure is not None else 1,
+            failed_at=time.time(),
+            permanent=permanent,
+        )
+        backoff = failure.backoff_seconds(policy.negative_ttl_seconds)
+        logger.warning(
+            "Image download failed for %s (attempt %d, retry in %ds): %s",
+            url,
+            failure.attempts,
+            backoff,
+            failure.reason,
+        )
+        return CacheEntry(failure.encode(), time.time() + backoff)
+
+    if body is None:
+        # 304 Not Modified: keep the bytes we have
+        logger.debug("Image not modified: %s", url)
+        body = cached_body
+        received = validators.merge(received)
+    assert body is not None
+    ttl = received.ttl_seconds(policy.ttl_seconds)
+    if received:
+        _cache.set(_image_meta_key(key), received.encode(), ttl_seconds=ttl)
+    return CacheEntry(body, time.time() + ttl)
+
+
+def _download_image(
+    url: str, validators: ImageValidators | None = None
+) -> tuple[bytes | None, ImageValidators]:
+    """Fetch *url* with a short timeout, conditionally if *validators* are given.
+
+    Returns:
+        The body (*None* on ``304 Not Modified``) and the response's validators.
+
+    Raises:
+        Exception: Any network or HTTP error other than 304.
+    """
+    import urllib.error
+    import urllib.request
+
+    headers = validators.request_headers() if validators else {}
+    request = urllib.request.Request(url, headers=headers)
+    try:
+        with urllib.request.urlopen(request, timeout=_IMAGE_TIMEOUT_SECONDS) as resp:
+            return resp.read(), ImageValidators.from_headers(resp.headers)
+    except urllib.error.HTTPError as exc:
+        if exc.code == 304 and headers:
+            return None, ImageValidators.from_headers(exc.headers)
+        raise
@@ -0,0 +1,63 @@
+"""Downloadable resume documents: variants, L2 cache keys and generation.
+
+Shared by the Streamlit page and the offline warmer (``python -m controller.warm``)
+so both produce identical bytes under identical keys.  The output format is
+fixed per language: English renders an international DOCX, Russian an
+hh.ru-style PDF.
+"""
+
+import io
+
+from controller.cache import generator_version, make_cache_key, register_data_source, tag_key
+from controller.resume_controller import ResumePage as Resume
+from controller.resume_docx_generator import InternationalDocxGenerator
+from controller.resume_pdf_generator import HHRuPDFGenerator
+from data.resume_data import resume_dict
+from data.resume_data_ru import resume_dict as resume_dict_ru
+
+RESUME_DATA = {
+    "ENGLISH": resume_dict,
+    "RUSSIAN": resume_dict_ru,
+}
+LANGUAGES = tuple(RESUME_DATA)
+
+
+def register_data_sources() -> None:
+    """Register every language's data dict for cache-key fingerprinting."""
+    for language, data in RESUME_DATA.items():
+        register_data_source(language, data)
+
+
+def document_format(language: str) -> str:
+    """File extension of the document generated for *language*."""
+    return "pdf" if language == "RUSSIAN" else "docx"
+
+
+def document_tags(language: str) -> list[str]:
+    """Invalidation tags carried by every download variant of *language*."""
+    return [
+        f"language:{language}",
+        f"format:{document_format(language)}",
+        f"generator:{generator_version()}",
+    ]
+
+
+def download_cache_key(language: str, compact: bool) -> str:
+    """Build the L2 cache key for a download variant (tagged, see :func:`document_tags`)."""
+    key = make_cache_key(language)
+    if compact:
+        key += ":compact"
+    return tag_key(key, document_tags(language))
+
+
+def load_resume(language: str) -> Resume:
+    """Parse the language's resume data (uncached)."""
+    return Resume.from_json(RESUME_DATA[language])
+
+
+def render_document(resume: Resume, language: str, compact: bool) -> bytes:
+    """Run the language's document generator and return the file bytes."""
+    generator_cls = HHRuPDFGenerator if language == "RUSSIAN" else InternationalDocxGenerator
+    buf = io.BytesIO()
+    generator_cls(resume, compact=compact).generate(buf)
+    return buf.getvalue()
@@ -0,0 +1,79 @@
+"""Display-size image assets: resized once, compactly encoded and cached.
+
+``st.image`` re-encodes PIL images on every rerun and resizes anything wider
+than the requested width.  :func:`prepared_image` instead returns bytes that
+are already exactly the display width and in the format Streamlit would pick
+(palette PNG when the image has transparency, JPEG otherwise), so Streamlit
+only parses the header and passes them through.  Results live in the L2 cache
+under ``asset:<source digest>:<width>``; the memory tier hands back the same
+``bytes`` object on every rerun.
+"""
+
+import hashlib
+import io
+import threading
+from functools import partial
+from pathlib import Path
+
+from PIL import Image, ImageOps
+
+from controller.cache import get_or_compute, tag_key
+
+_JPEG_QUALITY = 85
+
+# (path, mtime_ns, size) -> content digest, so reruns skip re-hashing the file
+_digests: dict[tuple[str, int, int], str] = {}
+_digests_lock = threading.Lock()
+
+
+def prepared_image(path: str | Path, width: int) -> bytes:
+    """Return the image at *path* resized to *width* pixels and compactly encoded.
+
+    Args:
+        path: Local image file.
+        width: Display width in pixels; images are never upscaled.
+
+    Returns:
+        PNG (transparent sources) or JPEG bytes.
+
+    Raises:
+        RuntimeError: If rendering produced no bytes.
+    """
+    digest = _source_digest(Path(path))
+    key = tag_key(f"asset:{digest}:{width}")
+    data = get_or_compute(key, partial(_render, Path(path), width))
+    if data is None:
+        raise RuntimeError(f"Rendering {path} at {width}px returned nothing")
+    return data
+
+
+def _source_digest(path: Path) -> str:
+    stat = path.stat()
+    marker = (str(path), stat.st_mtime_ns, stat.st_size)
+    with _digests_lock:
+        digest = _digests.get(marker)
+    if digest is None:
+        digest = hashlib.sha256(path.read_bytes()).hexdigest()[:16]
+        with _digests_lock:
+            _digests[marker] = digest
+    return digest
+
+
+def _render(path: Path, width: int) -> bytes:
+    with Image.open(path) as source:
+        image = ImageOps.exif_transpose(source)
+        if image.width > width:
+            height = round(image.height * width / image.width)
+            image = image.resize((width, height), Image.Resampling.LANCZOS)
+
+        buf = io.BytesIO()
+        # Same rule as st.image's "auto" format, so Streamlit does not re-encode
+        if image.mode in ("RGBA", "LA", "P"):
+            # 256-colour palette (alpha kept): logos shrink ~5x at icon sizes
+            palette = image.convert("RGBA").quantize(256, method=Image.Quantize.FASTOCTREE)
+            palette.save(buf, format="PNG", optimize=True)
+        else:
+            image.convert("RGB").save(
+                buf, format="JPEG", quality=_JPEG_QUALITY, optimize=True, progressive=True
+            )
+    return buf.getvalue()
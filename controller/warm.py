@@ -0,0 +1,129 @@
+"""Pre-generate every downloadable document variant into the L2 cache.
+
+Run from the repository root (the local file tier lives in ``.cache/``) as
+part of a deploy, so the first visitor gets instant downloads::
+
+    python -m controller.warm [--workers N] [--language ENGLISH ...] [--force]
+                              [--invalidate TAG ...]
+
+Each language x compact/full variant is generated in a worker process and
+written through :func:`controller.cache.set_cached` by the parent.  Variants
+whose key (which embeds the data + generator fingerprint) is already cached
+are skipped unless ``--force`` is given.  ``--invalidate`` bumps cache tags
+(e.g. ``format:pdf``, ``language:RUSSIAN``, ``ns:image``) before warming, so a
+deploy can drop exactly the entries whose inputs changed.
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from controller.cache import flush_cached_writes, get_many_cached, invalidate, set_cached
+from controller.documents import (
+    LANGUAGES,
+    document_format,
+    download_cache_key,
+    load_resume,
+    register_data_sources,
+    render_document,
+)
+
+
+def _build(language: str, compact: bool) -> tuple[bytes, float]:
+    """Worker: generate one variant and return its bytes and generation time."""
+    start = time.perf_counter()
+    data = render_document(load_resume(language), language, compact)
+    return data, time.perf_counter() - start
+
+
+def _label(language: str, compact: bool) -> str:
+    return f"{language:<8} {'compact' if compact else 'full':<7} {document_format(language):<4}"
+
+
+def warm(
+    languages: tuple[str, ...] = LANGUAGES,
+    workers: int | None = None,
+    force: bool = False,
+) -> int:
+    """Generate and cache all variants for *languages*.
+
+    Args:
+        languages: Languages to warm.
+        workers: Worker process count (defaults to one per variant, capped at
+            the CPU count).
+        force: Regenerate variants that are already cached.
+
+    Returns:
+        Number of variants that failed to generate.
+    """
+    register_data_sources()
+    variants = {
+        download_cache_key(language, compact): (language, compact)
+        for language in languages
+        for compact in (True, False)
+    }
+    # A budgeted read could miss variants a slow Redis holds and regenerate them
+    cached = {} if force else get_many_cached(variants, complete=True)
+    for key in cached:
+        print(f"{_label(*variants[key])}  skipped (cached)")
+
+    todo = {key: variant for key, variant in variants.items() if key not in cached}
+    if not todo:
+        return 0
+
+    failures = 0
+    max_workers = workers or min(len(todo), os.cpu_count() or 1)
+    # By now the cache runs background threads (write-behind, hedged reads, the
+    # invalidation listener) and holds Redis sockets; forking would copy those
+    # half-held locks and connections into the workers
+    spawn = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=spawn) as pool:
+        futures = {pool.submit(_build, *variant): key for key, variant in todo.items()}
+        for future in as_completed(futures):
+            key = futures[future]
+            label = _label(*todo[key])
+            try:
+                data, seconds = future.result()
+            except Exception as exc:
+                failures += 1
+                print(f"{label}  FAILED: {exc!r}", file=sys.stderr)
+                continue
+            set_cached(key, data, seconds)
+            print(f"{label}  {seconds * 1000:8.1f} ms  {len(data) / 1024:8.1f} KiB")
+    # set_cached only queues persistence; the deploy needs it on disk / in Redis
+    flush_cached_writes()
+    return failures
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--language",
+        action="append",
+        choices=LANGUAGES,
+        help="language to warm (repeatable; default: all)",
+    )
+    parser.add_argument("--workers", type=int, help="worker processes")
+    parser.add_argument("--force", action="store_true", help="regenerate cached variants")
+    parser.add_argument(
+        "--invalidate",
+        action="append",
+        default=[],
+        metavar="TAG",
+        help="invalidate a cache tag before warming (repeatable)",
+    )
+    args = parser.parse_args(argv)
+
+    for tag in args.invalidate:
+        print(f"invalidated {tag} (generation {invalidate(tag)})")
+    start = time.perf_counter()
+    failures = warm(tuple(args.language or LANGUAGES), args.workers, args.force)
+    print(f"done in {time.perf_counter() - start:.1f} s, {failures} failed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,9 @@
 """Streamlit resume page — renders the interactive CV with skill filtering and DOCX download."""
 
-import io
 import locale
 import re
 import threading
+from functools import partial
 from pathlib import Path
 import os
 import sys
@@ -14,26 +14,30 @@ if dir_name not in sys.path:
 
 import phonenumbers
 import streamlit as st
-from PIL import Image
 
 from controller.cache import (
-    fetch_image_cached,
-    get_cached,
+    add_invalidation_listener,
+    cache_stats,
+    compute_in_background,
+    fetch_image_in_background,
     get_image_from_cache,
-    make_cache_key,
-    set_cached,
+    get_many_cached,
+    get_or_compute,
 )
 from controller.data_structures import CaseInsensitiveSet
+from controller.documents import (
+    RESUME_DATA,
+    download_cache_key,
+    register_data_sources,
+    render_document,
+)
+from controller.images import prepared_image
 from controller.resume_controller import (
     ResumePage as Resume,
 )
 from controller.resume_controller import (
     _extract_skill_name,
 )
-from controller.resume_docx_generator import InternationalDocxGenerator
-from controller.resume_pdf_generator import HHRuPDFGenerator
-from data.resume_data import resume_dict
-from data.resume_data_ru import resume_dict as resume_dict_ru
 from locales.localization import get_text
 
 # ---------------------------------------------------------------------------
@@ -361,6 +365,10 @@ def _render_video(link: str) -> None:
 # ---------------------------------------------------------------------------
 
 
+# Fingerprints are memoized per data object, so re-registering on every
+# rerun is a dict lookup; a reloaded data module triggers a single re-hash.
+register_data_sources()
+
 _resume_cache: dict[str, Resume] = {}
 _resume_warming: set[str] = set()
 
@@ -372,12 +380,21 @@ def _load_resume(language: str) -> Resume:
     """
     if language in _resume_cache:
         return _resume_cache[language]
-    data = resume_dict_ru if language == "RUSSIAN" else resume_dict
-    result = Resume.from_json(data)
+    result = Resume.from_json(RESUME_DATA[language])
     _resume_cache[language] = result
     return result
 
 
+def _on_invalidation(kind: str, name: str) -> None:
+    """Re-parse a language's resume after another replica invalidated its tag."""
+    if kind == "tag" and name.startswith("language:"):
+        _resume_cache.pop(name.partition(":")[2], None)
+
+
+# Registered by name, so reruns replace the listener instead of stacking copies
+add_invalidation_listener("resume_page", _on_invalidation)
+
+
 def _prewarm_resume(language: str) -> None:
     """Parse and cache the other language's resume in a background thread."""
     if language in _resume_cache or language in _resume_warming:
@@ -393,83 +410,50 @@ def _prewarm_resume(language: str) -> None:
     threading.Thread(target=_warm, daemon=True).start()
 
 
-_pending_downloads: set[str] = set()
-_prewarm_pending: set[str] = set()
-
-
-def _download_cache_key(language: str, compact: bool) -> str:
-    """Build the L2 cache key for a download variant."""
-    data = resume_dict_ru if language == "RUSSIAN" else resume_dict
-    key = make_cache_key(language, data)
-    if compact:
-        key += ":compact"
-    return key
+def _prewarm_downloads(variants: list[tuple[str, bool]]) -> None:
+    """Generate and store missing download variants in L2 cache (background threads).
 
+    All variants are checked against L2 with a single batched lookup, so a
+    render costs one cache round trip regardless of how many it pre-warms.
+    Variants already being generated (here or by a visitor) are not started twice.
+    """
+    keys = {
+        download_cache_key(language, compact): (language, compact)
+        for language, compact in variants
+    }
+    cached = get_many_cached(keys)
+    for cache_key, (language, compact) in keys.items():
+        if cache_key not in cached:
+            compute_in_background(cache_key, partial(_render_document, language, compact))
 
-def _prewarm_download(language: str, compact: bool) -> None:
-    """Generate and store a download variant in L2 cache (background thread)."""
-    cache_key = _download_cache_key(language, compact)
-    if cache_key in _prewarm_pending:
-        return
-    if get_cached(cache_key) is not None:
-        return
-    _prewarm_pending.add(cache_key)
 
-    def _generate():
-        try:
-            data = resume_dict_ru if language == "RUSSIAN" else resume_dict
-            resume = Resume.from_json(data)
-            gen_cls = HHRuPDFGenerator if language == "RUSSIAN" else InternationalDocxGenerator
-            buf = io.BytesIO()
-            gen_cls(resume, compact=compact).generate(buf)
-            buf.seek(0)
-            set_cached(cache_key, buf.getvalue())
-        finally:
-            _prewarm_pending.discard(cache_key)
-
-    threading.Thread(target=_generate, daemon=True).start()
+def _render_document(language: str, compact: bool) -> bytes:
+    """Generate a download variant from the parsed (module-cached) resume."""
+    return render_document(_load_resume(language), language, compact)
 
 
 def _ensure_image_downloaded(url: str) -> None:
     """Kick off a background download for a URL not yet in cache."""
-    if url in _pending_downloads:
-        return
-    _pending_downloads.add(url)
-
-    def _download():
-        try:
-            fetch_image_cached(url)
-        finally:
-            _pending_downloads.discard(url)
-
-    threading.Thread(target=_download, daemon=True).start()
+    fetch_image_in_background(url)
 
 
-@st.cache_data
 def _generate_download_bytes(language: str, compact: bool = True) -> bytes:
-    """Generate the downloadable document bytes, cached per (language, compact).
+    """Return the downloadable document bytes for (language, compact).
 
-    Checks L2 (Redis / local file) before generating; stores result in L2
-    after generation so it survives process restarts.
+    Deliberately not wrapped in ``@st.cache_data``: that pickles on store and
+    hands every rerun a fresh unpickled copy.  The L2 memory tier returns the
+    same immutable ``bytes`` object on every hit instead, so fragment reruns
+    pass ``st.download_button`` a reference, not a copy.
+
+    A stale L2 entry is served as-is while a background thread regenerates
+    it, and concurrent sessions (or a prewarm thread) missing on the same
+    variant share one generation.
     """
-    data = resume_dict_ru if language == "RUSSIAN" else resume_dict
-    cache_key = make_cache_key(language, data)
-    if compact:
-        cache_key += ":compact"
-
-    cached = get_cached(cache_key)
-    if cached is not None:
-        return cached
-
-    resume = _load_resume(language)
-    generator_cls = HHRuPDFGenerator if language == "RUSSIAN" else InternationalDocxGenerator
-    buf = io.BytesIO()
-    generator_cls(resume, compact=compact).generate(buf)
-    buf.seek(0)
-    result = buf.getvalue()
-
-    set_cached(cache_key, result)
-    return result
+    cache_key = download_cache_key(language, compact)
+    data = get_or_compute(cache_key, partial(_render_document, language, compact))
+    if data is None:
+        raise RuntimeError(f"Document generation returned nothing for {cache_key}")
+    return data
 
 
 # ---------------------------------------------------------------------------
@@ -685,8 +669,47 @@ def _render_download(language, L_):
         file_name=L_("Kriminetskii_Lead_Backend_2026_CV.docx"),
         mime="application/octet-stream",
     )
-    # Pre-warm the OTHER compact variant so the next toggle is instant
-    _prewarm_download(language, not compact)
+
+
+def _cache_stats_enabled() -> bool:
+    """Operator panel, shown only on deployments started with ``CACHE_STATS_PANEL=1``.
+
+    Deliberately not switchable from the URL: the app is public.
+    """
+    return os.environ.get("CACHE_STATS_PANEL") == "1"
+
+
+def _markdown_table(rows: list[dict]) -> str:
+    """Render a list of uniform dicts as a Markdown table (no Arrow dependency)."""
+    columns = list(dict.fromkeys(col for row in rows for col in row))
+    lines = ["| " + " | ".join(columns) + " |", "|" + "---|" * len(columns)]
+    lines += ["| " + " | ".join(str(row.get(col, "")) for col in columns) + " |" for row in rows]
+    return "\n".join(lines)
+
+
+def _render_cache_stats() -> None:
+    """Live cache counters and latency percentiles, per tier and namespace."""
+    stats = cache_stats()
+    with st.expander("Cache stats", expanded=False):
+        st.caption("L2 lookups served by tier")
+        st.markdown(_markdown_table([stats["served"]]))
+        counters = [
+            {"tier": tier, "namespace": ns, **events}
+            for tier, by_ns in stats["counters"].items()
+            for ns, events in by_ns.items()
+        ]
+        if counters:
+            st.caption("Counters")
+            st.markdown(_markdown_table(counters))
+        latency = [
+            {"tier": tier, "namespace": ns, "op": op, **summary}
+            for tier, by_ns in stats["latency"].items()
+            for ns, by_op in by_ns.items()
+            for op, summary in by_op.items()
+        ]
+        if latency:
+            st.caption("Latency (ms)")
+            st.markdown(_markdown_table(latency))
 
 
 def _render_page():
@@ -704,12 +727,10 @@ def _render_page():
     with open(css_file) as f:
         st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
 
-    profile_pic = Image.open(profile_pic_path)
-
     # --- Header ---
     col1, col2 = st.columns(2)
     with col1:
-        st.image(profile_pic, width=330)
+        st.image(prepared_image(profile_pic_path, 330), width=330)
         lang_col, _ = st.columns(2)
         with lang_col:
             st.button("русский/english", key="lang_ru", on_click=_switch_language)
@@ -753,19 +774,29 @@ def _render_page():
             col_logo, col_text, _, _ = st.columns(4, gap="small")
             with col_logo:
                 if edu.icon:
-                    img_bytes = Image.open(edu.icon)
-                    st.image(img_bytes, width=150, clamp=True, caption=f"{edu.website}")
+                    st.image(
+                        prepared_image(edu.icon, 150),
+                        width=150,
+                        clamp=True,
+                        caption=f"{edu.website}",
+                    )
             with col_text:
                 st.write(edu.degree)
                 st.write(f"{edu.year_start} - {edu.year_end}")
                 st.write(edu.university)
                 st.write(edu.programme)
 
-    # Pre-warm the OTHER language's resume + downloads in background
+    # Pre-warm the OTHER language's resume, plus every download variant not
+    # being served right now (so the next toggle or switch is instant)
     other_lang = "RUSSIAN" if language == "ENGLISH" else "ENGLISH"
     _prewarm_resume(other_lang)
-    _prewarm_download(other_lang, True)
-    _prewarm_download(other_lang, False)
+    compact = st.session_state.get("compact_cv", True)
+    _prewarm_downloads(
+        [(language, not compact), (other_lang, True), (other_lang, False)]
+    )
+
+    if _cache_stats_enabled():
+        _render_cache_stats()
 
 
 # ---------------------------------------------------------------------------
@@ -0,0 +1,53 @@
+"""Shared fixtures: an isolated module-level cache and the in-process Redis stand-in."""
+
+from __future__ import annotations
+
+from contextlib import ExitStack
+from typing import TYPE_CHECKING, Any
+
+import pytest
+
+from controller import cache
+from tests.helpers import make_cache
+from tests.redis_stub import RedisStub
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+    from pathlib import Path
+
+
+@pytest.fixture
+def isolated_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> cache.FallbackCache:
+    """Replace the module-level cache with a Redis-less one under *tmp_path*.
+
+    TTL jitter is off so tests can assert exact lifetimes.
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    fallback = make_cache(tmp_path / ".cache", ttl_jitter=0)
+    monkeypatch.setattr(cache, "_cache", fallback)
+    return fallback
+
+
+@pytest.fixture
+def start_redis(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[Callable[..., str]]:
+    """Start in-process Redis stand-ins and point ``REDIS_URL`` at the latest.
+
+    Keyword arguments go to :class:`RedisStub`, e.g.
+    ``start_redis(delays={b"GET": 0.1})``; it returns the stand-in's URL.
+    """
+    monkeypatch.chdir(tmp_path)
+    with ExitStack() as stack:
+
+        def start(**options: Any) -> str:
+            stub = stack.enter_context(RedisStub(**options))
+            monkeypatch.setenv("REDIS_URL", stub.url)
+            return stub.url
+
+        yield start
+
+
+@pytest.fixture
+def redis_url(start_redis: Callable[..., str]) -> str:
+    """Point ``REDIS_URL`` at a fresh in-process Redis stand-in."""
+    return start_redis()
@@ -0,0 +1,19 @@
+"""Helpers shared by the cache tests."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from controller import cache
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def make_cache(base_dir: Path, **kwargs: Any) -> cache.FallbackCache:
+    """A memory + local-file FallbackCache rooted at *base_dir* (Redis per ``REDIS_URL``)."""
+    return cache.FallbackCache(
+        memory=cache.MemoryCache(),
+        local=cache.LocalFileCache(base_dir=base_dir, janitor_interval=0),
+        **kwargs,
+    )
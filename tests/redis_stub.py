@@ -0,0 +1,192 @@
+"""Minimal in-process Redis server for tests and benchmarks.
+
+Speaks enough RESP over a real TCP socket for :class:`controller.cache.RedisCache`
+(``HELLO``, ``PING``, ``GET``, ``SET`` with ``EX``/``PX``/``NX``, ``PTTL``,
+``DEL``, ``INCR`` / ``INCRBY``, ``SUBSCRIBE`` / ``PUBLISH``), so benchmarks
+include socket, pooling and pipelining costs without needing a
+``redis-server`` binary.  Chosen commands can be slowed down to exercise
+latency budgets, and pub/sub can be turned off to exercise the polling
+fallback.  Not a Redis replacement: single keyspace, no persistence.  Every
+other command answers ``-ERR``, so code relying on one the stub lacks fails
+loudly instead of passing against a fake ``+OK``.
+"""
+
+from __future__ import annotations
+
+import socketserver
+import threading
+import time
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+
+class _Store:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.data: dict[bytes, tuple[bytes, float | None]] = {}
+        self.subscribers: dict[bytes, set[_Handler]] = {}
+
+    def live(self, key: bytes) -> tuple[bytes, float | None] | None:
+        item = self.data.get(key)
+        if item is not None and item[1] is not None and item[1] <= time.time():
+            del self.data[key]
+            return None
+        return item
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    store: _Store
+    delays: Mapping[bytes, float]
+    pubsub: bool
+    proto = 2
+    # Pipelined replies are written one by one; Nagle would hold them for the delayed ACK
+    disable_nagle_algorithm = True
+
+    @property
+    def _null(self) -> bytes:
+        return b"_\r\n" if self.proto == 3 else b"$-1\r\n"
+
+    def _bulk(self, value: bytes | None) -> bytes:
+        if value is None:
+            return self._null
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+
+    def setup(self) -> None:
+        super().setup()
+        # Publishers write to subscribed connections from their own threads
+        self.write_lock = threading.Lock()
+
+    def handle(self) -> None:
+        while True:
+            command = self._read_command()
+            if command is None:
+                return
+            self._send(self._execute(command))
+
+    def finish(self) -> None:
+        with self.store.lock:
+            for subscribers in self.store.subscribers.values():
+                subscribers.discard(self)
+        super().finish()
+
+    def _send(self, reply: bytes) -> None:
+        with self.write_lock:
+            self.wfile.write(reply)
+
+    def _push(self, *items: bytes | int) -> bytes:
+        parts = [b"%s%d\r\n" % (b">" if self.proto == 3 else b"*", len(items))]
+        for item in items:
+            parts.append(b":%d\r\n" % item if isinstance(item, int) else self._bulk(item))
+        return b"".join(parts)
+
+    def _read_command(self) -> list[bytes] | None:
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.split()
+        args = []
+        for _ in range(int(line[1:])):
+            size = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(size + 2)[:-2])
+        return args
+
+    def _execute(self, args: list[bytes]) -> bytes:
+        name = args[0].upper()
+        delay = self.delays.get(name)
+        if delay:
+            time.sleep(delay)
+        store = self.store
+        with store.lock:
+            if name == b"HELLO":
+                # Clients negotiating RESP3 expect a map echoing the protocol
+                self.proto = int(args[1]) if len(args) > 1 else 2
+                return b"%%1\r\n$5\r\nproto\r\n:%d\r\n" % self.proto
+            if name == b"PING":
+                return b"+PONG\r\n"
+            if name == b"GET":
+                item = store.live(args[1])
+                return self._bulk(item[0] if item else None)
+            if name == b"SET":
+                key, value, expires_at, nx = args[1], args[2], None, False
+                options = [arg.upper() for arg in args[3:]]
+                for i, option in enumerate(options):
+                    if option == b"EX":
+                        expires_at = time.time() + int(args[4 + i])
+                    elif option == b"PX":
+                        expires_at = time.time() + int(args[4 + i]) / 1000
+                    elif option == b"NX":
+                        nx = True
+                if nx and store.live(key) is not None:
+                    return self._null
+                store.data[key] = (value, expires_at)
+                return b"+OK\r\n"
+            if name == b"PTTL":
+                item = store.live(args[1])
+                if item is None:
+                    return b":-2\r\n"
+                if item[1] is None:
+                    return b":-1\r\n"
+                return b":%d\r\n" % int((item[1] - time.time()) * 1000)
+            if name == b"DEL":
+                removed = sum(store.data.pop(key, None) is not None for key in args[1:])
+                return b":%d\r\n" % removed
+            if name in (b"INCR", b"INCRBY"):
+                # redis-py sends INCR as INCRBY key 1
+                step = int(args[2]) if name == b"INCRBY" else 1
+                item = store.live(args[1])
+                count = int(item[0]) + step if item else step
+                store.data[args[1]] = (str(count).encode(), item[1] if item else None)
+                return b":%d\r\n" % count
+            if name in (b"SUBSCRIBE", b"PUBLISH") and not self.pubsub:
+                return b"-ERR pub/sub disabled on the stub\r\n"
+            if name == b"SUBSCRIBE":
+                replies = []
+                for channel in args[1:]:
+                    store.subscribers.setdefault(channel, set()).add(self)
+                    count = sum(self in subs for subs in store.subscribers.values())
+                    replies.append(self._push(b"subscribe", channel, count))
+                return b"".join(replies)
+            if name == b"PUBLISH":
+                receivers = list(store.subscribers.get(args[1], ()))
+                for receiver in receivers:
+                    try:
+                        receiver._send(receiver._push(b"message", args[1], args[2]))
+                    except OSError:
+                        store.subscribers[args[1]].discard(receiver)
+                return b":%d\r\n" % len(receivers)
+        return b"-ERR unknown command '%s'\r\n" % name
+
+
+class RedisStub:
+    """Serve the stub on ``127.0.0.1`` in a daemon thread; use as a context manager.
+
+    Args:
+        delays: Seconds to sleep before answering, by upper-case command name
+            (e.g. ``{b"GET": 0.1}``).
+        pubsub: When *False*, ``SUBSCRIBE`` and ``PUBLISH`` fail.
+    """
+
+    def __init__(self, delays: Mapping[bytes, float] | None = None, pubsub: bool = True) -> None:
+        handler = type(
+            "Handler",
+            (_Handler,),
+            {"store": _Store(), "delays": dict(delays or {}), "pubsub": pubsub},
+        )
+        self._server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), handler)
+        self._server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"redis://{host!s}:{port}/0"
+
+    def __enter__(self) -> RedisStub:
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._server.shutdown()
+        self._server.server_close()
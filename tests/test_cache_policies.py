@@ -0,0 +1,92 @@
+"""CachePolicies.from_env: overrides are coerced and validated, bad ones ignored."""
+
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING, Any
+
+import pytest
+
+from controller.cache import _BUILTIN_POLICIES, CachePolicies, CachePolicy
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def _from_env(monkeypatch: pytest.MonkeyPatch, overrides: Any) -> CachePolicies:
+    monkeypatch.delenv("CACHE_POLICY_FILE", raising=False)
+    raw = overrides if isinstance(overrides, str) else json.dumps(overrides)
+    monkeypatch.setenv("CACHE_POLICIES", raw)
+    return CachePolicies.from_env()
+
+
+def _is_builtin(policies: CachePolicies) -> bool:
+    return policies.default == CachePolicy() and policies.namespaces() == _BUILTIN_POLICIES
+
+
+def test_numeric_strings_are_coerced(monkeypatch: pytest.MonkeyPatch) -> None:
+    policies = _from_env(monkeypatch, {"image": {"ttl_seconds": "3600", "max_entry_bytes": "1024"}})
+
+    image = policies.for_key("image:abc")
+    assert image.ttl_seconds == 3600.0
+    assert isinstance(image.ttl_seconds, float)
+    assert image.max_entry_bytes == 1024
+    assert isinstance(image.max_entry_bytes, int)
+    # Fields left out keep their built-in values
+    assert image.max_stale_seconds == _BUILTIN_POLICIES["image"].max_stale_seconds
+
+
+def test_default_override_applies_to_unlisted_namespaces(monkeypatch: pytest.MonkeyPatch) -> None:
+    policies = _from_env(
+        monkeypatch,
+        {"default": {"max_stale_seconds": 0}, "report": {"codec": "lzma"}},
+    )
+
+    assert policies.for_key("resume_report:abc").max_stale_seconds == 0
+    assert policies.for_key("report:abc") == CachePolicy(max_stale_seconds=0, codec="lzma")
+
+
+@pytest.mark.parametrize(
+    "overrides",
+    [
+        pytest.param({"image": {"ttl_secs": 60}}, id="unknown field"),
+        pytest.param({"image": {"codec": "brotli"}}, id="unknown codec"),
+        pytest.param({"image": {"codec": 1}}, id="codec not a string"),
+        pytest.param({"image": {"ttl_seconds": -1}}, id="negative"),
+        pytest.param({"default": {"max_stale_seconds": "-5"}}, id="negative string"),
+        pytest.param('{"image": {"ttl_seconds": Infinity}}', id="infinite"),
+        pytest.param({"image": {"ttl_seconds": "nan"}}, id="not a number"),
+        pytest.param({"image": {"ttl_seconds": "an hour"}}, id="non-numeric string"),
+        pytest.param({"image": {"ttl_seconds": True}}, id="bool"),
+        pytest.param({"image": {"ttl_seconds": [60]}}, id="list"),
+        pytest.param({"image": {"max_entry_bytes": "1.5"}}, id="fractional byte count"),
+        pytest.param({"image": 60}, id="policy not an object"),
+        pytest.param([1, 2], id="not an object"),
+        pytest.param("{not json", id="not JSON"),
+    ],
+)
+def test_invalid_overrides_fall_back_to_builtins(
+    monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture, overrides: Any
+) -> None:
+    policies = _from_env(monkeypatch, overrides)
+
+    assert _is_builtin(policies)
+    assert "Invalid cache policies" in caplog.text
+
+
+def test_policy_file(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    path = tmp_path / "policies.json"
+    path.write_text(json.dumps({"image": {"ttl_seconds": 60}}))
+    monkeypatch.delenv("CACHE_POLICIES", raising=False)
+    monkeypatch.setenv("CACHE_POLICY_FILE", str(path))
+
+    assert CachePolicies.from_env().for_key("image:abc").ttl_seconds == 60
+
+
+def test_unreadable_policy_file_uses_builtins(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    monkeypatch.delenv("CACHE_POLICIES", raising=False)
+    monkeypatch.setenv("CACHE_POLICY_FILE", str(tmp_path / "missing.json"))
+
+    assert _is_builtin(CachePolicies.from_env())
@@ -0,0 +1,94 @@
+"""CircuitBreaker state machine, driven by a fake clock."""
+
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+
+from controller.cache import CircuitBreaker
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> _Clock:
+    return _Clock()
+
+
+def _breaker(clock: _Clock, **kwargs: Any) -> CircuitBreaker:
+    return CircuitBreaker("test", reset_seconds=5, max_reset_seconds=20, clock=clock, **kwargs)
+
+
+def test_opens_after_consecutive_failures(clock: _Clock) -> None:
+    breaker = _breaker(clock, failure_threshold=3)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_success_resets_the_consecutive_count(clock: _Clock) -> None:
+    breaker = _breaker(clock, failure_threshold=3, window=100)
+    for _ in range(5):
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_opens_on_error_rate_over_half_a_window(clock: _Clock) -> None:
+    breaker = _breaker(clock, failure_threshold=100, window=10, error_rate=0.5)
+    for _ in range(2):
+        breaker.record_success()
+        breaker.record_failure()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_half_open_admits_a_single_probe(clock: _Clock) -> None:
+    breaker = _breaker(clock)
+    breaker.trip()
+    clock.now = 4.9
+    assert not breaker.allow()
+
+    clock.now = 5.0
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_failed_probe_doubles_the_cooldown_up_to_the_cap(clock: _Clock) -> None:
+    breaker = _breaker(clock)
+    breaker.trip()
+    for cooldown in (5, 10, 20, 20):
+        clock.now += cooldown - 0.1
+        assert not breaker.allow()
+        clock.now += 0.1
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_released_probe_lets_the_next_caller_probe(clock: _Clock) -> None:
+    breaker = _breaker(clock)
+    breaker.trip()
+    clock.now = 5
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.allow()
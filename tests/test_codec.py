@@ -0,0 +1,109 @@
+"""BlobCodec and DeltaFrame: round trips, pass-through and legacy blobs."""
+
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING
+
+import pytest
+
+from controller.cache import BlobCodec, DeltaFrame, FallbackCache, LocalFileCache, MemoryCache
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+_COMPRESSIBLE = b"resume " * 4096
+_VALUES = {
+    "empty": b"",
+    "small": b"tiny",
+    "compressible": _COMPRESSIBLE,
+    "incompressible": os.urandom(8192),
+    "png": b"\x89PNG\r\n\x1a\n" + _COMPRESSIBLE,
+    "codec magic, small": BlobCodec.MAGIC + b"\x01x",
+    "codec magic, compressible": BlobCodec.MAGIC + b"\x01" + _COMPRESSIBLE,
+    "frame magic, small": DeltaFrame.MAGIC + b"x",
+    "frame magic, compressible": DeltaFrame.MAGIC + _COMPRESSIBLE,
+    "both magics": DeltaFrame.MAGIC + BlobCodec.MAGIC + b"\x02x",
+}
+
+
+@pytest.mark.parametrize("codec", ["identity", "zlib", "lzma"])
+@pytest.mark.parametrize("value", _VALUES.values(), ids=_VALUES.keys())
+def test_codec_round_trip(codec: str, value: bytes) -> None:
+    blob_codec = BlobCodec(codec)
+    assert blob_codec.decode(blob_codec.encode(value)) == value
+
+
+@pytest.mark.parametrize("delta", [0.0, 0.25, 12.5])
+@pytest.mark.parametrize("value", _VALUES.values(), ids=_VALUES.keys())
+def test_frame_round_trip(delta: float, value: bytes) -> None:
+    framed = DeltaFrame.wrap(value, delta)
+
+    blob, unwrapped_delta = DeltaFrame.unwrap(framed)
+    assert blob == value
+    assert unwrapped_delta == pytest.approx(delta)
+    assert DeltaFrame.unwrap_view(memoryview(framed)) == value
+
+
+@pytest.mark.parametrize("codec", ["zlib", "lzma"])
+def test_compressible_values_are_compressed(codec: str) -> None:
+    encoded = BlobCodec(codec).encode(_COMPRESSIBLE)
+
+    assert BlobCodec.is_encoded(encoded)
+    assert len(encoded) < len(_COMPRESSIBLE) // 10
+
+
+@pytest.mark.parametrize("name", ["small", "incompressible", "png"])
+def test_values_not_worth_compressing_are_stored_as_is(name: str) -> None:
+    value = _VALUES[name]
+    assert BlobCodec("zlib").encode(value) == value
+
+
+def test_unknown_delta_is_not_framed() -> None:
+    assert DeltaFrame.wrap(b"value", 0.0) == b"value"
+
+
+@pytest.mark.parametrize("legacy", [b"", b"plain", _COMPRESSIBLE, b"\x00RC", b"\x00RCX payload"])
+def test_legacy_unframed_uncompressed_blobs_decode_unchanged(legacy: bytes) -> None:
+    assert BlobCodec("zlib").decode(legacy) == legacy
+    assert DeltaFrame.unwrap(legacy) == (legacy, 0.0)
+
+
+def test_legacy_local_entries_read_back_through_the_cache(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    local = LocalFileCache(base_dir=tmp_path, janitor_interval=0)
+    local.set("resume_report:legacy", _COMPRESSIBLE)  # written before codecs and frames
+    fallback = FallbackCache(memory=MemoryCache(), codec=BlobCodec("zlib"), local=local)
+
+    assert fallback.get("resume_report:legacy") == _COMPRESSIBLE
+    view = FallbackCache(codec=BlobCodec("zlib"), local=local).get_view("resume_report:legacy")
+    assert view is not None
+    assert view.as_bytes() == _COMPRESSIBLE
+
+
+@pytest.mark.parametrize("value", _VALUES.values(), ids=_VALUES.keys())
+def test_values_round_trip_through_the_local_tier(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, value: bytes
+) -> None:
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    local = LocalFileCache(base_dir=tmp_path, janitor_interval=0)
+    FallbackCache(codec=BlobCodec("zlib"), local=local).set("resume_report:k", value, delta=1.5)
+
+    # A cache without a memory tier has to decode what is on disk
+    reader = FallbackCache(codec=BlobCodec("zlib"), local=local)
+    entry = reader.get_entry("resume_report:k")
+    assert entry is not None
+    assert entry.value == value
+    assert entry.delta == pytest.approx(1.5)
+    view = reader.get_view("resume_report:k")
+    assert view is not None
+    assert view.as_bytes() == value
+
+
+def test_unknown_codec_is_rejected() -> None:
+    with pytest.raises(ValueError, match="Unknown codec"):
+        BlobCodec("brotli")
+    with pytest.raises(ValueError, match="Unknown codec id"):
+        BlobCodec("zlib").decode(BlobCodec.MAGIC + b"\xfe" + b"payload")
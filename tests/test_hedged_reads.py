@@ -0,0 +1,81 @@
+"""Hedged L2 reads: a slow Redis costs the read budget, never a regeneration."""
+
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING
+
+import pytest
+
+from tests.helpers import make_cache
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
+    from controller import cache
+
+_BUDGET = 0.05
+_REDIS_GET_SECONDS = 0.3
+
+
+@pytest.fixture
+def slow_redis(start_redis: Callable[..., str]) -> str:
+    return start_redis(delays={b"GET": _REDIS_GET_SECONDS})
+
+
+def _replicas(tmp_path: Path) -> tuple[cache.FallbackCache, cache.FallbackCache]:
+    """A writer, and a reader that can only find the writer's values in Redis."""
+    writer = make_cache(tmp_path / "a")
+    reader = make_cache(tmp_path / "b", read_budget_seconds=_BUDGET)
+    reader._redis.get("warm-up")  # connect before timing
+    return writer, reader
+
+
+def test_budgeted_read_returns_within_the_budget(tmp_path: Path, slow_redis: str) -> None:
+    writer, reader = _replicas(tmp_path)
+    writer.set("k", b"value")
+
+    started = time.monotonic()
+    assert reader.get("k") is None
+    assert time.monotonic() - started < _REDIS_GET_SECONDS / 2
+
+
+def test_local_hit_is_served_while_redis_is_slow(tmp_path: Path, slow_redis: str) -> None:
+    _writer, reader = _replicas(tmp_path)
+    reader._local.set("k", reader._encode("k", b"value", 0.0))
+
+    started = time.monotonic()
+    assert reader.get("k") == b"value"
+    assert time.monotonic() - started < _REDIS_GET_SECONDS / 2
+
+
+def test_get_or_compute_does_not_regenerate_what_redis_holds(
+    tmp_path: Path, slow_redis: str
+) -> None:
+    writer, reader = _replicas(tmp_path)
+    writer.set("k", b"value")
+    calls: list[int] = []
+
+    def generate() -> bytes:
+        calls.append(1)
+        return b"regenerated"
+
+    assert reader.get_or_compute("k", generate) == b"value"
+    assert calls == []
+
+
+def test_background_compute_does_not_regenerate_what_redis_holds(
+    tmp_path: Path, slow_redis: str
+) -> None:
+    writer, reader = _replicas(tmp_path)
+    writer.set("k", b"value")
+    calls: list[int] = []
+
+    def generate() -> bytes:
+        calls.append(1)
+        return b"regenerated"
+
+    assert reader.compute_in_background("k", generate)
+    assert reader.get_or_compute("k", generate) == b"value"
+    assert calls == []
@@ -0,0 +1,157 @@
+"""Image downloads against a local ``http.server``: validators, 304s and failure backoff."""
+
+from __future__ import annotations
+
+import http.server
+import threading
+import time
+from typing import TYPE_CHECKING
+
+import pytest
+
+from controller import cache
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+_BODY = b"\x89PNG fake image bytes"
+
+
+class _Upstream(http.server.ThreadingHTTPServer):
+    """Serves scripted responses per path and records the request headers."""
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.responses: dict[str, list[tuple[int, dict[str, str], bytes]]] = {}
+        self.requests: list[tuple[str, dict[str, str]]] = []
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}{path}"
+
+    def script(self, path: str, *responses: tuple[int, dict[str, str], bytes]) -> str:
+        self.responses[path] = list(responses)
+        return self.url(path)
+
+    def hits(self, path: str) -> list[dict[str, str]]:
+        return [headers for requested, headers in self.requests if requested == path]
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    server: _Upstream
+
+    def do_GET(self) -> None:
+        self.server.requests.append((self.path, dict(self.headers)))
+        queue = self.server.responses[self.path]
+        status, headers, body = queue.pop(0) if len(queue) > 1 else queue[0]
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+@pytest.fixture
+def upstream() -> Iterator[_Upstream]:
+    server = _Upstream()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _refresh(url: str) -> cache.CacheEntry:
+    """Run the revalidation a stale lookup would start, on this thread."""
+    key = cache._image_cache_key(url)
+    entry = cache._fetch_image(url, key)
+    cache._cache.set(key, entry.value, entry.remaining_ttl())
+    return entry
+
+
+@pytest.mark.usefixtures("isolated_cache")
+def test_200_stores_body_and_honours_max_age(upstream: _Upstream) -> None:
+    url = upstream.script("/logo.png", (200, {"Cache-Control": "max-age=600"}, _BODY))
+
+    assert cache.fetch_image_cached(url) == _BODY
+    entry = cache._cache.get_entry(cache._image_cache_key(url))
+    assert entry is not None
+    assert entry.remaining_ttl() == pytest.approx(600, abs=5)
+    # Served from the cache afterwards
+    assert cache.fetch_image_cached(url) == _BODY
+    assert len(upstream.hits("/logo.png")) == 1
+
+
+@pytest.mark.usefixtures("isolated_cache")
+def test_304_keeps_cached_body_without_transfer(upstream: _Upstream) -> None:
+    url = upstream.script(
+        "/logo.png",
+        (200, {"ETag": '"v1"', "Last-Modified": "Mon, 06 Jan 2025 10:00:00 GMT"}, _BODY),
+        (304, {"ETag": '"v1"', "Cache-Control": "max-age=900"}, b""),
+    )
+    assert cache.fetch_image_cached(url) == _BODY
+
+    entry = _refresh(url)
+
+    conditional = upstream.hits("/logo.png")[1]
+    assert conditional["If-None-Match"] == '"v1"'
+    assert conditional["If-Modified-Since"] == "Mon, 06 Jan 2025 10:00:00 GMT"
+    assert entry.value == _BODY
+    assert entry.remaining_ttl() == pytest.approx(900, abs=5)
+
+
+@pytest.mark.usefixtures("isolated_cache")
+def test_changed_image_replaces_cached_body(upstream: _Upstream) -> None:
+    url = upstream.script(
+        "/logo.png", (200, {"ETag": '"v1"'}, _BODY), (200, {"ETag": '"v2"'}, b"new bytes")
+    )
+    cache.fetch_image_cached(url)
+
+    assert _refresh(url).value == b"new bytes"
+    assert cache.get_image_from_cache(url) == b"new bytes"
+
+
+@pytest.mark.usefixtures("isolated_cache")
+def test_404_is_cached_as_a_permanent_failure(upstream: _Upstream) -> None:
+    url = upstream.script("/gone.png", (404, {}, b"not found"))
+
+    assert cache.fetch_image_cached(url) is None
+    lookup = cache.lookup_image(url)
+    assert lookup.status == "failed"
+    assert lookup.failure is not None
+    assert lookup.failure.permanent
+    assert lookup.failure.attempts == 1
+    # The failure record answers further lookups without another request
+    assert cache.fetch_image_cached(url) is None
+    assert len(upstream.hits("/gone.png")) == 1
+
+
+@pytest.mark.usefixtures("isolated_cache")
+def test_failure_backoff_doubles_per_attempt(upstream: _Upstream) -> None:
+    url = upstream.script("/flaky.png", (500, {}, b"oops"))
+    cache.fetch_image_cached(url)
+
+    ttls = [_refresh(url).remaining_ttl() for _ in range(3)]
+
+    failure = cache.lookup_image(url).failure
+    assert failure is not None
+    assert failure.attempts == 4
+    assert not failure.permanent
+    base = cache._policies.for_key("image:x").negative_ttl_seconds
+    assert ttls == pytest.approx([base * 2, base * 4, base * 8], abs=2)
+
+
+def test_backoff_is_capped() -> None:
+    failure = cache.FailedFetch("HTTPError", attempts=30, failed_at=time.time(), permanent=True)
+    assert failure.backoff_seconds() == cache._NEGATIVE_MAX_TTL_SECONDS
+
+
+@pytest.mark.usefixtures("isolated_cache")
+def test_failed_refresh_keeps_cached_image(upstream: _Upstream) -> None:
+    url = upstream.script("/logo.png", (200, {"ETag": '"v1"'}, _BODY), (503, {}, b""))
+    cache.fetch_image_cached(url)
+
+    assert _refresh(url).value == _BODY
+    assert cache.lookup_image(url).status == "hit"
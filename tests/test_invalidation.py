@@ -0,0 +1,177 @@
+"""InvalidationBus: invalidations reach other processes through Redis."""
+
+from __future__ import annotations
+
+import sqlite3
+import time
+from typing import TYPE_CHECKING, Any
+
+from controller import cache
+from tests.helpers import make_cache
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
+    import pytest
+
+
+def _listening(fallback: cache.FallbackCache, poll_seconds: float = 0.05) -> cache.FallbackCache:
+    fallback._bus._poll_seconds = poll_seconds
+    fallback._redis.get("warm-up")  # connected: the listener subscribes at once
+    fallback._bus.ensure_listening()
+    time.sleep(0.2)  # let the listener subscribe and take its baseline
+    return fallback
+
+
+def _pubsub_only(fallback: cache.FallbackCache) -> cache.FallbackCache:
+    """Listen with log polling out of the way, so only the channel delivers."""
+    return _listening(fallback, poll_seconds=60)
+
+
+def _eventually(condition: Callable[[], bool], timeout: float = 5) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return condition()
+
+
+def test_invalidate_key_evicts_other_replicas(tmp_path: Path, redis_url: str) -> None:
+    writer = make_cache(tmp_path / "a")
+    reader = _listening(make_cache(tmp_path / "b"))
+    seen: list[tuple[str, str]] = []
+    reader.add_invalidation_listener("test", lambda kind, name: seen.append((kind, name)))
+    reader.set("k", b"value")
+    assert reader.get("k") == b"value"
+
+    writer.invalidate_key("k")
+
+    assert _eventually(lambda: reader.get("k") is None)
+    assert _eventually(lambda: ("key", "k") in seen)
+
+
+def test_invalidate_tag_moves_other_replicas_to_new_keys(tmp_path: Path, redis_url: str) -> None:
+    writer = make_cache(tmp_path / "a")
+    reader = _listening(make_cache(tmp_path / "b"))
+    old_key = reader.tag_key("img:x", ["language:EN"])
+    reader.set(old_key, b"value")
+
+    writer.invalidate_tag("language:EN")
+
+    assert _eventually(lambda: reader.tag_key("img:x", ["language:EN"]) != old_key)
+    # Old-generation keys stay in Redis until they expire; local copies go now
+    assert _eventually(lambda: reader._memory is not None and reader._memory.get(old_key) is None)
+
+
+def test_listener_registration_replaces_by_name(tmp_path: Path, redis_url: str) -> None:
+    fallback = make_cache(tmp_path)
+    seen: list[str] = []
+    fallback.add_invalidation_listener("test", lambda kind, name: seen.append("first"))
+    fallback.add_invalidation_listener("test", lambda kind, name: seen.append("second"))
+
+    fallback.invalidate_key("k")
+
+    assert seen == ["second"]
+
+
+def test_channel_delivers_without_polling(tmp_path: Path, redis_url: str) -> None:
+    writer = make_cache(tmp_path / "a")
+    reader = _pubsub_only(make_cache(tmp_path / "b"))
+    reader.set("k", b"value")
+
+    writer.invalidate_key("k")
+
+    assert _eventually(lambda: reader._memory is not None and reader._memory.get("k") is None)
+
+
+def test_log_polling_covers_missing_pubsub(tmp_path: Path, start_redis: Callable[..., str]) -> None:
+    start_redis(pubsub=False)
+    writer = make_cache(tmp_path / "a")
+    reader = _listening(make_cache(tmp_path / "b"))
+    reader.set("k", b"value")
+
+    writer.invalidate_key("k")
+
+    assert _eventually(lambda: reader._memory is not None and reader._memory.get("k") is None)
+
+
+def test_malformed_messages_do_not_stop_the_listener(tmp_path: Path, redis_url: str) -> None:
+    writer = make_cache(tmp_path / "a")
+    reader = _pubsub_only(make_cache(tmp_path / "b"))
+    seen: list[tuple[str, str]] = []
+    reader.add_invalidation_listener("test", lambda kind, name: seen.append((kind, name)))
+    client = writer._redis._connect()
+    assert client is not None
+    for payload in (
+        b"not json",
+        b"[1, 2]",
+        b'{"key": "no-seq"}',
+        b'{"seq": 900001}',
+        b'{"seq": 900002, "key": 7}',
+        b'{"seq": 900003, "tag": "t", "generation": "x"}',
+    ):
+        client.publish("cacheinval", payload)
+
+    writer.invalidate_key("k")
+
+    assert _eventually(lambda: ("key", "k") in seen)
+    assert seen == [("key", "k")]
+    assert reader._bus._worker is not None and reader._bus._worker.is_alive()
+
+
+def test_failed_apply_is_retried_from_the_log(
+    tmp_path: Path, redis_url: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    writer = make_cache(tmp_path / "a")
+    reader = _listening(make_cache(tmp_path / "b"))
+    seen: list[tuple[str, str]] = []
+    reader.add_invalidation_listener("test", lambda kind, name: seen.append((kind, name)))
+    attempts: list[str] = []
+    delete = reader._local.delete
+
+    def flaky_delete(key: str) -> None:
+        attempts.append(key)
+        if len(attempts) == 1:
+            raise OSError("disk went away")
+        delete(key)
+
+    monkeypatch.setattr(reader._local, "delete", flaky_delete)
+
+    writer.invalidate_key("k")
+
+    assert _eventually(lambda: seen == [("key", "k")])
+    time.sleep(0.2)  # a few more polls: applied once, not again
+    assert seen == [("key", "k")]
+    assert len(attempts) == 2
+    assert reader._bus._worker is not None and reader._bus._worker.is_alive()
+
+
+def test_locked_sqlite_tier_does_not_stop_the_listener(
+    tmp_path: Path, redis_url: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    connect = sqlite3.connect
+
+    def impatient_connect(*args: Any, **kwargs: Any) -> sqlite3.Connection:
+        # Give up on a lock in 50 ms rather than 5 s
+        conn: sqlite3.Connection = connect(*args, **{**kwargs, "timeout": 0.05})
+        return conn
+
+    monkeypatch.setattr(sqlite3, "connect", impatient_connect)
+    writer = make_cache(tmp_path / "a")
+    local = cache.SQLiteCache(path=tmp_path / "b.sqlite3", janitor_interval=0)
+    reader = _pubsub_only(cache.FallbackCache(memory=cache.MemoryCache(), local=local))
+    seen: list[tuple[str, str]] = []
+    reader.add_invalidation_listener("test", lambda kind, name: seen.append((kind, name)))
+    local.set("k1", b"value")
+    blocker = connect(tmp_path / "b.sqlite3", isolation_level=None)
+    blocker.execute("BEGIN EXCLUSIVE")
+    try:
+        writer.invalidate_key("k1")
+        writer.invalidate_key("k2")
+
+        assert _eventually(lambda: seen == [("key", "k1"), ("key", "k2")])
+    finally:
+        blocker.rollback()
+        blocker.close()
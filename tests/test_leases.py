@@ -0,0 +1,92 @@
+"""Redis leases: one generation across replicas, released once the value is stored."""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import TYPE_CHECKING
+
+from controller import cache
+from tests.helpers import make_cache
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
+
+def test_replicas_share_one_generation(tmp_path: Path, redis_url: str) -> None:
+    replicas = [make_cache(tmp_path / str(i), write_behind=True) for i in range(4)]
+    calls: list[int] = []
+    lock = threading.Lock()
+
+    def generate() -> bytes:
+        with lock:
+            calls.append(1)
+        time.sleep(0.3)
+        return b"value"
+
+    results: list[bytes | None] = []
+    threads = [
+        threading.Thread(target=lambda c=c: results.append(c.get_or_compute("k", generate)))
+        for c in replicas
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert results == [b"value"] * 4
+    assert len(calls) == 1
+
+
+def test_lease_is_released_after_storing(tmp_path: Path, redis_url: str) -> None:
+    fallback = make_cache(tmp_path, write_behind=True)
+    assert fallback.get_or_compute("k", lambda: b"value") == b"value"
+
+    assert fallback.flush_writes(5)
+    assert fallback._redis.lease_holder(cache._LEASE_PREFIX + "k") is None
+
+
+def test_holder_does_not_wait_on_redis_writes(
+    tmp_path: Path, start_redis: Callable[..., str]
+) -> None:
+    start_redis(delays={b"SET": 0.5})
+    holder = make_cache(tmp_path, write_behind=True)
+    lease = cache._LEASE_PREFIX + "k"
+    holder._redis.get("warm-up")  # connect before timing
+
+    started = time.monotonic()
+    assert holder.get_or_compute("k", lambda: b"value") == b"value"
+    # One slow SET (NX) takes the lease; the value's SET is the worker's
+    assert time.monotonic() - started < 0.9
+
+    # Waiting replicas poll Redis, so the lease stays until the value is there
+    assert holder._redis.lease_holder(lease) is not None
+    assert holder.flush_writes(5)
+    assert holder._redis.get("k") is not None
+    assert holder._redis.lease_holder(lease) is None
+
+
+def test_lease_is_released_without_write_behind(tmp_path: Path, redis_url: str) -> None:
+    fallback = make_cache(tmp_path)
+    assert fallback.get_or_compute("k", lambda: b"value") == b"value"
+    assert fallback._redis.lease_holder(cache._LEASE_PREFIX + "k") is None
+
+
+def test_lease_is_released_when_nothing_is_stored(tmp_path: Path, redis_url: str) -> None:
+    fallback = make_cache(tmp_path, write_behind=True)
+    assert fallback.get_or_compute("k", lambda: None) is None
+
+    started = time.monotonic()
+    assert fallback.get_or_compute("k", lambda: b"value") == b"value"
+    assert time.monotonic() - started < 1
+
+
+def test_recompute_after_invalidate_does_not_wait(tmp_path: Path, redis_url: str) -> None:
+    fallback = make_cache(tmp_path, write_behind=True)
+    fallback.get_or_compute("k", lambda: b"old")
+    fallback.invalidate_key("k")
+
+    started = time.monotonic()
+    assert fallback.get_or_compute("k", lambda: b"new") == b"new"
+    assert time.monotonic() - started < 1
@@ -0,0 +1,313 @@
+"""Local tier backends (files and SQLite): atomic writes, stale window, byte budget, sweep and re-arm."""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from functools import partial
+from typing import TYPE_CHECKING, Any
+
+import pytest
+
+from controller import cache
+from controller.cache import LocalFileCache, SQLiteCache
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
+    MakeBackend = Callable[..., LocalFileCache | SQLiteCache]
+
+# Values of this size fit three to a budget of _BUDGET bytes, header included
+_VALUE_BYTES = 1000
+_BUDGET = 3500
+_MAX_STALE = 60
+
+
+def _file_backend(tmp_path: Path, **kwargs: Any) -> LocalFileCache:
+    return LocalFileCache(
+        base_dir=tmp_path / "files", janitor_interval=0, max_stale_seconds=_MAX_STALE, **kwargs
+    )
+
+
+def _sqlite_backend(tmp_path: Path, **kwargs: Any) -> SQLiteCache:
+    return SQLiteCache(
+        path=tmp_path / "cache.sqlite3", janitor_interval=0, max_stale_seconds=_MAX_STALE, **kwargs
+    )
+
+
+_BACKENDS: dict[str, MakeBackend] = {"file": _file_backend, "sqlite": _sqlite_backend}
+
+
+@pytest.fixture(params=sorted(_BACKENDS))
+def make_backend(request: pytest.FixtureRequest, tmp_path: Path) -> MakeBackend:
+    """Factory for the backend under test; every call shares *tmp_path*."""
+    return partial(_BACKENDS[request.param], tmp_path)
+
+
+def _value(tag: bytes) -> bytes:
+    return tag * _VALUE_BYTES
+
+
+def test_round_trip_with_ttl(make_backend: MakeBackend) -> None:
+    backend = make_backend()
+    backend.set("ns:k", b"value", ttl_seconds=100)
+
+    entry = backend.get_entry("ns:k")
+    assert entry is not None
+    assert entry.value == b"value"
+    assert entry.expires_at == pytest.approx(time.time() + 100, abs=5)
+    assert backend.get("ns:k") == b"value"
+    assert backend.get("ns:other") is None
+
+
+def test_stale_entries_are_served_within_the_stale_window(make_backend: MakeBackend) -> None:
+    backend = make_backend()
+    backend.set("ns:stale", b"value", ttl_seconds=-1)
+    backend.set("ns:gone", b"value", ttl_seconds=-2 * _MAX_STALE)
+
+    entry = backend.get_entry("ns:stale")
+    assert entry is not None and entry.stale
+    assert backend.get("ns:stale") is None  # plain get only returns fresh values
+    assert backend.get_entry("ns:gone") is None
+
+
+def test_overwrite_replaces_value(make_backend: MakeBackend) -> None:
+    backend = make_backend()
+    backend.set("ns:k", b"old")
+    backend.set("ns:k", b"new")
+
+    assert backend.get("ns:k") == b"new"
+
+
+def test_delete(make_backend: MakeBackend) -> None:
+    backend = make_backend()
+    backend.set("ns:k", b"value")
+    backend.delete("ns:k")
+    backend.delete("ns:missing")
+
+    assert backend.get_entry("ns:k") is None
+
+
+def test_concurrent_readers_never_see_a_torn_value(make_backend: MakeBackend) -> None:
+    backend = make_backend()
+    values = (b"a" * 512 * 1024, b"b" * 512 * 1024)
+    backend.set("ns:k", values[0])
+    stop = threading.Event()
+    seen: list[bytes | None] = []
+
+    def read() -> None:
+        while not stop.is_set():
+            seen.append(backend.get("ns:k"))
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    try:
+        for i in range(40):
+            backend.set("ns:k", values[i % 2])
+    finally:
+        stop.set()
+        reader.join(10)
+
+    assert seen
+    assert all(value in values for value in seen)
+
+
+def test_lru_eviction_keeps_recently_read_entries(make_backend: MakeBackend) -> None:
+    backend = make_backend(max_bytes=_BUDGET)
+    for name in (b"a", b"b", b"c"):
+        backend.set(f"ns:{name.decode()}", _value(name))
+    assert backend.get("ns:a") is not None
+
+    backend.set("ns:d", _value(b"d"))
+
+    assert backend.get("ns:b") is None
+    assert {key: backend.get(key) is not None for key in ("ns:a", "ns:c", "ns:d")} == {
+        "ns:a": True,
+        "ns:c": True,
+        "ns:d": True,
+    }
+    assert backend.evictions == 1
+
+
+def test_entry_just_written_is_never_evicted(make_backend: MakeBackend) -> None:
+    backend = make_backend(max_bytes=_VALUE_BYTES // 2)
+    backend.set("ns:big", _value(b"x"))
+
+    assert backend.get("ns:big") == _value(b"x")
+
+
+def test_sweep_removes_entries_past_the_stale_window(make_backend: MakeBackend) -> None:
+    backend = make_backend()
+    backend.set("ns:fresh", b"value")
+    backend.set("ns:stale", b"value", ttl_seconds=-1)
+    backend.set("ns:gone", b"value", ttl_seconds=-2 * _MAX_STALE)
+
+    assert backend.sweep() == 1
+    assert backend.get("ns:fresh") == b"value"
+    assert backend.get_entry("ns:stale") is not None
+
+
+def test_rearm_extends_only_an_identical_payload(make_backend: MakeBackend) -> None:
+    backend = make_backend()
+    backend.set("ns:k", b"payload", ttl_seconds=-1)
+
+    assert not backend.rearm("ns:k", b"payloaD", ttl_seconds=100)  # same length
+    assert not backend.rearm("ns:k", b"payload!", ttl_seconds=100)
+    assert not backend.rearm("ns:missing", b"payload", ttl_seconds=100)
+    entry = backend.get_entry("ns:k")
+    assert entry is not None and entry.stale
+
+    assert backend.rearm("ns:k", b"payload", ttl_seconds=100)
+    entry = backend.get_entry("ns:k")
+    assert entry is not None
+    assert not entry.stale
+    assert entry.value == b"payload"
+
+
+# -- LocalFileCache specifics --------------------------------------------------
+
+
+def _files(tmp_path: Path) -> list[Path]:
+    return sorted(path for path in (tmp_path / "files").rglob("*") if path.is_file())
+
+
+def test_files_are_sharded_with_a_header(tmp_path: Path) -> None:
+    backend = _file_backend(tmp_path)
+    backend.set("ns:k", b"value")
+
+    (path,) = _files(tmp_path)
+    assert path.parent.parent == tmp_path / "files"
+    assert len(path.parent.name) == 2
+    assert path.read_bytes().startswith(LocalFileCache._MAGIC)
+    assert path.read_bytes().endswith(b"value")
+
+
+def test_failed_write_keeps_the_old_value_and_no_temp_file(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    backend = _file_backend(tmp_path)
+    backend.set("ns:k", b"old")
+
+    def fail(*args: object) -> None:
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", fail)
+    backend.set("ns:k", b"new")
+    monkeypatch.undo()
+
+    assert backend.get("ns:k") == b"old"
+    assert [path.name for path in _files(tmp_path)] == ["ns%3Ak"]
+
+
+def test_lfu_eviction_keeps_frequently_read_entries(tmp_path: Path) -> None:
+    backend = _file_backend(tmp_path, max_bytes=_BUDGET, eviction="lfu")
+    for name in (b"a", b"b", b"c"):
+        backend.set(f"ns:{name.decode()}", _value(name))
+    for _ in range(3):
+        backend.get("ns:a")
+        backend.get("ns:b")
+    backend.get("ns:c")  # most recent, but least used
+
+    backend.set("ns:d", _value(b"d"))
+
+    assert backend.get("ns:c") is None
+    assert backend.get("ns:a") is not None
+    assert backend.get("ns:b") is not None
+
+
+def test_unknown_eviction_policy_is_rejected(tmp_path: Path) -> None:
+    with pytest.raises(ValueError, match="eviction"):
+        _file_backend(tmp_path, eviction="fifo")
+
+
+def test_sweep_enforces_the_budget_over_other_processes_writes(tmp_path: Path) -> None:
+    first = _file_backend(tmp_path, max_bytes=_BUDGET)
+    second = _file_backend(tmp_path, max_bytes=_BUDGET)
+    second.set("ns:a", _value(b"a"))  # second indexes the directory now
+    first.set("ns:b", _value(b"b"))
+    first.set("ns:c", _value(b"c"))
+    second.set("ns:d", _value(b"d"))  # within budget as far as second knows
+    assert len(_files(tmp_path)) == 4
+
+    assert first.sweep() == 1
+    assert len(_files(tmp_path)) == 3
+    # Unknown to first until the sweep, so least recently used
+    assert first.get("ns:d") is None
+
+
+def test_sweep_removes_abandoned_temp_files_and_corrupt_entries(tmp_path: Path) -> None:
+    backend = _file_backend(tmp_path)
+    backend.set("ns:k", b"value")
+    shard = _files(tmp_path)[0].parent
+    old_tmp = shard / ".old.tmp"
+    new_tmp = shard / ".new.tmp"
+    corrupt = shard / "ns%3Acorrupt"
+    for path in (old_tmp, new_tmp, corrupt):
+        path.write_bytes(b"junk")
+    stamp = time.time() - cache._TMP_MAX_AGE_SECONDS - 1
+    os.utime(old_tmp, (stamp, stamp))
+
+    assert backend.sweep() == 1  # the corrupt entry; temp files are not entries
+    assert not old_tmp.exists()
+    assert new_tmp.exists()  # may still be mid-write
+    assert not corrupt.exists()
+    assert backend.get("ns:k") == b"value"
+
+
+# -- SQLiteCache specifics -----------------------------------------------------
+
+
+def test_sqlite_batch_is_all_or_nothing(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    backend = _sqlite_backend(tmp_path)
+    backend.set("ns:a", b"old")
+
+    def fail(*args: object, **kwargs: object) -> int:
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(backend, "_evict", fail)
+    backend.set_many({"ns:a": b"new", "ns:b": b"new"})
+    monkeypatch.undo()
+
+    assert backend.get("ns:a") == b"old"
+    assert backend.get("ns:b") is None
+
+
+def test_sqlite_instances_share_the_database(tmp_path: Path) -> None:
+    writer = _sqlite_backend(tmp_path)
+    reader = _sqlite_backend(tmp_path)
+    writer.set_many({"ns:a": b"1", "ns:b": b"2"})
+
+    assert reader.get_many(["ns:a", "ns:b", "ns:c"]) == {"ns:a": b"1", "ns:b": b"2"}
+
+
+def test_sqlite_metadata_counts_hits(tmp_path: Path) -> None:
+    backend = _sqlite_backend(tmp_path)
+    backend.set("image:k", b"value", ttl_seconds=100)
+    for _ in range(3):
+        backend.get("image:k")
+
+    metadata = backend.metadata("image:k")
+    assert metadata is not None
+    assert metadata["namespace"] == "image"
+    assert metadata["size"] == 5
+    assert metadata["hits"] == 3
+    assert metadata["expires_at"] == pytest.approx(metadata["created_at"] + 100)
+    assert backend.stats() == {"image": {"entries": 1, "bytes": 5}}
+    assert backend.metadata("image:missing") is None
+
+
+def test_sqlite_purge_uses_each_namespace_stale_window(tmp_path: Path) -> None:
+    # No instance-wide stale window: each namespace's policy decides
+    backend = SQLiteCache(path=tmp_path / "cache.sqlite3", janitor_interval=0)
+    image_stale = cache._policies.for_key("image:k").max_stale_seconds
+    default_stale = cache._policies.default.max_stale_seconds
+    assert image_stale > default_stale
+    backend.set("image:k", b"value", ttl_seconds=-(default_stale + 10))
+    backend.set("other:k", b"value", ttl_seconds=-(default_stale + 10))
+
+    assert backend.purge_expired() == 1
+    assert backend.get_entry("image:k") is not None
+    assert backend.get_entry("other:k") is None
@@ -0,0 +1,89 @@
+"""SingleFlight: one execution per key for concurrent callers."""
+
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from controller.cache import SingleFlight
+
+
+def _blocking(release: threading.Event, calls: list[int], result: bytes = b"value"):
+    def fn() -> bytes:
+        calls.append(1)
+        release.wait(5)
+        return result
+
+    return fn
+
+
+def test_concurrent_callers_share_one_call() -> None:
+    flights = SingleFlight()
+    release = threading.Event()
+    calls: list[int] = []
+    fn = _blocking(release, calls)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(flights.do, "k", fn) for _ in range(8)]
+        while not flights.in_flight("k"):
+            pass
+        release.set()
+        results = [future.result(timeout=5) for future in futures]
+
+    assert results == [b"value"] * 8
+    assert len(calls) == 1
+    assert not flights.in_flight("k")
+
+
+def test_leader_exception_reaches_every_caller() -> None:
+    flights = SingleFlight()
+    release = threading.Event()
+
+    def fail() -> bytes:
+        release.wait(5)
+        raise RuntimeError("boom")
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(flights.do, "k", fail) for _ in range(4)]
+        release.set()
+        for future in futures:
+            with pytest.raises(RuntimeError, match="boom"):
+                future.result(timeout=5)
+    assert not flights.in_flight("k")
+
+
+def test_key_runs_again_after_it_finishes() -> None:
+    flights = SingleFlight()
+    calls: list[int] = []
+
+    def fn() -> int:
+        calls.append(1)
+        return len(calls)
+
+    assert flights.do("k", fn) == 1
+    assert flights.do("k", fn) == 2
+
+
+def test_distinct_keys_do_not_wait_for_each_other() -> None:
+    flights = SingleFlight()
+    release = threading.Event()
+    calls: list[int] = []
+    started = flights.start("slow", _blocking(release, calls))
+
+    assert started
+    assert flights.do("fast", lambda: b"fast") == b"fast"
+    release.set()
+
+
+def test_start_skips_keys_already_in_flight() -> None:
+    flights = SingleFlight()
+    release = threading.Event()
+    calls: list[int] = []
+
+    assert flights.start("k", _blocking(release, calls))
+    assert not flights.start("k", _blocking(release, calls))
+    release.set()
+    assert flights.do("k", lambda: b"after") in (b"value", b"after")
+    assert len(calls) == 1
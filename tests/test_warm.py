@@ -0,0 +1,37 @@
+"""Deploy-time cache warming."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from controller import cache
+from controller.documents import download_cache_key, register_data_sources
+from controller.warm import warm
+from tests.helpers import make_cache
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
+    import pytest
+
+
+def test_warm_skips_variants_a_slow_redis_holds(
+    tmp_path: Path,
+    start_redis: Callable[..., str],
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    start_redis(delays={b"GET": 0.3})
+    # Far slower than the read budget, so only a complete lookup sees Redis
+    monkeypatch.setattr(cache, "_cache", make_cache(tmp_path / "warm", read_budget_seconds=0.05))
+    register_data_sources()
+    deployed = make_cache(tmp_path / "deployed")
+    for compact in (True, False):
+        deployed.set(download_cache_key("ENGLISH", compact), b"cached")
+
+    assert warm(("ENGLISH",)) == 0
+
+    assert capsys.readouterr().out.count("skipped (cached)") == 2
+    for compact in (True, False):
+        assert deployed.get(download_cache_key("ENGLISH", compact)) == b"cached"
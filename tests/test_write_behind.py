@@ -0,0 +1,126 @@
+"""WriteBehindQueue: coalescing, bounded size and flushing."""
+
+from __future__ import annotations
+
+import threading
+import time
+
+from controller.cache import PendingWrite, WriteBehindQueue
+
+_BOTH = frozenset(("redis", "local"))
+
+
+def _write(value: bytes, targets: frozenset[str] = _BOTH) -> PendingWrite:
+    return PendingWrite(value, None, time.time() + 60, targets)
+
+
+class _Recorder:
+    """A persist callback that can be held to let writes pile up."""
+
+    def __init__(self) -> None:
+        self.batches: list[dict[str, PendingWrite]] = []
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def __call__(self, batch: dict[str, PendingWrite]) -> None:
+        self.gate.wait(5)
+        self.batches.append(dict(batch))
+
+    def persisted(self) -> dict[str, PendingWrite]:
+        merged: dict[str, PendingWrite] = {}
+        for batch in self.batches:
+            merged.update(batch)
+        return merged
+
+
+def test_flush_persists_everything_queued() -> None:
+    recorder = _Recorder()
+    queue = WriteBehindQueue(recorder)
+    for i in range(10):
+        assert queue.put(f"k:{i}", _write(b"%d" % i))
+
+    assert queue.flush(5)
+    assert {key: write.value for key, write in recorder.persisted().items()} == {
+        f"k:{i}": b"%d" % i for i in range(10)
+    }
+    assert queue.get("k:0") is None
+
+
+def test_rewrites_coalesce_and_merge_targets() -> None:
+    recorder = _Recorder()
+    recorder.gate.clear()
+    queue = WriteBehindQueue(recorder)
+    queue.put("busy", _write(b"x"))  # occupies the worker until the gate opens
+    time.sleep(0.05)
+
+    queue.put("k", _write(b"old", frozenset(("local",))))
+    queue.put("k", _write(b"new", frozenset(("redis",))))
+    pending = queue.get("k")
+    assert pending is not None
+    assert pending.value == b"new"
+
+    recorder.gate.set()
+    assert queue.flush(5)
+    writes = [batch["k"] for batch in recorder.batches if "k" in batch]
+    assert len(writes) == 1
+    assert writes[0].value == b"new"
+    assert writes[0].targets == _BOTH
+
+
+def test_backfill_does_not_clobber_a_queued_write() -> None:
+    recorder = _Recorder()
+    recorder.gate.clear()
+    queue = WriteBehindQueue(recorder)
+    queue.put("busy", _write(b"x"))
+    time.sleep(0.05)
+
+    queue.put("k", _write(b"fresh"))
+    assert queue.put("k", _write(b"backfill"), replace=False)
+
+    recorder.gate.set()
+    assert queue.flush(5)
+    assert recorder.persisted()["k"].value == b"fresh"
+
+
+def test_full_queue_refuses_new_keys() -> None:
+    recorder = _Recorder()
+    recorder.gate.clear()
+    queue = WriteBehindQueue(recorder, max_pending=2)
+    queue.put("busy", _write(b"x"))
+    time.sleep(0.05)
+
+    assert queue.put("a", _write(b"a"))
+    assert queue.put("b", _write(b"b"))
+    assert not queue.put("c", _write(b"c"))
+    # Rewriting a key that is already queued still coalesces
+    assert queue.put("a", _write(b"a2"))
+
+    recorder.gate.set()
+    assert queue.flush(5)
+    assert "c" not in recorder.persisted()
+
+
+def test_discarded_write_is_not_persisted() -> None:
+    recorder = _Recorder()
+    recorder.gate.clear()
+    queue = WriteBehindQueue(recorder)
+    queue.put("busy", _write(b"x"))
+    time.sleep(0.05)
+
+    queue.put("k", _write(b"v"))
+    queue.discard("k")
+
+    recorder.gate.set()
+    assert queue.flush(5)
+    assert "k" not in recorder.persisted()
+
+
+def test_flush_times_out_while_persistence_is_stuck() -> None:
+    recorder = _Recorder()
+    recorder.gate.clear()
+    queue = WriteBehindQueue(recorder)
+    queue.put("k", _write(b"v"))
+
+    assert not queue.flush(0.1)
+    recorder.gate.set()
+    assert queue.flush(5)